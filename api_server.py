@@ -0,0 +1,507 @@
+"""Headless HTTP/JSON API over the item store, for scripts that run without the GUI.
+
+Usage: python api_server.py [--db dados.sqlite] [--host 127.0.0.1] [--port 8080] [--leitores 4]
+
+Standard library only (asyncio), HTTP/1.1 with keep-alive. Endpoints:
+
+  GET  /itens?pago=0&limite=200&apos=CRIADO_EM|ID   one page, newest first (keyset)
+  GET  /itens?formato=jsonl&pago=0&inicio=2025-04&fim=2025-05
+                                                     every item in the range as JSON
+                                                     lines, oldest first, streamed
+  GET  /itens/ID                                     one item
+  GET  /itens/busca?q=texto&pago=0&limite=200&deslocamento=0
+  GET  /resumo?periodo=month&inicio=2025-01&limite=10
+  POST /itens         {"quantidade", "descricao", "destino", "valor_unitario", "pago"}
+  POST /itens/lote    JSON array of the same objects, or JSON lines
+  POST /itens/pagar   {"ids": [...], "pago": 1}, or {"destino", "inicio", "fim", "pago"}
+
+valor_unitario is in reais: a number, or pt_BR text such as "10,50" or
+"1.234,56" (text like "10.50" is rejected with 400 as ambiguous). Money in
+responses is in integer centavos (*_centavos). Errors are {"erro": ...}.
+
+Reads run on a pool of reader threads, each with its own pooled SQLite
+connection; every write goes through one writer thread, i.e. a single writer
+connection. Single-item POSTs that arrive while a write is in progress are
+committed together in one transaction (group commit). GET responses carry an
+ETag from the position of the alteracoes change log, read in the same
+snapshot as the data, so a matching If-None-Match gets 304 without running
+the query.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from itertools import islice
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import database
+from db_pool import close_pools
+from models import Item, Total, parse_item
+
+READERS = 4
+MAX_BODY = 16 * 1024 * 1024
+MAX_GROUP = 256  # Single-item inserts committed together, at most
+STREAM_QUEUE = 8  # JSON-lines chunks buffered between the reader thread and the socket
+# Item fields as sent to clients, in database.ITEM_COLUMNS order.
+ITEM_FIELDS = ("id", "quantidade", "descricao", "destino", "valor_unitario_centavos", "valor_total_centavos",
+               "criado_em", "pago", "versao")
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]  # Lower-case names
+    body: bytes = b""
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError as e:
+            raise HttpError(400, f"JSON inválido: {e}") from None
+
+    def int_param(self, name: str, default: Optional[int], minimum: Optional[int] = None) -> Optional[int]:
+        value = self.query.get(name)
+        if value is None or value == "":
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            raise HttpError(400, f"Parâmetro {name} inválido: {value!r}") from None
+        if minimum is not None and number < minimum:
+            raise HttpError(400, f"Parâmetro {name} deve ser pelo menos {minimum}: {value!r}")
+        return number
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: Any = None  # Serialised as JSON
+    headers: Dict[str, str] = field(default_factory=dict)
+    stream: Optional[AsyncGenerator[bytes, None]] = None  # Sent with chunked encoding instead of body
+
+
+def row_json(row: tuple) -> Dict[str, Any]:
+    return dict(zip(ITEM_FIELDS, row))
+
+
+def item_json(item: Item) -> Dict[str, Any]:
+    return row_json((item.id, item.quantidade, item.descricao, item.destino, int(item.valor_unitario),
+                     int(item.valor_total), item.criado_em, item.pago, item.versao))
+
+
+def total_json(total: Total) -> Dict[str, Any]:
+    return {"chave": total.chave, "pago": total.pago, "itens": total.itens, "quantidade": total.quantidade,
+            "valor_total_centavos": int(total.valor_total)}
+
+
+def item_from_json(data: Any) -> Item:
+    """Validates one posted item with the same rules as the GUI form; raises ValueError.
+
+    valor_unitario is a JSON number in reais or pt_BR text ("1.234,56"):
+    a string like "10.50" is rejected rather than guessed at.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Esperado um objeto JSON")
+    item = parse_item(data.get("quantidade"), data.get("descricao"), data.get("destino"), data.get("valor_unitario"),
+                      dot_decimal=False)
+    item.pago = 1 if data.get("pago") else 0
+    return item
+
+
+def _read_if_changed(etag_seen: Optional[str], fn: Callable[..., Any], *args: Any) -> Tuple[str, Any]:
+    """Runs on a reader thread: (etag, fn(*args)), or (etag, None) if the client has it."""
+    with database.transaction():  # One snapshot for the ETag and the data
+        etag = f'"{database.last_change_id()}"'
+        if etag == etag_seen:
+            return etag, None
+        return etag, fn(*args)
+
+
+@database.retry_on_busy
+def _insert_group(items: List[Item]) -> List[Any]:
+    """Runs on the writer thread: one transaction, one savepoint per item.
+
+    Returns the stored Item, or the error, for each input item.
+    """
+    results: List[Any] = []
+    with database.transaction(immediate=True):
+        for item in items:
+            try:
+                results.append(database.insert_item(item))
+            except sqlite3.Error as e:
+                results.append(e)
+    return results
+
+
+class ApiServer:
+    def __init__(self, readers: int = READERS) -> None:
+        self.readers = ThreadPoolExecutor(readers, thread_name_prefix="api-leitor")
+        self.writer = ThreadPoolExecutor(1, thread_name_prefix="api-escritor")
+        self._inserts: Optional[asyncio.Queue] = None
+        self._group_task: Optional[asyncio.Task] = None
+        self.routes: Dict[Tuple[str, str], Callable[[Request], Awaitable[Response]]] = {
+            ("GET", "/itens"): self.listar,
+            ("GET", "/itens/busca"): self.buscar,
+            ("GET", "/resumo"): self.resumo,
+            ("POST", "/itens"): self.inserir,
+            ("POST", "/itens/lote"): self.inserir_lote,
+            ("POST", "/itens/pagar"): self.pagar,
+        }
+
+    async def read(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.readers, functools.partial(fn, *args))
+
+    async def write(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.writer, functools.partial(fn, *args))
+
+    async def conditional(self, request: Request, fn: Callable[..., Any], *args: Any,
+                          render: Callable[[Any], Any] = lambda result: result) -> Response:
+        etag, result = await self.read(_read_if_changed, request.headers.get("if-none-match"), fn, *args)
+        if result is None and request.headers.get("if-none-match") == etag:
+            return Response(304, headers={"ETag": etag})
+        return Response(body=render(result), headers={"ETag": etag})
+
+    # Handlers -----------------------------------------------------------
+
+    async def listar(self, request: Request) -> Response:
+        paid = request.int_param("pago", 0)
+        if request.query.get("formato") == "jsonl":
+            return await self.listar_jsonl(request, paid)
+        limit = min(request.int_param("limite", database.ITEMS_PAGE_SIZE, minimum=1), 10_000)
+        after = None
+        if request.query.get("apos"):
+            criado_em, _, id = request.query["apos"].rpartition("|")
+            if not id.isdigit():
+                raise HttpError(400, "apos deve ser CRIADO_EM|ID")
+            after = (criado_em, int(id))
+
+        def render(page: List[Item]) -> Dict[str, Any]:
+            last = page[-1] if len(page) == limit else None
+            return {"itens": [item_json(item) for item in page],
+                    "proxima": f"{last.criado_em}|{last.id}" if last else None}
+        return await self.conditional(request, database.get_items_page, paid, after, limit, render=render)
+
+    async def listar_jsonl(self, request: Request, paid: int) -> Response:
+        start, end = request.query.get("inicio", ""), request.query.get("fim", "9999")
+        etag_seen = request.headers.get("if-none-match")
+        stream = self._stream_rows(paid, start, end, etag_seen)
+        etag = await stream.__anext__()
+        if etag == etag_seen:
+            await stream.aclose()
+            return Response(304, headers={"ETag": etag})
+        return Response(headers={"Content-Type": "application/x-ndjson", "ETag": etag}, stream=stream)
+
+    async def _stream_rows(self, paid: int, start: str, end: str,
+                           etag_seen: Optional[str]) -> AsyncGenerator[Any, None]:
+        """Yields the ETag, then the rows, read and encoded on a reader thread FETCH_SIZE at a time.
+
+        The ETag and the rows come from one read transaction, like
+        _read_if_changed; no rows are read if the client has that ETag. The
+        bounded queue holds the reader back while the client is slow; if the
+        client goes away the reader stops at its next chunk.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(STREAM_QUEUE)
+        stop = threading.Event()
+
+        def put(data: Any) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(data), loop).result()
+
+        def produce() -> None:
+            try:
+                with database.transaction():  # One snapshot for the ETag and the rows
+                    etag = f'"{database.last_change_id()}"'
+                    put(etag)
+                    if etag == etag_seen:
+                        return
+                    rows = database.iter_item_rows(paid, start, end)
+                    while not stop.is_set() and (chunk := list(islice(rows, database.FETCH_SIZE))):
+                        put("".join(json.dumps(row_json(row), ensure_ascii=False) + "\n" for row in chunk).encode())
+                    rows.close()
+            except Exception as e:  # Reported after the rows already sent
+                put(e)
+            else:
+                put(None)
+
+        producer = loop.run_in_executor(self.readers, produce)
+        try:
+            data = await queue.get()
+            if isinstance(data, Exception):
+                raise data
+            yield data
+            while (data := await queue.get()) is not None:
+                if isinstance(data, Exception):
+                    yield (json.dumps({"erro": str(data)}, ensure_ascii=False) + "\n").encode()
+                    break
+                yield data
+        finally:
+            stop.set()
+            while not producer.done():  # Unblock a pending put so the thread can finish
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0.001)
+
+    async def item(self, request: Request, id: int) -> Response:
+        def render(item: Optional[Item]) -> Dict[str, Any]:
+            if item is None:
+                raise HttpError(404, f"Item {id} não encontrado")
+            return item_json(item)
+        return await self.conditional(request, database.get_item, id, render=render)
+
+    async def buscar(self, request: Request) -> Response:
+        texto = request.query.get("q", "")
+        paid = None if request.query.get("pago") == "todos" else request.int_param("pago", 0)
+        limit = min(request.int_param("limite", database.ITEMS_PAGE_SIZE, minimum=1), 10_000)
+        offset = request.int_param("deslocamento", 0, minimum=0)
+        return await self.conditional(request, database.search_items, texto, paid, limit, offset,
+                                      render=lambda page: {"itens": [item_json(item) for item in page]})
+
+    async def resumo(self, request: Request) -> Response:
+        period = request.query.get("periodo", "month")
+        if period not in database.SUMMARY_PERIODS:
+            raise HttpError(400, f"periodo deve ser um de {sorted(database.SUMMARY_PERIODS)}")
+        start, end = request.query.get("inicio", ""), request.query.get("fim", "9999")
+        limit = request.int_param("limite", -1)
+
+        def carregar() -> Dict[str, Any]:
+            return {
+                "status": [total_json(total) for total in database.get_totals_by_status()],
+                "destinos": [total_json(total) for total in database.get_totals_by_destino(None, limit)],
+                "periodos": [total_json(total) for total in database.get_totals_by_period(period, None, start, end)],
+            }
+        return await self.conditional(request, carregar)
+
+    async def inserir(self, request: Request) -> Response:
+        try:
+            item = item_from_json(request.json())
+        except ValueError as e:
+            raise HttpError(400, str(e)) from None
+        future = asyncio.get_running_loop().create_future()
+        await self._insert_queue().put((item, future))
+        return Response(201, item_json(await future))
+
+    def _insert_queue(self) -> asyncio.Queue:
+        if self._inserts is None:
+            self._inserts = asyncio.Queue()
+            self._group_task = asyncio.get_running_loop().create_task(self._group_commit())
+        return self._inserts
+
+    async def _group_commit(self) -> None:
+        """Writes queued single inserts; whatever queued up during one write goes in the next."""
+        assert self._inserts is not None
+        while True:
+            group = [await self._inserts.get()]
+            while len(group) < MAX_GROUP and not self._inserts.empty():
+                group.append(self._inserts.get_nowait())
+            try:
+                results = await self.write(_insert_group, [item for item, _ in group])
+            except Exception as e:
+                results = [e] * len(group)
+            for (_, future), result in zip(group, results):
+                if future.done():  # Client gone
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def inserir_lote(self, request: Request) -> Response:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            try:
+                data = [json.loads(line) for line in request.body.splitlines() if line.strip()]
+            except ValueError as e:
+                raise HttpError(400, f"JSON inválido: {e}") from None
+        else:
+            data = request.json()
+            if not isinstance(data, list):
+                raise HttpError(400, "Esperada uma lista de itens")
+        items, rejected = [], []
+        for line, entry in enumerate(data, start=1):
+            try:
+                items.append(item_from_json(entry))
+            except ValueError as e:
+                rejected.append({"linha": line, "erro": str(e)})
+        result = await self.write(database.insert_items, items)
+        return Response(201 if result.rows else 200, {
+            "inseridos": result.rows, "ids": result.ids, "rejeitados": rejected,
+            "erros": [{"inicio": error.start, "tamanho": error.size, "erro": error.error} for error in result.errors],
+        })
+
+    async def pagar(self, request: Request) -> Response:
+        data = request.json()
+        if not isinstance(data, dict):
+            raise HttpError(400, "Esperado um objeto JSON")
+        paid = 1 if data.get("pago", 1) else 0
+        if "ids" in data:
+            ids = data["ids"]
+            if not isinstance(ids, list) or not all(isinstance(id, int) for id in ids):
+                raise HttpError(400, "ids deve ser uma lista de inteiros")
+            changed = await self.write(database.mark_paid, ids, paid)
+        else:
+            changed = await self.write(database.mark_paid_by_filter, data.get("destino"), data.get("inicio", ""),
+                                       data.get("fim", "9999"), paid)
+        return Response(body={"alterados": changed})
+
+    # HTTP ---------------------------------------------------------------
+
+    async def dispatch(self, request: Request) -> Response:
+        handler = self.routes.get((request.method, request.path))
+        if handler is not None:
+            return await handler(request)
+        prefix, _, id = request.path.rpartition("/")
+        if prefix == "/itens" and id.isdigit():
+            if request.method != "GET":
+                raise HttpError(405, "Método não permitido")
+            return await self.item(request, int(id))
+        if any(path == request.path for _, path in self.routes):
+            raise HttpError(405, "Método não permitido")
+        raise HttpError(404, "Não encontrado")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HttpError as e:
+                    await _send(writer, Response(e.status, {"erro": str(e)}), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                try:
+                    response = await self.dispatch(request)
+                except HttpError as e:
+                    response = Response(e.status, {"erro": str(e)})
+                except database.ConflictError as e:
+                    response = Response(409, {"erro": str(e)})
+                except sqlite3.Error as e:
+                    print(f"Database error: {e}")
+                    response = Response(500, {"erro": f"Erro de banco de dados: {e}"})
+                except Exception:  # A bug, here or in a group commit: answer it and keep serving
+                    traceback.print_exc()
+                    response = Response(500, {"erro": "Erro interno do servidor"})
+                keep_alive = _keep_alive(request)
+                await _send(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        print(f"Servindo {database.DB_FILE} em {addresses}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self.readers.shutdown()
+        self.writer.shutdown()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Reads one request; None when the client closed the connection between requests."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HttpError(400, "Requisição incompleta") from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Cabeçalhos grandes demais") from None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HttpError(400, "Linha de requisição inválida") from None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    headers[":version"] = version
+    if "transfer-encoding" in headers:
+        raise HttpError(411, "Envie o corpo com Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Content-Length inválido") from None
+    if length > MAX_BODY:
+        raise HttpError(413, "Corpo grande demais")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return Request(method, url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), headers, body)
+
+
+def _keep_alive(request: Request) -> bool:
+    connection = request.headers.get("connection", "").lower()
+    if request.headers[":version"] == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+async def _send(writer: asyncio.StreamWriter, response: Response, keep_alive: bool) -> None:
+    headers = {"Connection": "keep-alive" if keep_alive else "close", **response.headers}
+    body = b""
+    if response.stream is not None:
+        headers["Transfer-Encoding"] = "chunked"
+    else:
+        if response.body is not None:
+            body = json.dumps(response.body, ensure_ascii=False).encode()
+            headers.setdefault("Content-Type", "application/json; charset=utf-8")
+        headers["Content-Length"] = str(len(body))
+    head = [f"HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}"]
+    head.extend(f"{name}: {value}" for name, value in headers.items())
+    if response.stream is None:
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        return
+    try:  # The stream holds a read transaction until it is closed
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        async for chunk in response.stream:
+            writer.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+            await writer.drain()  # Backpressure: wait while the client is slow
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+    finally:
+        await response.stream.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON de itens (sem interface gráfica).")
+    parser.add_argument("--db", default=database.DB_FILE, help="arquivo do banco (padrão: %(default)s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--leitores", type=int, default=READERS, help="threads de leitura (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    database.DB_FILE = args.db
+    database.init_db()
+    server = ApiServer(readers=args.leitores)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
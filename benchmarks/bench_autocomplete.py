@@ -0,0 +1,58 @@
+"""PrefixIndex (sugestoes.py) build time and lookup latency over many distinct values.
+
+Usage: python benchmarks/bench_autocomplete.py [--values 300000] [--lookups 5000]
+Runs in memory; the database is not touched.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sugestoes import PrefixIndex  # noqa: E402
+
+WORDS = ["parafuso", "porca", "arruela", "cimento", "areia", "tijolo", "cano", "registro", "tinta",
+         "pincel", "lixa", "prego", "martelo", "serrote", "broca", "fita", "cola", "cabo", "tomada", "disjuntor",
+         "depósito", "conexão", "válvula", "mangueira"]
+
+
+def make_values(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    # Skewed counts, as in real use: a few values are typed far more often than the rest.
+    return [(f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", int(rng.paretovariate(1.2))) for i in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=300_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    values = make_values(args.values, args.seed)
+    start = time.perf_counter()
+    index = PrefixIndex(values)
+    print(f"built index of {len(index)} values in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(args.seed)
+    prefixes = [value[:rng.randint(1, len(value))] for value, _ in rng.sample(values, args.lookups)]
+    latencies = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.lookup(prefix)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"lookup  p50 {latencies[len(latencies) // 2] * 1000:.4f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.4f} ms  max {latencies[-1] * 1000:.4f} ms")
+
+    added = 1000
+    start = time.perf_counter()
+    for i in range(added):
+        index.add(f"{rng.choice(WORDS)} novo {i}")
+    print(f"add     {(time.perf_counter() - start) / added * 1000:.4f} ms per new value")
+
+
+if __name__ == "__main__":
+    main()
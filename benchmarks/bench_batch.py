@@ -0,0 +1,64 @@
+"""Rows/sec of per-row insert_item/update_item vs. insert_items/update_items.
+
+Usage: python benchmarks/bench_batch.py [--rows 20000] [--chunk-size 1000]
+Runs against a throwaway database in a temp directory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+from models import Item, Money  # noqa: E402
+
+
+def make_items(n: int):
+    for i in range(n):
+        yield Item(quantidade=i % 9 + 1, descricao=f"Item {i}", destino=f"Destino {i % 37}",
+                   valor_unitario=Money(125))
+
+
+def report(label: str, rows: int, elapsed: float) -> None:
+    print(f"{label:<26} {rows / elapsed:>12.0f} rows/s  ({elapsed:.2f}s for {rows} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=database.BATCH_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.sqlite")
+        database.init_db()
+
+        # The per-row path is much slower; a tenth of the rows is enough to measure it.
+        per_row = max(args.rows // 10, 1)
+        start = time.perf_counter()
+        for item in make_items(per_row):
+            database.insert_item(item)
+        report("insert_item (per row)", per_row, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = database.insert_items(make_items(args.rows), chunk_size=args.chunk_size)
+        report("insert_items", result.rows, time.perf_counter() - start)
+
+        updates = [Item(id=i, quantidade=1, descricao="x", destino="y", valor_unitario=Money(200))
+                   for i in result.ids]
+        start = time.perf_counter()
+        for index, item in enumerate(updates[:per_row]):
+            updates[index] = database.update_item(item)  # New versao, for update_items below
+        report("update_item (per row)", per_row, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = database.update_items(updates, chunk_size=args.chunk_size)
+        report("update_items", result.rows, time.perf_counter() - start)
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
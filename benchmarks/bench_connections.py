@@ -0,0 +1,80 @@
+"""Micro-benchmark: per-call connect/commit/close vs. the pooled connection layer.
+
+Usage: python benchmarks/bench_connections.py [--ops 2000]
+Runs against a throwaway database in a temp directory.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+from models import Item, Money  # noqa: E402
+
+
+# Default rollback journal, no pragmas: what connect_db() used to give us.
+LEGACY_SCHEMA = """
+CREATE TABLE configuracao_empresa (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, nome_empresa TEXT, endereco TEXT, cnpj TEXT, telefone TEXT);
+CREATE TABLE itens (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, quantidade INTEGER, descricao TEXT, destino TEXT,
+    valor_unitario REAL, valor_total REAL, pago INTEGER DEFAULT 0, criado_em TEXT DEFAULT CURRENT_TIMESTAMP);
+"""
+LEGACY_INSERT = """
+    INSERT INTO itens (quantidade, descricao, destino, valor_unitario, valor_total, pago)
+    VALUES (?, ?, ?, ?, ?, ?)"""
+
+
+def legacy_insert(db_file: str, item: Item) -> None:
+    # Same shape as the original insert_item: connect, execute, commit, close.
+    conn = sqlite3.connect(db_file)
+    conn.execute(LEGACY_INSERT,
+                 (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.valor_total, item.pago))
+    conn.commit()
+    conn.close()
+
+
+def legacy_company(db_file: str) -> None:
+    conn = sqlite3.connect(db_file)
+    conn.execute(database.SQL_SELECT_COMPANY).fetchone()
+    conn.close()
+
+
+def timed(label: str, ops: int, fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {ops / elapsed:>10.0f} ops/s  ({elapsed * 1e6 / ops:.1f} us/op)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    item = Item(quantidade=2, descricao="Parafuso", destino="Obra", valor_unitario=Money(150))
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.sqlite")
+        conn = sqlite3.connect(legacy_db)
+        conn.executescript(LEGACY_SCHEMA)
+        conn.close()
+        database.DB_FILE = os.path.join(tmp, "pooled.sqlite")
+        database.init_db()
+
+        legacy_ins = timed("legacy insert_item", args.ops, lambda: legacy_insert(legacy_db, item))
+        pooled_ins = timed("pooled insert_item", args.ops, lambda: database.insert_item(item))
+        legacy_sel = timed("legacy get_company_config", args.ops, lambda: legacy_company(legacy_db))
+        pooled_sel = timed("pooled get_company_config", args.ops, database.get_company_config)
+        print(f"speedup: insert x{legacy_ins / pooled_ins:.1f}, select x{legacy_sel / pooled_sel:.1f}")
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput and peak memory (tracemalloc) of exportacao.export_items per format.
+
+Usage: python benchmarks/bench_export.py [--rows 1000000] [--formats csv,html,pdf,parquet]
+Runs against a throwaway database in a temp directory. PDF needs PySide6 and
+Parquet needs pyarrow; formats whose dependency is missing are skipped.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import exportacao  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+from models import Item, Money  # noqa: E402
+
+DESTINOS = ["Obra Centro", "Obra Norte", "Loja Matriz", "Depósito", "Cliente Balcão"]
+
+
+def make_items(n: int):
+    for i in range(n):
+        yield Item(quantidade=i % 7 + 1, descricao=f"Item {i}", destino=DESTINOS[i % len(DESTINOS)],
+                   valor_unitario=Money(100 + i % 5000))
+
+
+def measure(path: str, formato: str) -> None:
+    """Times one untraced run, then repeats it under tracemalloc for the peak."""
+    gc.collect()
+    start = time.perf_counter()
+    try:
+        status = exportacao.export_items(path, formato=formato)
+    except RuntimeError as e:
+        print(f"{formato:<8} skipped: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path) / 2**20
+    gc.collect()
+    tracemalloc.start()
+    exportacao.export_items(path, formato=formato)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{formato:<8} {status.linhas / elapsed:10,.0f} rows/s   peak {peak / 2**20:6.1f} MiB"
+          f"   {elapsed:6.2f}s   file {size:7.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formats", default="csv,html,pdf,parquet")
+    args = parser.parse_args()
+
+    formats = args.formats.split(",")
+    if "pdf" in formats:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        try:
+            from PySide6.QtGui import QGuiApplication
+            _app = QGuiApplication(sys.argv)  # noqa: F841
+        except ImportError:
+            formats.remove("pdf")
+            print("pdf      skipped: PySide6 not installed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.sqlite")
+        database.init_db()
+        database.insert_items(make_items(args.rows), chunk_size=10_000)
+        print(f"{args.rows} rows")
+        for formato in formats:
+            measure(os.path.join(tmp, f"itens.{formato}"), formato)
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
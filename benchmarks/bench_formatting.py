@@ -0,0 +1,70 @@
+"""Per-row cost of the table's cell formatting: locale.currency + strptime vs. formatting.py.
+
+Usage: python benchmarks/bench_formatting.py [--rows 200000]
+The locale.currency baseline needs a pt_BR locale; it is skipped if none is installed.
+"""
+import argparse
+import locale
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatting import format_date, format_money, load_conventions  # noqa: E402
+
+
+def make_rows(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    days = [f"2025-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+    return [(rng.randrange(1, 10_000_000), f"{rng.choice(days)} {rng.randrange(24):02d}:15:00") for _ in range(n)]
+
+
+def legacy(rows) -> None:
+    for cents, criado_em in rows:
+        valor = cents / 100
+        locale.currency(valor, grouping=True)
+        locale.currency(valor, grouping=True)
+        datetime.strptime(criado_em, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y")
+
+
+def cached(rows) -> None:
+    for cents, criado_em in rows:
+        format_money(cents)
+        format_money(cents)
+        format_date(criado_em)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    has_locale = False
+    for name in ("pt_BR.UTF-8", "pt_BR.utf8", "pt_BR"):
+        try:
+            locale.setlocale(locale.LC_ALL, name)
+            has_locale = True
+            break
+        except locale.Error:
+            continue
+    load_conventions()
+
+    start = time.perf_counter()
+    cached(rows)
+    new = time.perf_counter() - start
+    print(f"formatting.py      {new * 1e6 / args.rows:7.2f} us/row  ({new:.2f}s)")
+    if not has_locale:
+        print("pt_BR locale not installed: skipping the locale.currency baseline")
+        return
+    start = time.perf_counter()
+    legacy(rows)
+    old = time.perf_counter() - start
+    print(f"locale + strptime  {old * 1e6 / args.rows:7.2f} us/row  ({old:.2f}s)   x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
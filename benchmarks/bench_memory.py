@@ -0,0 +1,61 @@
+"""Peak memory (tracemalloc) of get_items() vs. get_items_batch() vs. iter_items().
+
+Usage: python benchmarks/bench_memory.py [--rows 500000]
+Runs against a throwaway database in a temp directory.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+from models import Item, Money  # noqa: E402
+
+DESTINOS = ["Obra Centro", "Obra Norte", "Loja Matriz", "Depósito", "Cliente Balcão"]
+
+
+def make_items(n: int):
+    for i in range(n):
+        yield Item(quantidade=i % 7 + 1, descricao=f"Item {i}", destino=DESTINOS[i % len(DESTINOS)],
+                   valor_unitario=Money(100 + i % 5000))
+
+
+def measure(label: str, fn) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} peak {peak / 2**20:8.1f} MiB   {elapsed:6.2f}s   ({result} rows)")
+
+
+def consume(iterator) -> int:
+    return sum(1 for _ in iterator)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.sqlite")
+        database.init_db()
+        database.insert_items(make_items(args.rows), chunk_size=10_000)
+
+        measure("get_items (list of Item)", lambda: len(database.get_items()))
+        measure("get_items_batch (columns)", lambda: len(database.get_items_batch()))
+        measure("iter_items (streaming)", lambda: consume(database.iter_items()))
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""search_items (FTS5) vs. a LIKE '%x%' scan over descricao/destino.
+
+Usage: python benchmarks/bench_search.py [--rows 1000000] [--repeat 20]
+Runs against a throwaway database in a temp directory.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+from models import Item  # noqa: E402
+
+WORDS = ["parafuso", "porca", "arruela", "cimento", "areia", "tijolo", "cano", "registro", "tinta",
+         "pincel", "lixa", "prego", "martelo", "serrote", "broca", "fita", "cola", "cabo", "tomada", "disjuntor"]
+DESTINOS = ["Obra Centro", "Obra Norte", "Loja Matriz", "Depósito", "Cliente Balcão", "Filial Sul"]
+QUERIES = ["disj", "parafuso tinta", "obra nor", "zzz"]
+
+SQL_LIKE = f"""
+    SELECT {database.ITEM_COLUMNS} FROM itens
+    WHERE pago = 0 AND (descricao LIKE ? OR destino LIKE ?)
+    ORDER BY criado_em DESC, id DESC LIMIT ?"""
+
+
+def make_items(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(n):
+        descricao = " ".join(rng.sample(WORDS, 3)) + f" {i % 1000}"
+        yield Item(quantidade=1, descricao=descricao, destino=rng.choice(DESTINOS), pago=i % 3 == 0)
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.sqlite")
+        database.init_db()
+        start = time.perf_counter()
+        database.insert_items(make_items(args.rows), chunk_size=10_000)
+        print(f"loaded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        conn = database.connect_db()
+        for query in QUERIES:
+            # LIKE only sees the first word; FTS requires every word, so it is the stricter search.
+            pattern = f"%{query.split()[0]}%"
+            fts = timed(lambda: database.search_items(query), args.repeat)
+            like = timed(lambda: conn.execute(SQL_LIKE, (pattern, pattern, database.ITEMS_PAGE_SIZE)).fetchall(),
+                         args.repeat)
+            print(f"{query!r:<18} fts {fts * 1000:8.2f} ms   like {like * 1000:8.2f} ms   fts speedup x{like / fts:.1f}")
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Checks that the main item queries are served by indexes (EXPLAIN QUERY PLAN).
+
+Usage: python benchmarks/check_query_plans.py
+Exits non-zero if a query scans the itens table or needs a temp B-tree sort.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+
+# (label, sql, params, index that must appear in the plan)
+QUERIES = [
+    ("get_items unpaid", database.SQL_SELECT_ITEMS, (0,), "idx_itens_pago_criado_em"),
+    ("get_items paid", database.SQL_SELECT_ITEMS, (1,), "idx_itens_pago_criado_em"),
+    ("get_items_page first", database.SQL_SELECT_ITEMS_FIRST_PAGE, (0, 200), "idx_itens_pago_criado_em"),
+    ("get_items_page next", database.SQL_SELECT_ITEMS_PAGE, (0, "2025-01-01 00:00:00", 10, 200),
+     "idx_itens_pago_criado_em"),
+    ("iter_item_rows", database.SQL_SELECT_ITEMS_RANGE, (1, "2025-04", "2025-05"), "idx_itens_pago_criado_em"),
+    ("mark_paid_by_filter", database.SQL_MARK_PAID_BY_FILTER, (1, 0, "2025-04", "2025-05", "Obra", "Obra"),
+     "idx_itens_pago_criado_em"),
+    ("query_items next", *database.ItemQuery().sql(("2025-01-01 00:00:00", 10)), "idx_itens_pago_criado_em"),
+    ("query_items destino next", *database.ItemQuery(sort="destino", descending=False).sql(("Obra", "2025", 10)),
+     "idx_itens_pago_destino"),
+    ("query_items destino filter next", *database.ItemQuery(destino="Obra").sql(("2025-01-01", 10)),
+     "idx_itens_pago_destino"),
+    ("query_items valor_total next", *database.ItemQuery(sort="valor_total", min_total=100).sql((5000, 10)),
+     "idx_itens_pago_valor_total"),
+    ("query_items paid next", *database.ItemQuery(paid=1).sql(("2025-01-01 00:00:00", 10)),
+     "idx_itens_arquivo_pago_criado_em"),
+    ("get_suggestions", database.SQL_SUGGESTIONS, ("destino",), "PRIMARY KEY"),
+    ("take_snapshot batch", database.SQL_SNAPSHOT_BATCH, (1, 0, 5000), "INTEGER PRIMARY KEY"),
+    ("take_snapshot changed", database.SQL_SNAPSHOT_COPY_CHANGED, (1, 0), "INTEGER PRIMARY KEY"),
+]
+
+
+def check() -> bool:
+    ok = True
+    for label, sql, params, index in QUERIES:
+        plan = database.explain_query_plan(sql, params)
+        bad = [step for step in plan
+               if step.startswith("SCAN itens") or "USE TEMP B-TREE" in step]
+        passed = not bad and any(index in step for step in plan)
+        ok &= passed
+        print(f"{'ok  ' if passed else 'FAIL'} {label}: {' | '.join(plan)}")
+    return ok
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "plans.sqlite")
+        database.init_db()
+        ok = check()
+        close_pools()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Reproducible synthetic itens tables for benchmarks (10k, 1M, 10M rows...).
+
+Usage: python benchmarks/datagen.py saida.sqlite [--rows 1m] [--seed 42] [--paid-fraction 0.35]
+
+The same rows and seed always give the same table. destino follows a Zipf
+distribution (a few destinos hold most items), quantities and prices are
+skewed towards small values, and criado_em grows with id over two years, as
+in real use. About --paid-fraction of the items are paid, and older items
+are more likely to be.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from typing import Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+
+DESTINOS = 400
+ZIPF_S = 1.1
+PERIOD_DAYS = 730
+START = datetime(2024, 1, 1)
+
+PRODUTOS = ["Cimento", "Areia", "Brita", "Tijolo", "Bloco", "Telha", "Tinta", "Cabo", "Tubo", "Conexão",
+            "Parafuso", "Prego", "Madeira", "Chapa", "Vidro", "Piso", "Argamassa", "Rejunte", "Lâmpada", "Disjuntor",
+            "Caneca", "Camiseta", "Banner", "Adesivo", "Cartão", "Panfleto", "Faixa", "Placa", "Chaveiro", "Boné"]
+DETALHES = ["branco", "preto", "azul", "grande", "pequeno", "médio", "reforçado", "premium", "simples", "personalizado",
+            "10mm", "20mm", "1/2\"", "3/4\"", "50kg", "20kg", "A4", "A3", "fosco", "brilhante"]
+CIDADES = ["Centro", "Norte", "Sul", "Leste", "Oeste", "Jardim", "Vila Nova", "Industrial", "Aeroporto", "Lago"]
+TIPOS = ["Obra", "Loja", "Cliente", "Depósito", "Escritório", "Evento"]
+
+SQL_INSERT_GENERATED = """
+    INSERT INTO itens (quantidade, descricao, destino, valor_unitario, pago, criado_em)
+    VALUES (?, ?, ?, ?, ?, ?)"""
+
+Row = Tuple[int, str, str, int, int, str]
+
+
+def parse_rows(text: str) -> int:
+    """Parses a row count such as "10k", "1.5m" or "2500"."""
+    text = text.lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:])
+    return int(float(text[:-1]) * multiplier) if multiplier else int(text)
+
+
+def destino_names(count: int = DESTINOS) -> List[str]:
+    return [f"{TIPOS[i % len(TIPOS)]} {CIDADES[i // len(TIPOS) % len(CIDADES)]} {i // 60 + 1}"
+            for i in range(count)]
+
+
+def generate_rows(rows: int, seed: int = 42, paid_fraction: float = 0.35) -> Iterator[Row]:
+    """Yields (quantidade, descricao, destino, valor_unitario, pago, criado_em) rows."""
+    rng = random.Random(seed)
+    destinos = destino_names()
+    weights = list(accumulate(1 / (rank ** ZIPF_S) for rank in range(1, len(destinos) + 1)))
+    seconds = PERIOD_DAYS * 86400 / max(rows, 1)
+    for i in range(rows):
+        quantidade = min(int(rng.paretovariate(1.5)), 500)
+        descricao = f"{rng.choice(PRODUTOS)} {rng.choice(DETALHES)} {rng.randrange(1000)}"
+        destino = rng.choices(destinos, cum_weights=weights)[0]
+        valor = max(int(rng.lognormvariate(7.5, 1.2)), 1)  # centavos; median around R$ 18
+        age = 1 - i / rows  # 1 for the oldest row, 0 for the newest
+        pago = int(rng.random() < paid_fraction * 2 * age)
+        criado_em = (START + timedelta(seconds=i * seconds + rng.random() * seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        yield quantidade, descricao, destino, valor, pago, criado_em
+
+
+def populate(rows: int, seed: int = 42, paid_fraction: float = 0.35, chunk_size: int = 50_000,
+             progress: bool = False) -> float:
+    """Fills the current database.DB_FILE; returns the seconds taken."""
+    database.init_db()
+    start = time.perf_counter()
+    generated = generate_rows(rows, seed, paid_fraction)
+    done = 0
+    while chunk := list(islice(generated, chunk_size)):
+        with database.transaction(immediate=True) as cursor:
+            cursor.executemany(SQL_INSERT_GENERATED, chunk)
+        done += len(chunk)
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(f"\r{done:>11,} rows  {done / elapsed:>9,.0f} rows/s", end="", file=sys.stderr, flush=True)
+    with database.transaction() as cursor:
+        cursor.execute("ANALYZE")
+    if progress:
+        print(file=sys.stderr)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("arquivo")
+    parser.add_argument("--rows", default="10k", help="row count, e.g. 10k, 1m, 10m or 250000")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--paid-fraction", type=float, default=0.35)
+    args = parser.parse_args()
+
+    if os.path.exists(args.arquivo):
+        parser.error(f"{args.arquivo} already exists")
+    database.DB_FILE = args.arquivo
+    rows = parse_rows(args.rows)
+    elapsed = populate(rows, args.seed, args.paid_fraction, progress=True)
+    close_pools()
+    print(f"{rows:,} rows in {elapsed:.1f}s -> {args.arquivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Requests/sec and latency of api_server.py under concurrent keep-alive clients.
+
+Usage:
+  python benchmarks/load_test.py [--rows 20k] [--conexoes 16] [--segundos 5] [--only post]
+                                 [--url http://127.0.0.1:8080] [--output results.json]
+
+Without --url, generates a datagen.py database of --rows rows and starts
+api_server.py on it in a subprocess. Each scenario then runs for --segundos
+with --conexoes clients, each sending its next request as soon as the
+previous answer arrives.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import parse_rows  # noqa: E402
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (method, path, body, extra headers) for the n-th request of a client.
+RequestFactory = Callable[[int, int], Tuple[str, str, Optional[bytes], Dict[str, str]]]
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host, self.port = host, port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        assert self.reader is not None
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ")[1])
+        response_headers = {}
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while size := int((await self.reader.readline()).strip(), 16):
+                parts.append(await self.reader.readexactly(size + 2))
+            await self.reader.readline()
+            data = b"".join(part[:-2] for part in parts)
+        else:
+            data = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection") == "close":
+            await self.close()
+        return status, response_headers, data
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def _item_body(client: int, n: int) -> bytes:
+    return json.dumps({"quantidade": n % 9 + 1, "descricao": f"Carga {client}-{n}", "destino": "Carga",
+                       "valor_unitario": "12,34"}).encode()
+
+
+def scenarios(etag: str) -> Dict[str, RequestFactory]:
+    return {
+        "get_page": lambda client, n: ("GET", "/itens?limite=50", None, {}),
+        "get_page_304": lambda client, n: ("GET", "/itens?limite=50", None, {"If-None-Match": etag}),
+        "get_item": lambda client, n: ("GET", f"/itens/{n % 1000 + 1}", None, {}),
+        "search": lambda client, n: ("GET", "/itens/busca?q=cimento&limite=20", None, {}),
+        "summary": lambda client, n: ("GET", "/resumo?limite=10", None, {}),
+        "post_item": lambda client, n: ("POST", "/itens", _item_body(client, n), {}),
+        "post_batch_100": lambda client, n: (
+            "POST", "/itens/lote", b"[" + b",".join(_item_body(client, n * 100 + i) for i in range(100)) + b"]", {}),
+        "stream_jsonl_month": lambda client, n: ("GET", "/itens?formato=jsonl&inicio=2025-06&fim=2025-07", None, {}),
+    }
+
+
+async def run_scenario(host: str, port: int, factory: RequestFactory, connections: int,
+                       seconds: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(index: int) -> None:
+        nonlocal errors
+        client = Client(host, port)
+        n = 0
+        try:
+            while time.perf_counter() < deadline:
+                method, path, body, headers = factory(index, n)
+                start = time.perf_counter()
+                status, _, _ = await client.request(method, path, body, headers)
+                latencies.append(time.perf_counter() - start)
+                if status >= 400:
+                    errors += 1
+                n += 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(rows: int, seed: int, work_dir: str) -> Tuple[subprocess.Popen, int]:
+    db_file = os.path.join(work_dir, "carga.sqlite")
+    print(f"Generating {rows:,} rows...", file=sys.stderr)
+    subprocess.run([sys.executable, os.path.join(REPO, "benchmarks", "datagen.py"), db_file,
+                    "--rows", str(rows), "--seed", str(seed)], check=True, stdout=subprocess.DEVNULL)
+    port = _free_port()
+    process = subprocess.Popen([sys.executable, os.path.join(REPO, "api_server.py"), "--db", db_file,
+                                "--port", str(port)], stdout=subprocess.PIPE, text=True)
+    assert process.stdout is not None
+    process.stdout.readline()  # "Servindo ..." once it listens
+    return process, port
+
+
+async def run(host: str, port: int, args: argparse.Namespace) -> Dict[str, Any]:
+    client = Client(host, port)
+    _, headers, _ = await client.request("GET", "/itens?limite=50")
+    await client.close()
+    results = {}
+    for name, factory in scenarios(headers.get("etag", "")).items():
+        if args.only and args.only not in name:
+            continue
+        if name == "get_page_304":
+            # Writes from earlier scenarios moved the ETag; fetch the current one.
+            client = Client(host, port)
+            _, headers, _ = await client.request("GET", "/itens?limite=50")
+            await client.close()
+            factory = scenarios(headers.get("etag", ""))[name]
+        result = results[name] = await run_scenario(host, port, factory, args.conexoes, args.segundos)
+        print(f"{name:<20} {result['requests_per_s']:>10,.0f} req/s  p50 {result['p50_ms']:>7.2f}ms  "
+              f"p99 {result['p99_ms']:>7.2f}ms  errors {result['errors']}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="server already running (default: start one on generated data)")
+    parser.add_argument("--rows", default="20k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--conexoes", type=int, default=16)
+    parser.add_argument("--segundos", type=float, default=5.0)
+    parser.add_argument("--only", help="run scenarios whose name contains this text")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname or "127.0.0.1", url.port or 80
+        else:
+            process, port = start_server(parse_rows(args.rows), args.seed, tmp)
+            host = "127.0.0.1"
+        try:
+            results = asyncio.run(run(host, port, args))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"connections": args.conexoes, "seconds": args.segundos, "rows": args.rows},
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
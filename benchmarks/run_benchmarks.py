@@ -0,0 +1,286 @@
+"""Benchmark suite for the item workflows, with JSON results and baseline comparison.
+
+Usage:
+  python benchmarks/run_benchmarks.py [--rows 10k] [--repeat 5] [--output results.json]
+                                      [--baseline baseline.json] [--threshold 0.10] [--only search]
+                                      [--data-dir .bench-data]
+
+Builds (or reuses, with --data-dir) a datagen.py database of --rows rows,
+then times inserts, filtered loads, summaries, search and table population
+in an offscreen Qt view. Each case runs --repeat times; the median is what
+gets compared. With --baseline, cases slower than the baseline by more
+than --threshold are reported as regressions (exit status 1).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from datagen import parse_rows, populate  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+from models import Item, Money  # noqa: E402
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FULL_LOAD_LIMIT = 1_000_000  # get_items builds every row as an Item; skipped above this size
+
+# name -> (function returning the number of operations it performed, kind)
+# kind "read" cases run first; "write" cases change the table and run last.
+Case = Callable[[], int]
+CASES: Dict[str, Tuple[Case, str]] = {}
+
+
+def case(name: str, kind: str = "read") -> Callable[[Case], Case]:
+    def register(fn: Case) -> Case:
+        CASES[name] = (fn, kind)
+        return fn
+    return register
+
+
+@case("get_items_page.first")
+def _first_page() -> int:
+    return len(database.get_items_page(0))
+
+
+@case("get_items_page.scroll_10_pages")
+def _scroll() -> int:
+    after = None
+    rows = 0
+    for _ in range(10):
+        page = database.get_items_page(0, after)
+        if not page:
+            break
+        rows += len(page)
+        after = (page[-1].criado_em, page[-1].id)
+    return rows
+
+
+@case("get_items.paid")
+def _full_paid() -> int:
+    if database.count_items(1) > FULL_LOAD_LIMIT:
+        return 0
+    return len(database.get_items(paid=1))
+
+
+@case("iter_item_rows.month")
+def _month() -> int:
+    return sum(1 for _ in database.iter_item_rows(0, "2025-06", "2025-07"))
+
+
+@case("totals.status_destino_month")
+def _totals() -> int:
+    database.get_totals_by_status()
+    database.get_totals_by_destino(paid=0, limit=5)
+    database.get_totals_by_period("month", paid=0, start="2025-01")
+    return 3
+
+
+@case("search_items.common")
+def _search_common() -> int:
+    return len(database.search_items("cimento"))
+
+
+@case("search_items.rare")
+def _search_rare() -> int:
+    return len(database.search_items("chaveiro brilhante"))
+
+
+@case("qt.table_first_page")
+def _qt_first_page() -> int:
+    """reload() to rows painted in an offscreen QTableView, via the DbWorker."""
+    view, model = _qt_view()
+    model.reload()
+    _wait_for(lambda: not model._fetching)
+    view.viewport().repaint()
+    return model.rowCount()
+
+
+@case("qt.table_scroll_5_pages")
+def _qt_scroll() -> int:
+    view, model = _qt_view()
+    model.reload()
+    _wait_for(lambda: not model._fetching)
+    for _ in range(4):
+        view.scrollToBottom()
+        _app().processEvents()
+        _wait_for(lambda: not model._fetching)
+    view.viewport().repaint()
+    return model.rowCount()
+
+
+@case("insert_item.x200", kind="write")
+def _insert_item() -> int:
+    for i in range(200):
+        database.insert_item(Item(quantidade=1, descricao=f"Bench {i}", destino="Bench", valor_unitario=Money(100)))
+    return 200
+
+
+@case("insert_items.x20000", kind="write")
+def _insert_items() -> int:
+    result = database.insert_items(
+        Item(quantidade=i % 9 + 1, descricao=f"Bench {i}", destino="Bench", valor_unitario=Money(100))
+        for i in range(20_000))
+    return result.rows
+
+
+_qt: Dict[str, Any] = {}
+
+
+def _app() -> Any:
+    if "app" not in _qt:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtWidgets import QApplication
+        _qt["app"] = QApplication.instance() or QApplication([])
+    return _qt["app"]
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 60.0) -> None:
+    app = _app()
+    deadline = time.perf_counter() + timeout
+    while True:
+        app.processEvents()
+        if condition():
+            return
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Qt case did not finish")
+        time.sleep(0.0005)
+
+
+def _qt_view() -> Tuple[Any, Any]:
+    if "view" not in _qt:
+        _app()
+        from PySide6.QtWidgets import QTableView
+        from item_model import ItemTableModel
+        view = QTableView()
+        model = ItemTableModel(parent=view)
+        view.setModel(model)
+        view.resize(900, 600)
+        view.show()
+        _qt["view"], _qt["model"] = view, model
+    return _qt["view"], _qt["model"]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_case(fn: Case, repeat: int) -> Dict[str, Any]:
+    fn()  # Warm-up: page cache, statement cache, Qt initialisation
+    times: List[float] = []
+    ops = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = fn()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "ops": ops,
+        "median_ms": round(median * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        "mean_ms": round(statistics.fmean(times) * 1000, 3),
+        "ops_per_s": round(ops / median, 1) if median and ops else None,
+        "runs": repeat,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Prints the change against the baseline; returns the regressed case names."""
+    regressions = []
+    print(f"\n{'case':<34} {'baseline':>11} {'now':>11} {'change':>8}")
+    for name, result in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or not before.get("median_ms") or not result["ops"]:
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<34} {before['median_ms']:>9.2f}ms {result['median_ms']:>9.2f}ms {change:>+7.1%}{flag}")
+    return regressions
+
+
+def prepare_database(rows: int, seed: int, data_dir: Optional[str], work_dir: str) -> str:
+    """Returns a fresh copy of the generated database (generated once per rows/seed with --data-dir)."""
+    target = os.path.join(work_dir, "bench.sqlite")
+    if data_dir:
+        os.makedirs(data_dir, exist_ok=True)
+        cached = os.path.join(data_dir, f"itens_{rows}_{seed}.sqlite")
+        if not os.path.exists(cached):
+            database.DB_FILE = cached
+            print(f"Generating {rows:,} rows into {cached}...", file=sys.stderr)
+            populate(rows, seed, progress=True)
+            database.connect_db().execute("PRAGMA wal_checkpoint(TRUNCATE)")  # Copy a single file
+            close_pools()
+        shutil.copyfile(cached, target)
+    else:
+        database.DB_FILE = target
+        print(f"Generating {rows:,} rows...", file=sys.stderr)
+        populate(rows, seed, progress=True)
+        close_pools()
+    return target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="run cases whose name contains this text")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as regression")
+    parser.add_argument("--data-dir", help="keep generated databases here and reuse them")
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    selected = [(name, fn, kind) for name, (fn, kind) in CASES.items() if not args.only or args.only in name]
+    selected.sort(key=lambda entry: entry[2] == "write")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = prepare_database(rows, args.seed, args.data_dir, tmp)
+        database.init_db()
+        results: Dict[str, Any] = {
+            "meta": {
+                "rows": rows, "seed": args.seed, "repeat": args.repeat, "commit": _git_commit(),
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version, "platform": platform.platform(),
+            },
+            "results": {},
+        }
+        for name, fn, _ in selected:
+            result = results["results"][name] = run_case(fn, args.repeat)
+            rate = f"{result['ops_per_s']:>12,.0f} ops/s" if result["ops_per_s"] else f"{'skipped':>18}"
+            print(f"{name:<34} {result['median_ms']:>10.2f}ms  {rate}")
+        if "view" in _qt:
+            from db_worker import get_worker
+            get_worker().wait()
+        close_pools()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,27 @@
-import locale
 from PySide6.QtWidgets import (
-    QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox
+    QCheckBox, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QHBoxLayout, QMessageBox
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QIntValidator, QRegularExpressionValidator
 from PySide6.QtWidgets import QWidget
 from typing import Optional, Any
-from models import Item
-from database import insert_item, update_item
+from models import MONEY_PATTERN, Item, Money, parse_item
+from database import ConflictError, insert_item, update_item
+from db_worker import get_worker
+from fila_gravacao import WriteBehindQueue
+from formatting import format_money
+from sugestoes import SugestoesCompleter, record_item
 
 
 class CadastroItemDialog(QDialog):
-    def __init__(self, parent: Optional[QWidget] = None, editar: bool = False, dados: Optional[dict[str, Any]] = None) -> None:
+    def __init__(self, parent: Optional[QWidget] = None, editar: bool = False, dados: Optional[dict[str, Any]] = None,
+                 fila: Optional[WriteBehindQueue] = None) -> None:
         super().__init__(parent)
         self.editar: bool = editar
         self.dados: Optional[dict[str, Any]] = dados
+        self.item_salvo: Optional[Item] = None  # Linha gravada (com id e criado_em), preenchida em salvo()
+        self.fila: Optional[WriteBehindQueue] = fila  # Cadastro rápido: gravação em lote, sem esperar o banco
+        self.cadastrados: int = 0  # Itens adicionados à fila por este diálogo
         self.setWindowTitle("Cadastrar Novo Item")
         self.setMinimumWidth(400)
 
@@ -33,10 +40,14 @@ class CadastroItemDialog(QDialog):
         if editar and dados:
             self.destino_input.setText(dados['destino'])
 
+        # Sugestões dos valores mais usados enquanto digita
+        SugestoesCompleter("descricao", self.descricao_input)
+        SugestoesCompleter("destino", self.destino_input)
+
         self.valor_unitario_input = QLineEdit()
-        self.valor_unitario_input.setValidator(QRegularExpressionValidator(r"^\d{1,3}(\.\d{3})*(,\d{2})?$"))
+        self.valor_unitario_input.setValidator(QRegularExpressionValidator(f"^(?:{MONEY_PATTERN})$"))
         if editar and dados:
-            self.valor_unitario_input.setText(locale.currency(dados['valor_unitario'], grouping=True))
+            self.valor_unitario_input.setText(format_money(dados['valor_unitario'], symbol=False))
 
         self.valor_unitario_input.textChanged.connect(self.atualizar_valor_total)
 
@@ -56,6 +67,16 @@ class CadastroItemDialog(QDialog):
         self.layout.addWidget(QLabel("Valor Total:"))
         self.layout.addWidget(self.valor_total_input)
 
+        # Cadastro rápido: o item vai para a fila de gravação e o diálogo fica aberto para o próximo
+        self.rapido = QCheckBox("Cadastro rápido (continuar cadastrando)")
+        self.fila_label = QLabel()
+        self.rapido.toggled.connect(self.alternar_rapido)
+        if not editar and fila is not None:
+            self.layout.addWidget(self.rapido)
+            self.layout.addWidget(self.fila_label)
+            fila.gravados.connect(self.atualizar_fila)
+            fila.rejeitado.connect(self.atualizar_fila)
+
         btn_layout = QHBoxLayout()
         self.btn_cancelar: QPushButton = QPushButton("Cancelar")
         self.btn_salvar: QPushButton = QPushButton("Salvar")
@@ -74,35 +95,101 @@ class CadastroItemDialog(QDialog):
     def atualizar_valor_total(self) -> None:
         try:
             quantidade = int(self.quantidade_input.text()) if self.quantidade_input.text() else 0
-            valor_unitario = locale.atof(self.valor_unitario_input.text()) if self.valor_unitario_input.text() else 0.0
-            valor_total = quantidade * valor_unitario
-            self.valor_total_input.setText(locale.currency(valor_total, grouping=True))
+            valor_unitario = Money.parse(self.valor_unitario_input.text()) if self.valor_unitario_input.text() else Money(0)
+            valor_total = valor_unitario * quantidade  # Apenas para exibição; o banco calcula o valor gravado
+            self.valor_total_input.setText(format_money(valor_total))
         except ValueError:
             self.valor_total_input.clear()
 
     def salvar(self) -> None:
         try:
-            quantidade: int = int(self.quantidade_input.text())            descricao: str = self.descricao_input.text().strip()
-            destino: str = self.destino_input.text().strip()            
-            valor_texto: str = self.valor_unitario_input.text().replace('.', '').replace(',', '.').strip()
-            valor_unitario: float = float(valor_texto)
-            valor_total: float = quantidade * valor_unitario
-
-            if not descricao or not destino:
-                raise ValueError("Preencha todos os campos.")
-
-            item: Item = Item(quantidade=quantidade, descricao=descricao, destino=destino, valor_unitario=valor_unitario, valor_total=valor_total)
-
-            if editar and self.dados and 'id' in self.dados:  # Assuming 'id' is in self.dados when editing
-                item.id = self.dados['id']  # Set the item ID for updating
-                update_item(item)
-            else:
-                insert_item(item)
-
-            QMessageBox.information(self, "Sucesso", "Item cadastrado com sucesso!")
-            self.accept()
-        except Exception as e:  # Catch any exception during database interaction
-            QMessageBox.warning(
-                self, "Erro", f"Erro ao salvar item: {e}"
-            )  # Show error message
-
+            item: Item = parse_item(self.quantidade_input.text(), self.descricao_input.text(),
+                                    self.destino_input.text(), self.valor_unitario_input.text())
+        except ValueError as e:
+            self.erro_ao_salvar(e)
+            return
+
+        if self.editar and self.dados and 'id' in self.dados:  # Assuming 'id' is in self.dados when editing
+            item.id = self.dados['id']  # Set the item ID for updating
+            item.versao = self.dados.get('versao', 1)  # Versão lida; o banco recusa se outro usuário alterou
+            salvar_no_banco = update_item
+        else:
+            salvar_no_banco = insert_item
+
+        if self.rapido.isChecked():
+            try:
+                self.fila.add(item)
+            except OSError as e:  # Diário da fila inacessível: nada foi enfileirado
+                self.erro_ao_salvar(e)
+                return
+            self.cadastrados += 1
+            record_item(item)
+            self.proximo_item()
+            return
+
+        # A gravação roda na thread do banco; o diálogo fica bloqueado até a resposta
+        self.btn_salvar.setEnabled(False)
+        get_worker().submit(salvar_no_banco, item, on_result=self.salvo, on_error=self.erro_ao_salvar)
+
+    def alternar_rapido(self, rapido: bool) -> None:
+        self.btn_cancelar.setText("Fechar" if rapido else "Cancelar")
+        self.btn_salvar.setDefault(rapido)  # Enter em qualquer campo salva e passa ao próximo
+        self.atualizar_fila()
+
+    def proximo_item(self) -> None:
+        # O destino costuma se repetir entre itens seguidos; os demais campos são limpos
+        self.quantidade_input.clear()
+        self.descricao_input.clear()
+        self.valor_unitario_input.clear()
+        self.quantidade_input.setFocus()
+        self.atualizar_fila()
+
+    def atualizar_fila(self, *_: Any) -> None:
+        if not self.rapido.isChecked():
+            self.fila_label.clear()
+            return
+        pendentes = len(self.fila)
+        self.fila_label.setText(f"{self.cadastrados} item(ns) cadastrado(s)"
+                                + (f", {pendentes} aguardando gravação" if pendentes else ", todos gravados"))
+
+    def done(self, resultado: int) -> None:
+        # A fila vive com a janela principal: sem isso, cada diálogo fechado continuaria recebendo os sinais
+        if not self.editar and self.fila is not None:
+            self.fila.gravados.disconnect(self.atualizar_fila)
+            self.fila.rejeitado.disconnect(self.atualizar_fila)
+            self.fila = None
+        super().done(resultado)
+
+    def salvo(self, item: Optional[Item]) -> None:
+        self.item_salvo = item
+        if not self.editar and item is not None:
+            record_item(item)
+        self.btn_salvar.setEnabled(True)
+        QMessageBox.information(self, "Sucesso", "Item cadastrado com sucesso!")
+        self.accept()
+
+    def erro_ao_salvar(self, e: Exception) -> None:  # Any exception during validation or database interaction
+        self.btn_salvar.setEnabled(True)
+        if isinstance(e, ConflictError):
+            self.conflito(e.current)
+            return
+        QMessageBox.warning(
+            self, "Erro", f"Erro ao salvar item: {e}"
+        )  # Show error message
+
+    def conflito(self, atual: Optional[Item]) -> None:
+        if atual is None:
+            QMessageBox.warning(self, "Item excluído", "Este item foi excluído por outro usuário.")
+            self.reject()
+            return
+        resposta = QMessageBox.question(
+            self, "Item alterado",
+            "Este item foi alterado por outro usuário enquanto você editava.\n"
+            "Carregar os dados atuais? Suas alterações serão descartadas.\n"
+            "(Escolha Não para manter o formulário e salvar por cima dos dados atuais.)")
+        self.dados['versao'] = atual.versao
+        if resposta == QMessageBox.Yes:
+            self.quantidade_input.setText(str(atual.quantidade))
+            self.descricao_input.setText(atual.descricao)
+            self.destino_input.setText(atual.destino)
+            self.valor_unitario_input.setText(format_money(atual.valor_unitario, symbol=False))
@@ -1,124 +1,1075 @@
+import functools
+import random
 import sqlite3
-from typing import Optional, List
-from models import Company, Item
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, Optional, List, Tuple
+from models import BatchResult, ChangeSet, ChunkError, Company, Item, ItemBatch, ItemEvent, Money, Total
+from db_pool import ConnectionPool, get_pool, is_lock_error
+from instrumentation import INSTRUMENTATION, instrumented
 
 DB_FILE = "dados.sqlite"
+BATCH_CHUNK_SIZE = 1000
+ITEMS_PAGE_SIZE = 200
+FETCH_SIZE = 1000  # Rows per fetchmany() when streaming
+# Writes failing with "database is locked" after the busy timeout (or at once,
+# when a deferred transaction cannot upgrade) are retried with backoff.
+BUSY_RETRIES = 4
+BUSY_RETRY_DELAY = 0.05  # Seconds before the first retry; doubled for each next one
+CHANGES_LIMIT = 500  # More changed items than this in one poll: reload instead
+CHANGES_KEPT = 100_000  # alteracoes rows kept by prune_changes
+QUERY_CACHE_SIZE = 32  # Pages kept by query_items
+ARCHIVE_AFTER_DAYS = 180  # Paid items created longer ago than this go to itens_arquivo
+ARCHIVE_BATCH_SIZE = 500  # Items moved per archive_paid_items transaction
+SNAPSHOT_MIN_EVENTS = 10_000  # take_snapshot skips when fewer events were logged since the last one
+SNAPSHOT_BATCH_SIZE = 5000  # Items copied per take_snapshot transaction
+OPTIMIZE_ANALYSIS_LIMIT = 400  # Rows PRAGMA optimize samples per index when it re-analyzes
+EVENTS_KEPT_DAYS = 365  # compact_events folds older events into a snapshot
+COMPACT_BATCH_SIZE = 5000  # Rows deleted per compact_events transaction
+
+# The company configuration is a single row with id 1 (migration 7).
+SQL_SELECT_COMPANY = "SELECT id, nome_empresa, endereco, cnpj, telefone FROM configuracao_empresa WHERE id = 1"
+SQL_UPSERT_COMPANY = """
+    INSERT INTO configuracao_empresa (id, nome_empresa, endereco, cnpj, telefone)
+    VALUES (1, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        nome_empresa = excluded.nome_empresa, endereco = excluded.endereco,
+        cnpj = excluded.cnpj, telefone = excluded.telefone
+    RETURNING id, nome_empresa, endereco, cnpj, telefone"""
+# Column order expected by _row_to_item. Money columns hold integer centavos.
+ITEM_COLUMNS = "id, quantidade, descricao, destino, valor_unitario, valor_total, criado_em, pago, versao"
+STORED_ITEM_COLUMNS = "id, quantidade, descricao, destino, valor_unitario, pago, criado_em, versao"
+
+# Reads go through itens_todos, the UNION ALL of itens and itens_arquivo
+# (old paid items): filters reach both tables' indexes and ORDER BY ...
+# LIMIT merges the two ordered scans, so archived rows cost no extra sort.
+SQL_SELECT_ITEM = f"SELECT {ITEM_COLUMNS} FROM itens_todos WHERE id = ?"
+SQL_SELECT_ITEMS = f"""
+    SELECT {ITEM_COLUMNS}
+    FROM itens_todos
+    WHERE pago = ?
+    ORDER BY criado_em DESC, id DESC"""
+# Keyset pagination: the next page starts strictly after the (criado_em, id)
+# of the last row already shown, so each page is an index range seek.
+SQL_SELECT_ITEMS_FIRST_PAGE = f"""
+    SELECT {ITEM_COLUMNS}
+    FROM itens_todos
+    WHERE pago = ?
+    ORDER BY criado_em DESC, id DESC
+    LIMIT ?"""
+SQL_SELECT_ITEMS_PAGE = f"""
+    SELECT {ITEM_COLUMNS}
+    FROM itens_todos
+    WHERE pago = ? AND (criado_em, id) < (?, ?)
+    ORDER BY criado_em DESC, id DESC
+    LIMIT ?"""
+# Report order (oldest first) over a criado_em range; an index range scan.
+SQL_SELECT_ITEMS_RANGE = f"""
+    SELECT {ITEM_COLUMNS}
+    FROM itens_todos
+    WHERE pago = ? AND criado_em >= ? AND criado_em < ?
+    ORDER BY criado_em, id"""
+SQL_COUNT_ITEMS_RANGE = """
+    SELECT COALESCE(SUM(itens), 0) FROM resumo_dia WHERE pago = ? AND dia >= ? AND dia < ?"""
+SQL_INSERT_ITEM = """
+    INSERT INTO itens (quantidade, descricao, destino, valor_unitario, pago)
+    VALUES (?, ?, ?, ?, ?)"""
+# Optimistic locking: only the version the caller read is updated.
+SQL_UPDATE_ITEM = """
+    UPDATE itens
+    SET quantidade=?, descricao=?, destino=?, valor_unitario=?, versao = versao + 1
+    WHERE id=? AND versao=?"""
+# Set-based payment/delete: ids are loaded into a temp table and joined, so
+# any selection size is one statement with a fixed SQL text.
+SQL_CREATE_SELECTED_IDS = "CREATE TEMP TABLE IF NOT EXISTS ids_selecionados (id INTEGER PRIMARY KEY)"
+SQL_MARK_PAID = """
+    UPDATE itens
+    SET pago = ?, versao = versao + 1
+    WHERE id IN (SELECT id FROM temp.ids_selecionados) AND pago <> ?
+    RETURNING id"""
+SQL_DELETE_ITEMS = """
+    DELETE FROM itens
+    WHERE id IN (SELECT id FROM temp.ids_selecionados)
+    RETURNING id"""
+SQL_MARK_PAID_BY_FILTER = """
+    UPDATE itens
+    SET pago = ?, versao = versao + 1
+    WHERE pago = ? AND criado_em >= ? AND criado_em < ? AND (? IS NULL OR destino = ?)
+    RETURNING id"""
+# Full-text search: FTS5 finds and ranks the matches (bm25), itens supplies the row.
+SQL_SEARCH_ITEMS = f"""
+    SELECT {", ".join("i." + column for column in ITEM_COLUMNS.split(", "))}
+    FROM itens_fts
+    JOIN itens i ON i.id = itens_fts.rowid
+    WHERE itens_fts MATCH ? AND (? IS NULL OR i.pago = ?)
+    ORDER BY itens_fts.rank, i.id
+    LIMIT ? OFFSET ?"""
+# Paid searches also look in the archive's own FTS index (it holds only paid items).
+SQL_SEARCH_ALL_ITEMS = f"""
+    SELECT {ITEM_COLUMNS} FROM (
+        SELECT {", ".join("i." + column for column in ITEM_COLUMNS.split(", "))}, itens_fts.rank AS relevancia
+        FROM itens_fts
+        JOIN itens i ON i.id = itens_fts.rowid
+        WHERE itens_fts MATCH ? AND (? IS NULL OR i.pago = ?)
+        UNION ALL
+        SELECT {", ".join("a." + column for column in ITEM_COLUMNS.split(", "))}, itens_arquivo_fts.rank
+        FROM itens_arquivo_fts
+        JOIN itens_arquivo a ON a.id = itens_arquivo_fts.rowid
+        WHERE itens_arquivo_fts MATCH ?
+    )
+    ORDER BY relevancia, id
+    LIMIT ? OFFSET ?"""
+# Summaries read the trigger-maintained resumo_* tables, never itens itself.
+SQL_TOTALS_BY_STATUS = """
+    SELECT pago, pago, SUM(itens), SUM(quantidade), SUM(valor_total)
+    FROM resumo_destino
+    GROUP BY pago
+    ORDER BY pago"""
+SQL_TOTALS_BY_DESTINO = """
+    SELECT destino, pago, itens, quantidade, valor_total
+    FROM resumo_destino
+    WHERE ? IS NULL OR pago = ?
+    ORDER BY valor_total DESC
+    LIMIT ?"""
+SQL_TOTALS_BY_DAY = """
+    SELECT dia, pago, itens, quantidade, valor_total
+    FROM resumo_dia
+    WHERE (? IS NULL OR pago = ?) AND dia BETWEEN ? AND ?
+    ORDER BY dia DESC, pago"""
+SQL_TOTALS_BY_MONTH = """
+    SELECT substr(dia, 1, 7) AS mes, pago, SUM(itens), SUM(quantidade), SUM(valor_total)
+    FROM resumo_dia
+    WHERE (? IS NULL OR pago = ?) AND dia BETWEEN ? AND ?
+    GROUP BY mes, pago
+    ORDER BY mes DESC, pago"""
+SUMMARY_PERIODS = {"day": SQL_TOTALS_BY_DAY, "month": SQL_TOTALS_BY_MONTH}
+# Change feed: the items touched after a given alteracoes id, with their
+# current row (all NULL for deleted items). An id is never in both itens
+# and itens_arquivo once committed, so COALESCE picks the table holding it;
+# joining the itens_todos view instead would materialize it.
+SQL_LAST_CHANGE = "SELECT COALESCE(MAX(id), 0) FROM alteracoes"
+SQL_CHANGED_ITEMS = f"""
+    SELECT a.item_id, {", ".join(f"COALESCE(i.{column}, r.{column})" for column in ITEM_COLUMNS.split(", "))}
+    FROM (SELECT DISTINCT item_id FROM alteracoes WHERE id > ? AND id <= ?) a
+    LEFT JOIN itens i ON i.id = a.item_id
+    LEFT JOIN itens_arquivo r ON r.id = a.item_id
+    LIMIT ?"""
+SQL_PRUNE_CHANGES = "DELETE FROM alteracoes WHERE id <= ?"
+# Archive moves work on the ids in temp.ids_selecionados. The copy is written
+# before the original is deleted, which is how the alteracoes triggers tell
+# a move from a deletion (migration 10).
+SQL_SELECT_ARCHIVABLE = """
+    INSERT INTO temp.ids_selecionados (id)
+    SELECT id FROM itens
+    WHERE pago = 1 AND criado_em < datetime('now', ?)
+    ORDER BY criado_em
+    LIMIT ?"""
+SQL_SELECT_ARCHIVED_BY_FILTER = """
+    INSERT INTO temp.ids_selecionados (id)
+    SELECT id FROM itens_arquivo
+    WHERE criado_em >= ? AND criado_em < ? AND (? IS NULL OR destino = ?)"""
+SQL_COPY_TO_ARCHIVE = f"""
+    INSERT INTO itens_arquivo ({STORED_ITEM_COLUMNS})
+    SELECT {STORED_ITEM_COLUMNS} FROM itens WHERE id IN (SELECT id FROM temp.ids_selecionados)"""
+SQL_COPY_FROM_ARCHIVE = f"""
+    INSERT INTO itens ({STORED_ITEM_COLUMNS})
+    SELECT {STORED_ITEM_COLUMNS} FROM itens_arquivo WHERE id IN (SELECT id FROM temp.ids_selecionados)"""
+SQL_DELETE_ARCHIVED_ITEMS = """
+    DELETE FROM itens_arquivo
+    WHERE id IN (SELECT id FROM temp.ids_selecionados)
+    RETURNING id"""
+# Audit log (migration 11). State columns follow ITEM_COLUMNS, so rows go
+# through _row_to_item; valor_total is recomputed as in the itens column.
+EVENT_STATE = ("item_id, quantidade, descricao, destino, valor_unitario, quantidade * valor_unitario, criado_em, "
+               "pago, versao")
+SQL_ITEM_HISTORY = f"""
+    SELECT 0, 'inicial', s.em, NULL, {EVENT_STATE}
+    FROM instantaneo_itens JOIN instantaneos s ON s.id = instantaneo_id
+    WHERE instantaneo_id = (SELECT MIN(id) FROM instantaneos WHERE inicio_evento IS NULL) AND item_id = ?
+    UNION ALL
+    SELECT id, tipo, em, usuario, {EVENT_STATE}
+    FROM eventos
+    WHERE item_id = ?
+    ORDER BY 1"""
+# State as of a date: the newest snapshot taken before it, overridden by the
+# last event of each item logged between that snapshot and the date.
+SQL_ITEMS_AT = f"""
+    WITH base AS (
+        SELECT id, ate_evento FROM instantaneos WHERE em < ? AND inicio_evento IS NULL ORDER BY id DESC LIMIT 1
+    ), ultimos AS (
+        SELECT item_id, MAX(eventos.id) AS id
+        FROM eventos, base
+        WHERE eventos.id > base.ate_evento AND em < ? {{item}}
+        GROUP BY item_id
+    )
+    SELECT {EVENT_STATE}
+    FROM instantaneo_itens, base
+    WHERE instantaneo_id = base.id {{item}} AND item_id NOT IN (SELECT item_id FROM ultimos)
+    UNION ALL
+    SELECT {EVENT_STATE}
+    FROM eventos
+    WHERE id IN (SELECT id FROM ultimos) AND tipo <> 'excluido'
+    ORDER BY 7 DESC, 1 DESC"""
+SQL_ALL_ITEMS_AT = SQL_ITEMS_AT.format(item="")
+SQL_ONE_ITEM_AT = SQL_ITEMS_AT.format(item="AND item_id = ?")
+# Snapshots in progress (inicio_evento set, migration 13) are copied in id
+# order; items with events since copying started are copied again at the end.
+SNAPSHOT_STATE = "quantidade, descricao, destino, valor_unitario, pago, criado_em, versao"
+SQL_SNAPSHOT_BATCH = f"""
+    INSERT INTO instantaneo_itens (instantaneo_id, item_id, {SNAPSHOT_STATE})
+    SELECT ?, id, {SNAPSHOT_STATE} FROM itens_todos WHERE id > ? ORDER BY id LIMIT ?"""
+SQL_SNAPSHOT_DROP_CHANGED = """
+    DELETE FROM instantaneo_itens
+    WHERE instantaneo_id = ? AND item_id IN (SELECT item_id FROM eventos WHERE id > ?)"""
+SQL_SNAPSHOT_COPY_CHANGED = f"""
+    INSERT INTO instantaneo_itens (instantaneo_id, item_id, {SNAPSHOT_STATE})
+    SELECT ?, id, {SNAPSHOT_STATE} FROM itens_todos WHERE id IN (SELECT item_id FROM eventos WHERE id > ?)"""
+SQL_SNAPSHOT_FINISH = """
+    UPDATE instantaneos
+    SET ate_evento = (SELECT COALESCE(MAX(id), 0) FROM eventos), inicio_evento = NULL, em = CURRENT_TIMESTAMP
+    WHERE id = ?"""
+SQL_MAINTENANCE_AGES = "SELECT tarefa, (julianday('now') - julianday(executada_em)) * 24 FROM manutencao"
+SQL_RECORD_MAINTENANCE = """
+    INSERT INTO manutencao (tarefa, executada_em) VALUES (?, CURRENT_TIMESTAMP)
+    ON CONFLICT (tarefa) DO UPDATE SET executada_em = excluded.executada_em"""
+# Autocomplete (sugestoes.py): distinct values per field with their item counts.
+SUGGESTION_FIELDS = ("descricao", "destino")
+SQL_SUGGESTIONS = "SELECT valor, usos FROM sugestoes WHERE campo = ?"
+# Single-row variants hand back the stored row (generated id, criado_em
+# default) so the view can patch itself without re-querying.
+SQL_INSERT_ITEM_RETURNING = f"{SQL_INSERT_ITEM} RETURNING {ITEM_COLUMNS}"
+SQL_UPDATE_ITEM_RETURNING = f"{SQL_UPDATE_ITEM} RETURNING {ITEM_COLUMNS}"
+
+
+# Sort keys of ItemQuery -> columns they order by. Each has an index on
+# (pago, *columns) in itens and itens_arquivo (migrations 2, 9 and 10); id
+# breaks ties, as the implicit last column of every index.
+SORT_KEYS = {
+    "criado_em": ("criado_em",),
+    "destino": ("destino", "criado_em"),
+    "valor_total": ("valor_total",),
+}
+# Stand-ins for NULL when ordering rows in Python (SQLite sorts NULL first).
+_SORT_NULLS = {"criado_em": "", "destino": "", "valor_total": -1}
+
+
+@dataclass(frozen=True)
+class ItemQuery:
+    """Filters and sort order of an item listing; builds parameterized SQL.
+
+    Instances are immutable and hashable (query_items caches pages by them);
+    derive variants with dataclasses.replace. Money bounds are centavos,
+    dates are criado_em prefixes with ``end`` exclusive. Rows whose sort
+    columns are NULL are only reached by the first page. ``paid=None``
+    has no index for its order and is sorted in a temp B-tree.
+    """
+    paid: Optional[int] = 0  # None: both statuses
+    destino: Optional[str] = None
+    start: str = ""
+    end: str = ""
+    min_total: Optional[int] = None
+    max_total: Optional[int] = None
+    sort: str = "criado_em"
+    descending: bool = True
+
+    def __post_init__(self) -> None:
+        if self.sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key {self.sort!r}; expected one of {sorted(SORT_KEYS)}")
+
+    def columns(self) -> Tuple[str, ...]:
+        """ORDER BY columns, id last; a column fixed by an equality filter is left out."""
+        return (*(column for column in SORT_KEYS[self.sort]
+                  if not (column == "destino" and self.destino is not None)), "id")
+
+    def sql(self, after: Optional[tuple] = None, limit: int = ITEMS_PAGE_SIZE) -> Tuple[str, tuple]:
+        """SELECT for one page; ``after`` is cursor() of the last row of the previous page."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        for clause, value, used in (
+            ("pago = ?", self.paid, self.paid is not None),
+            ("destino = ?", self.destino, self.destino is not None),
+            ("criado_em >= ?", self.start, bool(self.start)),
+            ("criado_em < ?", self.end, bool(self.end)),
+            ("valor_total >= ?", self.min_total, self.min_total is not None),
+            ("valor_total <= ?", self.max_total, self.max_total is not None),
+        ):
+            if used:
+                clauses.append(clause)
+                params.append(value)
+        columns = self.columns()
+        if after is not None:
+            # Keyset: strictly past the previous page in the sort order, an index range seek.
+            placeholders = ", ".join("?" * len(columns))
+            clauses.append(f"({', '.join(columns)}) {'<' if self.descending else '>'} ({placeholders})")
+            params.extend(after)
+        direction = " DESC" if self.descending else ""
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = ", ".join(column + direction for column in columns)
+        return f"SELECT {ITEM_COLUMNS} FROM itens_todos{where} ORDER BY {order} LIMIT ?", (*params, limit)
+
+    def cursor(self, item: Item) -> tuple:
+        """Keyset cursor of ``item``: its sort column values and id."""
+        return tuple(getattr(item, column) for column in self.columns())
+
+    def sort_key(self, item: Item) -> tuple:
+        """Python equivalent of the ORDER BY (ascending), for placing a single row."""
+        return tuple(_SORT_NULLS.get(column, 0) if getattr(item, column) is None else getattr(item, column)
+                     for column in self.columns())
+
+    def matches(self, item: Item) -> bool:
+        """Whether ``item`` passes the filters (the Python side of the WHERE clause)."""
+        criado_em = item.criado_em or ""
+        return ((self.paid is None or item.pago == self.paid)
+                and (self.destino is None or item.destino == self.destino)
+                and (not self.start or criado_em >= self.start)
+                and (not self.end or criado_em < self.end)
+                and (self.min_total is None or item.valor_total >= self.min_total)
+                and (self.max_total is None or item.valor_total <= self.max_total))
+
+
+class ConflictError(Exception):
+    """The item changed (or was deleted) since the version the caller read.
+
+    ``current`` is the stored row, or None if the item no longer exists.
+    """
+
+    def __init__(self, current: Optional[Item], message: Optional[str] = None) -> None:
+        super().__init__(message or ("Item was changed by another user" if current else "Item no longer exists"))
+        self.current = current
+
+
+def get_db_pool() -> ConnectionPool:
+    """Returns the connection pool for the current DB_FILE."""
+    return get_pool(DB_FILE)
+
+def explain_query_plan(sql: str, params: tuple = ()) -> List[str]:
+    """Returns the EXPLAIN QUERY PLAN details for a query, one line per step."""
+    return [row[3] for row in connect_db().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+# Slow-query log entries carry the plan of each statement the call ran.
+INSTRUMENTATION.explain = explain_query_plan
 
 def connect_db() -> sqlite3.Connection:
-    """Connects to the SQLite database and returns a connection object."""
+    """Returns this thread's pooled connection. Do not close it."""
     try:
-        conn: sqlite3.Connection = sqlite3.connect(DB_FILE)
-        return conn
+        return get_db_pool().connection()
     except sqlite3.Error as e:
         print(f"Database connection error: {e}")
+        raise
+
+@contextmanager
+def transaction(immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+    """Yields a cursor inside a transaction on the pooled connection."""
+    with get_db_pool().transaction(immediate=immediate) as cursor:
+        yield cursor
+
+def retry_on_busy(fn: Callable) -> Callable:
+    """Retries ``fn`` while SQLite reports the database locked, with jittered backoff.
+
+    The busy timeout already makes each statement wait for the lock; this
+    covers what it cannot: a lock held longer than the timeout, and deferred
+    transactions that fail at once when they cannot upgrade to a writer.
+    Inside an outer transaction the error is raised instead, since only the
+    outermost block can be repeated. Arguments must be reusable (no iterators).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if attempt == BUSY_RETRIES or not is_lock_error(e) or connect_db().in_transaction:
+                    raise
+            INSTRUMENTATION.retried(fn.__name__)
+            time.sleep(BUSY_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
 
 def create_tables():
-    """Creates the necessary tables if they don't exist."""
+    """Brings the schema up to date by running any pending migrations."""
+    from migrations import migrate  # Only needed once per run, off the startup path
+    migrate(get_db_pool())
+
+def _company_signature() -> Tuple[str, sqlite3.Connection, int]:
+    """Changes when another connection commits; this one's writes go through save_company_config.
+
+    data_version is per connection, so the signature names the connection
+    it was read on: a read from another thread misses once and re-reads.
+    """
     conn = connect_db()
-    cursor: sqlite3.Cursor = conn.cursor()
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS configuracao_empresa (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nome_empresa TEXT,
-        endereco TEXT,
-        cnpj TEXT,
-        telefone TEXT
-    )
-    """)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS itens (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        quantidade INTEGER,
-        descricao TEXT,
-        destino TEXT,
-        valor_unitario REAL,
-        valor_total REAL,
-        pago INTEGER DEFAULT 0,
-        criado_em TEXT DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    conn.commit()
-    conn.close()
+    return DB_FILE, conn, conn.execute("PRAGMA data_version").fetchone()[0]
+
+def _row_to_company(row: tuple) -> Company:
+    id, nome_empresa, endereco, cnpj, telefone = row
+    return Company(id=id, nome_empresa=nome_empresa, endereco=endereco, cnpj=cnpj, telefone=telefone)
+
+# (signature, company) of the last read or save.
+_company_cache: Optional[Tuple[Tuple[str, sqlite3.Connection, int], Optional[Company]]] = None
+_company_lock = threading.Lock()
 
+@instrumented
 def get_company_config() -> Optional[Company]:
-    """Retrieves the latest company configuration and returns a Company object."""
+    """Returns the company configuration, cached until a save or a commit by another connection."""
+    global _company_cache
+    signature = _company_signature()
+    cached = _company_cache
+    if cached is not None and cached[0] == signature:
+        return cached[1]
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM configuracao_empresa ORDER BY id DESC LIMIT 1")
-        company_info = cursor.fetchone()
-        conn.close()
-
-        if company_info:
-            id, nome_empresa, endereco, cnpj, telefone = company_info
-            return Company(id=id, nome_empresa=nome_empresa, endereco=endereco, cnpj=cnpj, telefone=telefone)
-        return None
+        row = connect_db().execute(SQL_SELECT_COMPANY).fetchone()
     except sqlite3.Error as e:
         print(f"Database error: {e}")
         raise
+    company = _row_to_company(row) if row else None
+    with _company_lock:
+        _company_cache = (signature, company)
+    return company
 
+@instrumented
+@retry_on_busy
+def save_company_config(nome: str, endereco: str, cnpj: str, telefone: str) -> Company:
+    """Creates or replaces the company configuration and returns the stored row."""
+    global _company_cache
+    with transaction() as cursor:
+        row = cursor.execute(SQL_UPSERT_COMPANY, (nome, endereco, cnpj, telefone)).fetchone()
+    company = _row_to_company(row)
+    with _company_lock:
+        _company_cache = (_company_signature(), company)
+    return company
 
 
-def insert_company_info(nome: str, endereco: str, cnpj: str, telefone: str) -> None:
-    """Inserts new company configuration data."""
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO configuracao_empresa (nome_empresa, endereco, cnpj, telefone)
-        VALUES (?, ?, ?, ?)""", (nome, endereco, cnpj, telefone))
-    conn.commit()
-    conn.close()
-
-
-# Corrected get_items function
+def _row_to_item(row: tuple) -> Item:
+    return Item(
+        id=row[0],
+        quantidade=row[1],
+        descricao=row[2],
+        destino=row[3],
+        valor_unitario=Money(row[4]),
+        valor_total=Money(row[5] or 0),
+        criado_em=row[6],
+        pago=row[7],
+        versao=row[8],
+    )
 
+@instrumented
 def get_items(paid: int = 0) -> List[Item]:
     """Retrieves items based on their payment status."""
-    conn = connect_db()
-    cursor = conn.cursor()
+    items = connect_db().execute(SQL_SELECT_ITEMS, (paid,)).fetchall()
+    return [_row_to_item(row) for row in items]
+
+def _stream_rows(cursor: sqlite3.Cursor, fetch_size: int = FETCH_SIZE) -> Iterator[tuple]:
+    while rows := cursor.fetchmany(fetch_size):
+        yield from rows
+
+@instrumented
+def iter_item_rows(paid: int = 0, start: str = "", end: str = "9999",
+                   fetch_size: int = FETCH_SIZE) -> Iterator[tuple]:
+    """Streams raw rows (ITEM_COLUMNS order) created in [start, end), oldest first.
+
+    No Item objects and no full result list: meant for exports of any size.
+    ``start``/``end`` are date or timestamp prefixes, e.g. "2025-04" to "2025-05".
+    """
+    cursor = connect_db().execute(SQL_SELECT_ITEMS_RANGE, (paid, start, end))
+    try:
+        yield from _stream_rows(cursor, fetch_size)
+    finally:
+        cursor.close()
+
+@instrumented
+def count_items(paid: int = 0, start: str = "", end: str = "9999") -> int:
+    """Row count for the same range as iter_item_rows, read from the daily summary."""
+    return connect_db().execute(SQL_COUNT_ITEMS_RANGE, (paid, start[:10], end[:10])).fetchone()[0]
+
+@instrumented
+def iter_items(paid: int = 0, fetch_size: int = FETCH_SIZE) -> Iterator[Item]:
+    """Like get_items, but yields items as they are read instead of building a list.
+
+    Uses its own cursor; keep consumption on the calling thread.
+    """
+    cursor = connect_db().execute(SQL_SELECT_ITEMS, (paid,))
+    try:
+        for row in _stream_rows(cursor, fetch_size):
+            yield _row_to_item(row)
+    finally:
+        cursor.close()
+
+@instrumented
+def get_items_batch(paid: int = 0, fetch_size: int = FETCH_SIZE) -> ItemBatch:
+    """Like get_items, but returns a compact column-oriented ItemBatch."""
+    batch = ItemBatch()
+    cursor = connect_db().execute(SQL_SELECT_ITEMS, (paid,))
+    try:
+        for row in _stream_rows(cursor, fetch_size):
+            batch.append_row(row)
+    finally:
+        cursor.close()
+    return batch
+
+@instrumented
+def get_items_page(paid: int = 0, after: Optional[Tuple[str, int]] = None,
+                   limit: int = ITEMS_PAGE_SIZE) -> List[Item]:
+    """Retrieves one page of items, newest first.
+
+    ``after`` is the (criado_em, id) of the last item of the previous page;
+    None fetches the first page.
+    """
+    if after is None:
+        rows = connect_db().execute(SQL_SELECT_ITEMS_FIRST_PAGE, (paid, limit)).fetchall()
+    else:
+        rows = connect_db().execute(SQL_SELECT_ITEMS_PAGE, (paid, after[0], after[1], limit)).fetchall()
+    return [_row_to_item(row) for row in rows]
+
+@instrumented
+def get_item(id: int) -> Optional[Item]:
+    """Returns the stored item with this id, or None."""
+    row = connect_db().execute(SQL_SELECT_ITEM, (id,)).fetchone()
+    return _row_to_item(row) if row else None
+
+@instrumented
+@retry_on_busy
+def insert_item(item: Item) -> Item:
+    """Inserts a new item into the database and returns the stored row."""
+    with transaction() as cursor:
+        row = cursor.execute(SQL_INSERT_ITEM_RETURNING,
+            (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.pago)).fetchone()
+    return _row_to_item(row)
+
+@instrumented
+@retry_on_busy
+def insert_queued_items(items: List[Item], arquivo: str, assinatura: str, linha: int) -> List[Item]:
+    """Group commit of the write-behind queue (fila_gravacao.py); returns the stored rows.
+
+    ``linha`` (the last journal line covered) is saved as the journal's
+    checkpoint in the same transaction, so no entry is written twice if
+    the application stops before the journal is cleared.
+    """
+    with transaction(immediate=True) as cursor:
+        rows = [cursor.execute(SQL_INSERT_ITEM_RETURNING,
+                               (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.pago)
+                               ).fetchone()
+                for item in items]
+        save_import_checkpoint(cursor, arquivo, assinatura, linha, linha, 0)
+    return [_row_to_item(row) for row in rows]
+
+@instrumented
+@retry_on_busy
+def skip_queued_item(arquivo: str, assinatura: str, linha: int) -> None:
+    """Moves the write-behind queue's checkpoint past a journal line it set aside."""
+    with transaction(immediate=True) as cursor:
+        save_import_checkpoint(cursor, arquivo, assinatura, linha, linha, 0)
+
+@instrumented
+@retry_on_busy
+def update_item(item: Item) -> Item:
+    """Updates an existing item and returns the stored row (with its new versao).
+
+    Raises ConflictError if the stored versao is no longer ``item.versao``,
+    i.e. someone else changed or deleted the item since it was read. An
+    archived item is moved back to itens first.
+    """
+    with transaction() as cursor:
+        params = (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.id, item.versao)
+        row = cursor.execute(SQL_UPDATE_ITEM_RETURNING, params).fetchone()
+        if row is None:
+            _load_selected_ids(cursor, (item.id,))
+            if _restore_selected(cursor):
+                row = cursor.execute(SQL_UPDATE_ITEM_RETURNING, params).fetchone()
+        if row is None:
+            current = cursor.execute(SQL_SELECT_ITEM, (item.id,)).fetchone()
+            raise ConflictError(_row_to_item(current) if current else None)
+    return _row_to_item(row)
+
+# (DB_FILE, alteracoes position, query, after, limit) -> page, least recently used first.
+_query_cache: "OrderedDict[tuple, List[Item]]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+@instrumented
+def query_items(query: ItemQuery, after: Optional[tuple] = None, limit: int = ITEMS_PAGE_SIZE) -> List[Item]:
+    """One page of the items matching ``query``, in its sort order.
+
+    Pages are kept in a small LRU keyed by the query and the position of the
+    alteracoes log, so switching back to a recent view costs one index
+    lookup, and any write (from any connection) makes older pages unreachable.
+    """
+    key = (DB_FILE, last_change_id(), query, after, limit)
+    with _query_cache_lock:
+        page = _query_cache.get(key)
+        if page is not None:
+            _query_cache.move_to_end(key)
+            return list(page)  # Callers may change their list
+    sql, params = query.sql(after, limit)
+    page = [_row_to_item(row) for row in connect_db().execute(sql, params).fetchall()]
+    with _query_cache_lock:
+        _query_cache[key] = page
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+    return list(page)
+
+def fts_query(text: str) -> str:
+    """Turns free text into an FTS5 query: every word must match as a prefix.
+
+    Words are quoted, so FTS5 operators typed by the user are taken literally.
+    """
+    words = text.replace('"', " ").split()
+    return " ".join(f'"{word}"*' for word in words)
+
+@instrumented
+def search_items(query: str, paid: Optional[int] = 0, limit: int = ITEMS_PAGE_SIZE,
+                 offset: int = 0) -> List[Item]:
+    """Finds items whose descricao or destino contain words starting with the query words.
+
+    Results are ranked by relevance (bm25). All matches are ranked on each
+    call anyway, so pages are addressed by ``offset``. ``paid=None`` searches
+    both statuses; unless ``paid=0``, archived items are searched too.
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+    if paid == 0:
+        rows = connect_db().execute(SQL_SEARCH_ITEMS, (match, paid, paid, limit, offset)).fetchall()
+    else:
+        rows = connect_db().execute(SQL_SEARCH_ALL_ITEMS, (match, paid, paid, match, limit, offset)).fetchall()
+    return [_row_to_item(row) for row in rows]
+
+@instrumented
+def get_totals_by_status() -> List[Total]:
+    """Count, quantity and value totals per payment status (chave is the pago flag)."""
+    rows = connect_db().execute(SQL_TOTALS_BY_STATUS).fetchall()
+    return [Total(str(row[0]), row[1], row[2], row[3], Money(row[4])) for row in rows]
+
+@instrumented
+def get_totals_by_destino(paid: Optional[int] = 0, limit: int = -1) -> List[Total]:
+    """Totals per destino, largest value first. ``paid=None`` returns both statuses."""
+    rows = connect_db().execute(SQL_TOTALS_BY_DESTINO, (paid, paid, limit)).fetchall()
+    return [Total(row[0], row[1], row[2], row[3], Money(row[4])) for row in rows]
+
+@instrumented
+def get_totals_by_period(period: str = "month", paid: Optional[int] = None,
+                         start: str = "", end: str = "9999") -> List[Total]:
+    """Totals per day or month of criado_em, newest first.
+
+    ``start``/``end`` bound the day (YYYY-MM-DD, prefixes allowed for ``start``).
+    """
+    if period not in SUMMARY_PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {sorted(SUMMARY_PERIODS)}")
+    rows = connect_db().execute(SUMMARY_PERIODS[period], (paid, paid, start, end)).fetchall()
+    return [Total(row[0], row[1], row[2], row[3], Money(row[4])) for row in rows]
+
+@instrumented
+def get_suggestions(field: str) -> List[Tuple[str, int]]:
+    """(value, number of items using it) for every distinct descricao or destino."""
+    if field not in SUGGESTION_FIELDS:
+        raise ValueError(f"Unknown field {field!r}; expected one of {list(SUGGESTION_FIELDS)}")
+    return connect_db().execute(SQL_SUGGESTIONS, (field,)).fetchall()
+
+def _chunks(items: Iterable[Item], size: int) -> Iterator[List[Item]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def _write_batches(
+    items: Iterable[Item],
+    write_chunk: Callable[[sqlite3.Cursor, List[Item]], List[int]],
+    chunk_size: int,
+    single_transaction: bool,
+    stop_on_error: bool,
+) -> BatchResult:
+    """Feeds items to ``write_chunk`` chunk by chunk, one transaction each.
+
+    With ``single_transaction`` the whole batch shares one commit and each
+    chunk becomes a savepoint, so a failing chunk is still rolled back on its
+    own. Failures are recorded in the result instead of being raised.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    result = BatchResult()
+    position = 0
+    with transaction(immediate=True) if single_transaction else nullcontext():
+        for index, chunk in enumerate(_chunks(items, chunk_size)):
+            try:
+                ids = _write_chunk(write_chunk, chunk)
+                result.rows += len(chunk)
+                result.ids.extend(ids)
+            except (sqlite3.Error, ConflictError) as e:
+                result.errors.append(ChunkError(chunk=index, start=position, size=len(chunk), error=str(e)))
+                if stop_on_error:
+                    break
+            position += len(chunk)
+    return result
+
+@retry_on_busy
+def _write_chunk(write_chunk: Callable[[sqlite3.Cursor, List[Item]], List[int]], chunk: List[Item]) -> List[int]:
+    with transaction(immediate=True) as cursor:
+        return write_chunk(cursor, chunk)
+
+def _insert_chunk(cursor: sqlite3.Cursor, chunk: List[Item]) -> List[int]:
+    cursor.executemany(SQL_INSERT_ITEM, (
+        (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.pago)
+        for item in chunk))
+    # AUTOINCREMENT ids handed out inside one write transaction are consecutive.
+    last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - len(chunk) + 1, last_id + 1))
+
+def _update_chunk(cursor: sqlite3.Cursor, chunk: List[Item]) -> List[int]:
+    _load_selected_ids(cursor, (item.id for item in chunk))
+    _restore_selected(cursor)
+    cursor.executemany(SQL_UPDATE_ITEM, (
+        (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.id, item.versao)
+        for item in chunk))
+    if cursor.rowcount != len(chunk):
+        # A row changed since it was read: the whole chunk is rolled back.
+        raise ConflictError(None, f"{len(chunk) - cursor.rowcount} item(s) changed or deleted since read")
+    return []
+
+@instrumented
+def insert_items(items: Iterable[Item], chunk_size: int = BATCH_CHUNK_SIZE,
+                 single_transaction: bool = False, stop_on_error: bool = False) -> BatchResult:
+    """Inserts items from any iterable in chunked executemany calls.
+
+    Returns the new ids in input order; rows of failed chunks are skipped
+    and reported in ``BatchResult.errors``.
+    """
+    return _write_batches(items, _insert_chunk, chunk_size, single_transaction, stop_on_error)
+
+@instrumented
+def update_items(items: Iterable[Item], chunk_size: int = BATCH_CHUNK_SIZE,
+                 single_transaction: bool = False, stop_on_error: bool = False) -> BatchResult:
+    """Updates items from any iterable in chunked executemany calls.
+
+    Each item must carry the versao it was read with; a chunk holding a
+    stale one is rolled back and reported as a conflict in the errors.
+    """
+    return _write_batches(items, _update_chunk, chunk_size, single_transaction, stop_on_error)
+
+def _clear_selected_ids(cursor: sqlite3.Cursor) -> None:
+    cursor.execute(SQL_CREATE_SELECTED_IDS)
+    cursor.execute("DELETE FROM temp.ids_selecionados")
+
+def _load_selected_ids(cursor: sqlite3.Cursor, ids: Iterable[int]) -> None:
+    _clear_selected_ids(cursor)
+    cursor.executemany("INSERT OR IGNORE INTO temp.ids_selecionados (id) VALUES (?)", ((id,) for id in ids))
+
+def _restore_selected(cursor: sqlite3.Cursor) -> List[int]:
+    """Moves the selected ids found in itens_arquivo back to itens, so they can be changed there."""
+    cursor.execute(SQL_COPY_FROM_ARCHIVE)
+    return [row[0] for row in cursor.execute(SQL_DELETE_ARCHIVED_ITEMS).fetchall()]
+
+@instrumented
+@retry_on_busy
+def mark_paid(ids: Collection[int], paid: int = 1) -> List[int]:
+    """Sets pago on the given items in one UPDATE; returns the ids that changed.
+
+    ``paid=0`` reverts a payment (archived items return to itens). Ids
+    already in that state or no longer present are left out of the result.
+    """
+    with transaction(immediate=True) as cursor:
+        _load_selected_ids(cursor, ids)
+        if paid == 0:
+            _restore_selected(cursor)
+        return [row[0] for row in cursor.execute(SQL_MARK_PAID, (paid, paid)).fetchall()]
+
+@instrumented
+@retry_on_busy
+def delete_items(ids: Collection[int]) -> List[int]:
+    """Deletes the given items, archived or not; returns the ids that existed."""
+    with transaction(immediate=True) as cursor:
+        _load_selected_ids(cursor, ids)
+        deleted = [row[0] for row in cursor.execute(SQL_DELETE_ITEMS).fetchall()]
+        return deleted + [row[0] for row in cursor.execute(SQL_DELETE_ARCHIVED_ITEMS).fetchall()]
+
+@instrumented
+@retry_on_busy
+def mark_paid_by_filter(destino: Optional[str] = None, start: str = "", end: str = "9999",
+                        paid: int = 1) -> List[int]:
+    """Sets pago on every item of the other status created in [start, end).
+
+    ``destino=None`` matches all destinos. Returns the ids that changed.
+    """
+    with transaction(immediate=True) as cursor:
+        if paid == 0:
+            _clear_selected_ids(cursor)
+            cursor.execute(SQL_SELECT_ARCHIVED_BY_FILTER, (start, end, destino, destino))
+            _restore_selected(cursor)
+        return [row[0] for row in cursor.execute(
+            SQL_MARK_PAID_BY_FILTER, (paid, 1 - paid, start, end, destino, destino)).fetchall()]
+
+@instrumented
+def get_import_checkpoint(arquivo: str) -> Optional[Tuple[str, int, int, int, int]]:
+    """Returns (assinatura, linha, importadas, rejeitadas, concluida) for a file, if any."""
+    return connect_db().execute(
+        "SELECT assinatura, linha, importadas, rejeitadas, concluida FROM importacoes WHERE arquivo = ?",
+        (arquivo,)).fetchone()
+
+def save_import_checkpoint(cursor: sqlite3.Cursor, arquivo: str, assinatura: str, linha: int,
+                           importadas: int, rejeitadas: int, concluida: bool = False) -> None:
+    """Records import progress; call inside the transaction that wrote the rows."""
     cursor.execute("""
-        SELECT id, quantidade, descricao, destino, valor_unitario, valor_total, criado_em 
-        FROM itens 
-        WHERE pago = ? 
-        ORDER BY criado_em DESC""", (paid,))
-    items = cursor.fetchall()
-    conn.close()
-
-    return [
-        Item(
-            id=row[0],
-            quantidade=row[1],
-            descricao=row[2],
-            destino=row[3],
-            valor_unitario=row[4],
-            valor_total=row[5],
-            criado_em=row[6],
-        )
-        for row in items
-    ]
-
-def insert_item(item: Item) -> None:
-    """Inserts a new item into the database."""
+        INSERT INTO importacoes (arquivo, assinatura, linha, importadas, rejeitadas, concluida)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (arquivo) DO UPDATE SET
+            assinatura = excluded.assinatura, linha = excluded.linha, importadas = excluded.importadas,
+            rejeitadas = excluded.rejeitadas, concluida = excluded.concluida,
+            atualizado_em = CURRENT_TIMESTAMP""",
+        (arquivo, assinatura, linha, importadas, rejeitadas, int(concluida)))
+
+def data_version() -> int:
+    """PRAGMA data_version of this thread's connection.
+
+    It changes when another connection (thread or process) commits, never
+    for this connection's own writes, so polling it costs no table read.
+    """
+    return connect_db().execute("PRAGMA data_version").fetchone()[0]
+
+@instrumented
+def last_change_id() -> int:
+    """Position of the alteracoes log; moves on every write to itens, by any connection."""
+    return connect_db().execute(SQL_LAST_CHANGE).fetchone()[0]
+
+@instrumented
+def get_changes(after_id: Optional[int] = None, known_version: Optional[int] = None,
+                limit: int = CHANGES_LIMIT) -> ChangeSet:
+    """Items inserted, updated or deleted after alteracoes id ``after_id``.
+
+    ``after_id=None`` only returns the current position of the log, to start
+    polling from. With ``known_version`` (the data_version of the previous
+    call, made on the same thread) nothing is read unless another connection
+    has committed since. Each changed item is reported once, with its current
+    row; ``reload`` is set instead when more than ``limit`` items changed or
+    the log no longer reaches back to ``after_id``.
+    """
+    version = data_version()
+    if after_id is not None and known_version == version:
+        return ChangeSet(last_id=after_id, data_version=version)
+    with transaction() as cursor:  # One read snapshot for both queries
+        last_id = cursor.execute(SQL_LAST_CHANGE).fetchone()[0]
+        changes = ChangeSet(last_id=last_id, data_version=version)
+        if after_id is None or last_id <= after_id:
+            return changes
+        oldest = cursor.execute("SELECT MIN(id) FROM alteracoes").fetchone()[0]
+        if oldest is None or oldest > after_id + 1:
+            changes.reload = True
+            return changes
+        rows = cursor.execute(SQL_CHANGED_ITEMS, (after_id, last_id, limit + 1)).fetchall()
+    if len(rows) > limit:
+        changes.reload = True
+        return changes
+    for row in rows:
+        if row[1] is None:
+            changes.deleted_ids.append(row[0])
+        else:
+            changes.items.append(_row_to_item(row[1:]))
+    return changes
+
+@instrumented
+@retry_on_busy
+def prune_changes(keep: int = CHANGES_KEPT) -> int:
+    """Deletes all but the newest ``keep`` alteracoes rows; returns how many went."""
+    with transaction(immediate=True) as cursor:
+        last_id = cursor.execute(SQL_LAST_CHANGE).fetchone()[0]
+        return cursor.execute(SQL_PRUNE_CHANGES, (last_id - keep,)).rowcount
+
+@retry_on_busy
+def _archive_batch(age: str, batch_size: int) -> int:
+    with transaction(immediate=True) as cursor:
+        _clear_selected_ids(cursor)
+        cursor.execute(SQL_SELECT_ARCHIVABLE, (age, batch_size))
+        cursor.execute(SQL_COPY_TO_ARCHIVE)
+        return len(cursor.execute(SQL_DELETE_ITEMS).fetchall())
+
+@instrumented
+def archive_paid_items(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE,
+                       max_batches: Optional[int] = None) -> int:
+    """Moves paid items created over ``older_than_days`` ago to itens_arquivo; returns how many moved.
+
+    Each batch of ``batch_size`` items is its own short transaction, so other
+    writers get the lock in between; ``max_batches`` stops early (None: until
+    none is left). Nothing changes for readers: they query itens_todos, the
+    summaries count archived items, and writes move an archived item back
+    to itens first. Items carry no payment date, so age counts from criado_em.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    age = f"-{older_than_days} days"
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = _archive_batch(age, batch_size)
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+    return moved
+
+@instrumented
+def count_archived_items() -> int:
+    return connect_db().execute("SELECT COUNT(*) FROM itens_arquivo").fetchone()[0]
+
+@instrumented
+@retry_on_busy
+def optimize_db(analyze: bool = False) -> None:
+    """Refreshes the query planner's statistics.
+
+    PRAGMA optimize only re-analyzes tables whose statistics look stale, and
+    samples at most OPTIMIZE_ANALYSIS_LIMIT rows per index, so it stays cheap.
+    ``analyze`` runs a full ANALYZE, which reads every table and index.
+    """
     conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO itens (quantidade, descricao, destino, valor_unitario, valor_total, pago)
-        VALUES (?, ?, ?, ?, ?, ?)""",
-        (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.valor_total, item.pago))
-    conn.commit()
-    conn.close()
-
-def update_item(item: Item) -> None:
-    """Updates an existing item in the database."""
+    conn.execute(f"PRAGMA analysis_limit = {0 if analyze else OPTIMIZE_ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE" if analyze else "PRAGMA optimize")
+
+@instrumented
+@retry_on_busy
+def vacuum_db() -> None:
+    """Rebuilds the database file without free pages and truncates the WAL.
+
+    Writers of every connection wait until it finishes; meant for
+    maintenance windows, not for the application's own thread.
+    """
     conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE itens
-        SET quantidade=?, descricao=?, destino=?, valor_unitario=?, valor_total=?
-        WHERE id=?""",
-        (item.quantidade, item.descricao, item.destino, item.valor_unitario, item.valor_total, item.id))
-    conn.commit()
-    conn.close()
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+@instrumented
+def get_maintenance_ages() -> Dict[str, float]:
+    """Hours since each manutencao task last ran; tasks never run are missing."""
+    return dict(connect_db().execute(SQL_MAINTENANCE_AGES).fetchall())
+
+@retry_on_busy
+def record_maintenance(task: str) -> None:
+    with transaction() as cursor:
+        cursor.execute(SQL_RECORD_MAINTENANCE, (task,))
+
+@instrumented
+def get_item_history(item_id: int) -> List[ItemEvent]:
+    """Events of one item, oldest first.
+
+    Starts with its state in the oldest snapshot (tipo "inicial") when it
+    existed then: items older than the log, or whose first events were
+    compacted.
+    """
+    rows = connect_db().execute(SQL_ITEM_HISTORY, (item_id, item_id)).fetchall()
+    return [ItemEvent(row[0], row[1], row[2], row[3], _row_to_item(row[4:])) for row in rows]
+
+@instrumented
+def get_items_at(when: str, item_id: Optional[int] = None) -> List[Item]:
+    """Items as they were just before ``when`` (a criado_em-style timestamp or date prefix), newest first.
+
+    Reads one snapshot plus the events logged after it, so the cost does not
+    grow with the age of the log. Raises ValueError before the oldest kept
+    snapshot, where history starts.
+    """
+    with transaction() as cursor:  # Snapshot and events from the same read
+        if item_id is None:
+            rows = cursor.execute(SQL_ALL_ITEMS_AT, (when, when)).fetchall()
+        else:
+            rows = cursor.execute(SQL_ONE_ITEM_AT, (when, when, item_id, item_id)).fetchall()
+        if not rows and cursor.execute(
+                "SELECT 1 FROM instantaneos WHERE em < ? AND inicio_evento IS NULL", (when,)).fetchone() is None:
+            start = cursor.execute("SELECT MIN(em) FROM instantaneos WHERE inicio_evento IS NULL").fetchone()[0]
+            raise ValueError(f"Item history starts at {start}")
+    return [_row_to_item(row) for row in rows]
+
+@instrumented
+def take_snapshot(min_events: int = SNAPSHOT_MIN_EVENTS, batch_size: int = SNAPSHOT_BATCH_SIZE,
+                  max_batches: Optional[int] = None) -> Optional[int]:
+    """Stores the current state of all items as a snapshot; returns its id.
+
+    Skipped (None) when fewer than ``min_events`` events were logged since
+    the last snapshot, which bounds the events get_items_at replays. Copies
+    ``batch_size`` items per transaction; readers see the snapshot once the
+    last one commits. With ``max_batches``, returns None when that many were
+    copied and items are left: the next call continues the same snapshot
+    (see snapshot_in_progress).
+    """
+    batches = 0
+    while True:
+        snapshot_id, done = _snapshot_batch(min_events, batch_size)
+        if done:
+            return snapshot_id
+        batches += 1
+        if max_batches is not None and batches >= max_batches:
+            return None
+
+@retry_on_busy
+def _snapshot_batch(min_events: int, batch_size: int) -> Tuple[Optional[int], bool]:
+    """One take_snapshot transaction; returns (snapshot id, whether it is complete)."""
+    with transaction(immediate=True) as cursor:
+        row = cursor.execute("SELECT id, inicio_evento FROM instantaneos WHERE inicio_evento IS NOT NULL").fetchone()
+        if row is None:
+            last_event = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()[0]
+            covered = cursor.execute("SELECT COALESCE(MAX(ate_evento), 0) FROM instantaneos").fetchone()[0]
+            if last_event - covered < max(min_events, 1):
+                return None, True
+            row = cursor.execute("INSERT INTO instantaneos (ate_evento, inicio_evento) VALUES (0, ?) "
+                                 "RETURNING id, inicio_evento", (last_event,)).fetchone()
+        snapshot_id, first_event = row
+        copied = cursor.execute("SELECT COALESCE(MAX(item_id), 0) FROM instantaneo_itens WHERE instantaneo_id = ?",
+                                (snapshot_id,)).fetchone()[0]
+        if cursor.execute(SQL_SNAPSHOT_BATCH, (snapshot_id, copied, batch_size)).rowcount:
+            return snapshot_id, False
+        # Every item was copied once: replace the ones changed (or deleted) since, then publish.
+        cursor.execute(SQL_SNAPSHOT_DROP_CHANGED, (snapshot_id, first_event))
+        cursor.execute(SQL_SNAPSHOT_COPY_CHANGED, (snapshot_id, first_event))
+        cursor.execute(SQL_SNAPSHOT_FINISH, (snapshot_id,))
+    return snapshot_id, True
+
+def snapshot_in_progress() -> bool:
+    """Whether a take_snapshot stopped by ``max_batches`` has items left to copy."""
+    return connect_db().execute(
+        "SELECT 1 FROM instantaneos WHERE inicio_evento IS NOT NULL").fetchone() is not None
+
+@retry_on_busy
+def _delete_batch(sql: str, params: tuple) -> int:
+    with transaction(immediate=True) as cursor:
+        return cursor.execute(sql, params).rowcount
+
+@instrumented
+def compact_events(keep_days: int = EVENTS_KEPT_DAYS, batch_size: int = COMPACT_BATCH_SIZE,
+                   max_batches: Optional[int] = None) -> Optional[int]:
+    """Drops events and snapshots older than the newest snapshot taken ``keep_days`` ago.
+
+    That snapshot becomes the start of the history: item states and
+    get_items_at stay exact from then on. Deletes in batches of
+    ``batch_size`` rows, one transaction each. Returns the events removed,
+    or None once ``max_batches`` full batches ran: rows may be left, and the
+    next call continues from the same snapshot.
+    """
+    base = connect_db().execute(
+        "SELECT id, ate_evento FROM instantaneos WHERE em < datetime('now', ?) AND inicio_evento IS NULL "
+        "ORDER BY id DESC LIMIT 1",
+        (f"-{keep_days} days",)).fetchone()
+    if base is None:
+        return 0
+    base_id, covered = base
+    batches = 0  # Full ones: a shorter batch means that table is done
+    while _delete_batch("""
+            DELETE FROM instantaneo_itens WHERE (instantaneo_id, item_id) IN (
+                SELECT instantaneo_id, item_id FROM instantaneo_itens WHERE instantaneo_id < ? LIMIT ?)""",
+            (base_id, batch_size)) == batch_size:
+        batches += 1
+        if max_batches is not None and batches >= max_batches:
+            return None
+    _delete_batch("DELETE FROM instantaneos WHERE id < ?", (base_id,))
+    removed = 0
+    while True:
+        count = _delete_batch(
+            "DELETE FROM eventos WHERE id IN (SELECT id FROM eventos WHERE id <= ? LIMIT ?)", (covered, batch_size))
+        removed += count
+        if count < batch_size:
+            return removed
+        batches += 1
+        if max_batches is not None and batches >= max_batches:
+            return None
+
+# Database files whose schema has been checked by this process.
+_initialized: set = set()
 
+@instrumented
 def init_db() -> None:
-    create_tables()
\ No newline at end of file
+    """Checks and migrates the schema once per database file and process."""
+    if DB_FILE not in _initialized:
+        create_tables()
+        prune_changes()
+        _initialized.add(DB_FILE)
@@ -0,0 +1,236 @@
+import getpass
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+PragmaValue = Union[str, int]
+
+# Applied once, when a connection is opened. Every later use of the
+# connection benefits from them without paying for the PRAGMA round-trips.
+DEFAULT_PRAGMAS: Tuple[Tuple[str, PragmaValue], ...] = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -16000),  # negative = KiB, ~16 MB of page cache
+    ("temp_store", "MEMORY"),
+)
+
+# Size of sqlite3's per-connection LRU of prepared statements. Statements are
+# keyed by their SQL text, so callers should keep their SQL in constants.
+STATEMENT_CACHE_SIZE = 256
+
+# Who is writing, as recorded by the eventos triggers through usuario_atual().
+# Set ITENS_USUARIO to override the login@host default (e.g. in a service).
+def current_user() -> str:
+    global _current_user
+    if _current_user is None:
+        try:
+            login = getpass.getuser()
+        except (KeyError, OSError):  # No login name (e.g. some containers)
+            login = str(os.getuid()) if hasattr(os, "getuid") else "?"
+        _current_user = os.environ.get("ITENS_USUARIO") or f"{login}@{socket.gethostname()}"
+    return _current_user
+
+
+_current_user: Optional[str] = None
+
+# SQL functions every connection gets; triggers call them, so they must be
+# present on any connection that writes (name, arity, implementation).
+SQL_FUNCTIONS: Tuple[Tuple[str, int, Callable], ...] = (
+    ("usuario_atual", 0, current_user),
+)
+
+# Seconds a statement waits for another connection's lock (SQLite busy
+# handler) before failing with "database is locked".
+BUSY_TIMEOUT = 5.0
+
+# Instrumentation hooks (see set_hooks); None keeps the fast path untouched.
+_trace_hook: Optional[Callable[[str], None]] = None
+_lock_wait_hook: Optional[Callable[[float], None]] = None
+
+
+def is_lock_error(error: BaseException) -> bool:
+    """True for SQLITE_BUSY/SQLITE_LOCKED: another connection holds the lock."""
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in str(error) or "busy" in str(error))
+
+
+class ConnectionPool:
+    """Hands out long-lived, pre-configured SQLite connections.
+
+    Each thread gets its own connection, which it keeps for its lifetime.
+    Connections owned by threads that have finished are recycled for new
+    threads instead of being reopened.
+    """
+
+    def __init__(
+        self,
+        db_file: str,
+        pragmas: Sequence[Tuple[str, PragmaValue]] = DEFAULT_PRAGMAS,
+        cached_statements: int = STATEMENT_CACHE_SIZE,
+        timeout: float = BUSY_TIMEOUT,
+    ) -> None:
+        self.db_file = db_file
+        self.pragmas = tuple(pragmas)
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._owners: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._idle: List[sqlite3.Connection] = []
+        self.opened = 0
+
+    def _open(self) -> sqlite3.Connection:
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves in transaction().
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name}={value}")
+        for name, arity, function in SQL_FUNCTIONS:
+            conn.create_function(name, arity, function, deterministic=True)
+        if _trace_hook is not None:
+            conn.set_trace_callback(_trace_hook)
+        self.opened += 1
+        return conn
+
+    def _reclaim(self) -> None:
+        """Moves connections of dead threads to the idle list. Caller holds the lock."""
+        for ident, (thread, conn) in list(self._owners.items()):
+            if not thread.is_alive():
+                del self._owners[ident]
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+
+    def connection(self) -> sqlite3.Connection:
+        """Returns the calling thread's connection, opening one if needed."""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        ident = threading.get_ident()
+        with self._lock:
+            # Threads started outside Python (e.g. by QThreadPool) may lose their
+            # thread-local state between calls, so look the owner up by ident too.
+            owner = self._owners.get(ident)
+            if owner is not None:
+                conn = owner[1]
+            else:
+                self._reclaim()
+                conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        if owner is None:
+            with self._lock:
+                self._owners[ident] = (threading.current_thread(), conn)
+        self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+        """Runs the block inside a transaction and yields a cursor.
+
+        Commits on success and rolls back on any exception. Nested calls on
+        the same thread become savepoints of the outer transaction.
+        ``immediate`` takes the write lock up front, which avoids lock
+        upgrade failures for read-then-write blocks.
+        """
+        conn = self.connection()
+        cursor = conn.cursor()
+        if conn.in_transaction:
+            depth = getattr(self._local, "depth", 0) + 1
+            self._local.depth = depth
+            name = f"sp_{depth}"
+            cursor.execute(f"SAVEPOINT {name}")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute(f"ROLLBACK TO {name}")
+                cursor.execute(f"RELEASE {name}")
+                raise
+            else:
+                cursor.execute(f"RELEASE {name}")
+            finally:
+                self._local.depth = depth - 1
+                cursor.close()
+            return
+
+        lock_wait_hook = _lock_wait_hook
+        if lock_wait_hook is None:
+            cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        else:
+            # BEGIN IMMEDIATE blocks (up to the busy timeout) while another writer holds the lock.
+            start = time.perf_counter()
+            cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            lock_wait_hook((time.perf_counter() - start) * 1000)
+        try:
+            yield cursor
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            cursor.close()
+
+    def connections(self) -> List[sqlite3.Connection]:
+        with self._lock:
+            return [conn for _, conn in self._owners.values()] + self._idle
+
+    def close_all(self) -> None:
+        """Closes every connection. Threads will reopen lazily on next use."""
+        with self._lock:
+            conns = [conn for _, conn in self._owners.values()] + self._idle
+            self._owners.clear()
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_file: str) -> ConnectionPool:
+    """Returns the process-wide pool for ``db_file``, creating it on first use."""
+    pool = _pools.get(db_file)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_file)
+            if pool is None:
+                pool = _pools[db_file] = ConnectionPool(db_file)
+    return pool
+
+
+def set_hooks(trace: Optional[Callable[[str], None]] = None,
+              lock_wait: Optional[Callable[[float], None]] = None) -> None:
+    """Installs (or, with None, removes) instrumentation hooks on all pools.
+
+    ``trace`` receives the SQL of every statement executed (sqlite3 trace
+    callback); ``lock_wait`` the milliseconds each BEGIN took.
+    """
+    global _trace_hook, _lock_wait_hook
+    _trace_hook, _lock_wait_hook = trace, lock_wait
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        for conn in pool.connections():
+            conn.set_trace_callback(trace)
+
+
+def close_pools() -> None:
+    """Closes all pools; used at application exit and by benchmarks."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
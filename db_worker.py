@@ -0,0 +1,151 @@
+import itertools
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+ResultCallback = Callable[[Any], None]
+ErrorCallback = Callable[[Exception], None]
+
+
+class _TaskSignals(QObject):
+    # Emitted from the worker thread; DbWorker receives them in the GUI thread.
+    finished = Signal(int, object)
+    failed = Signal(int, object)
+
+
+class ProgressEmitter(QObject):
+    """Bridges progress callbacks from a worker thread to the GUI thread.
+
+    Pass ``emitter.updated.emit`` as the callback; slots connected to
+    ``updated`` run in the thread that owns the emitter.
+    """
+
+    updated = Signal(object)
+
+
+class DbTask(QRunnable):
+    """Runs one database call on a worker thread."""
+
+    def __init__(self, task_id: int, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        super().__init__()
+        self.setAutoDelete(False)
+        self.task_id = task_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.signals = _TaskSignals()
+
+    def cancel(self) -> None:
+        """Skips the call if it has not started yet and drops its result otherwise."""
+        self.cancelled = True
+
+    def run(self) -> None:
+        if self.cancelled:
+            self.signals.finished.emit(self.task_id, None)
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:  # Reported to the caller through on_error
+            self.signals.failed.emit(self.task_id, e)
+        else:
+            self.signals.finished.emit(self.task_id, result)
+
+
+class DbWorker(QObject):
+    """Runs database.py calls off the GUI thread and delivers results back to it.
+
+    A single worker thread by default: requests run in submission order,
+    which keeps SQLite down to one writer and lets callers queue dependent
+    steps (e.g. init_db before the first load).
+    """
+
+    busy_changed = Signal(bool)
+
+    def __init__(self, max_threads: int = 1, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        # Keep threads alive: each one holds a pooled SQLite connection.
+        self._pool.setExpiryTimeout(-1)
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, Tuple[DbTask, Optional[ResultCallback], Optional[ErrorCallback]]] = {}
+        self._latest: Dict[str, DbTask] = {}
+        self._quiet: Set[int] = set()  # Task ids that do not count for busy_changed
+
+    def submit(self, fn: Callable[..., Any], *args: Any, key: Optional[str] = None,
+               on_result: Optional[ResultCallback] = None, on_error: Optional[ErrorCallback] = None,
+               quiet: bool = False, **kwargs: Any) -> DbTask:
+        """Queues ``fn(*args, **kwargs)``; callbacks run in the GUI thread.
+
+        Submitting with a ``key`` cancels the previous task with the same key,
+        so a superseded load never delivers a stale result. ``quiet`` tasks
+        (background polling) leave busy_changed alone.
+        """
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+        task = DbTask(next(self._ids), fn, args, kwargs)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        if key is not None:
+            self._latest[key] = task
+        self._tasks[task.task_id] = (task, on_result, on_error)
+        if quiet:
+            self._quiet.add(task.task_id)
+        elif len(self._tasks) - len(self._quiet) == 1:
+            self.busy_changed.emit(True)
+        self._pool.start(task)
+        return task
+
+    def cancel(self, key: str) -> None:
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def is_busy(self) -> bool:
+        return bool(self._tasks)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """Blocks until queued tasks ran; callbacks are delivered by the event loop."""
+        return self._pool.waitForDone(msecs)
+
+    def _pop(self, task_id: int) -> Tuple[DbTask, Optional[ResultCallback], Optional[ErrorCallback]]:
+        entry = self._tasks.pop(task_id)
+        task = entry[0]
+        for key, latest in list(self._latest.items()):
+            if latest is task:
+                del self._latest[key]
+        if task_id in self._quiet:
+            self._quiet.discard(task_id)
+        elif len(self._tasks) == len(self._quiet):
+            self.busy_changed.emit(False)
+        return entry
+
+    @Slot(int, object)
+    def _on_finished(self, task_id: int, result: Any) -> None:
+        task, on_result, _ = self._pop(task_id)
+        if not task.cancelled and on_result is not None:
+            on_result(result)
+
+    @Slot(int, object)
+    def _on_failed(self, task_id: int, error: Exception) -> None:
+        task, _, on_error = self._pop(task_id)
+        if task.cancelled:
+            return
+        if on_error is not None:
+            on_error(error)
+        else:
+            print(f"Database error in background task: {error}")
+
+
+_worker: Optional[DbWorker] = None
+
+
+def get_worker() -> DbWorker:
+    """Returns the application-wide DbWorker, created on first use (GUI thread only)."""
+    global _worker
+    if _worker is None:
+        _worker = DbWorker()
+    return _worker
@@ -0,0 +1,104 @@
+from typing import Optional
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import (
+    QCheckBox, QDialog, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QMessageBox, QPushButton,
+    QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+import database
+from instrumentation import INSTRUMENTATION, SLOW_QUERY_MS
+
+COLUNAS = ["Função", "Chamadas", "Linhas", "Média (ms)", "p95 (ms)", "Máx (ms)", "Total (ms)", "Erros", "Bloqueios",
+           "Repetições"]
+
+
+def caminho_log_lento() -> str:
+    return f"{database.DB_FILE}.lentas.jsonl"
+
+
+def ativar_instrumentacao(slow_ms: float = SLOW_QUERY_MS) -> None:
+    INSTRUMENTATION.enable(slow_ms=slow_ms, slow_log=caminho_log_lento())
+
+
+class DebugPanel(QDialog):
+    """Estatísticas das consultas ao banco (Ctrl+Shift+D), atualizadas a cada segundo."""
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Depuração - Consultas ao Banco")
+        self.resize(820, 420)
+
+        self.layout: QVBoxLayout = QVBoxLayout()
+
+        self.ativo = QCheckBox("Registrar consultas")
+        self.ativo.setChecked(INSTRUMENTATION.enabled)
+        self.ativo.toggled.connect(self.alternar)
+        self.resumo = QLabel("")
+
+        self.tabela = QTableWidget(0, len(COLUNAS))
+        self.tabela.setHorizontalHeaderLabels(COLUNAS)
+        self.tabela.verticalHeader().setVisible(False)
+        self.tabela.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabela.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        btn_layout = QHBoxLayout()
+        self.btn_zerar = QPushButton("Zerar")
+        self.btn_zerar.clicked.connect(self.zerar)
+        self.btn_salvar = QPushButton("Salvar JSON...")
+        self.btn_salvar.clicked.connect(self.salvar_json)
+        self.btn_fechar = QPushButton("Fechar")
+        self.btn_fechar.clicked.connect(self.accept)
+        btn_layout.addWidget(self.btn_zerar)
+        btn_layout.addWidget(self.btn_salvar)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.btn_fechar)
+
+        self.layout.addWidget(self.ativo)
+        self.layout.addWidget(self.resumo)
+        self.layout.addWidget(self.tabela)
+        self.layout.addLayout(btn_layout)
+        self.setLayout(self.layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.atualizar)
+        self.timer.start()
+        self.atualizar()
+
+    def alternar(self, ativo: bool) -> None:
+        if ativo:
+            ativar_instrumentacao()
+        else:
+            INSTRUMENTATION.disable()
+        self.atualizar()
+
+    def zerar(self) -> None:
+        INSTRUMENTATION.reset()
+        self.atualizar()
+
+    def salvar_json(self) -> None:
+        caminho, _ = QFileDialog.getSaveFileName(self, "Salvar Estatísticas", "consultas.json", "JSON (*.json)")
+        if not caminho:
+            return
+        try:
+            INSTRUMENTATION.dump_json(caminho)
+        except OSError as e:
+            QMessageBox.warning(self, "Erro", f"Erro ao salvar estatísticas: {e}")
+
+    def atualizar(self) -> None:
+        dados = INSTRUMENTATION.snapshot()
+        esperas = dados["lock_waits"]
+        self.resumo.setText(
+            f"Consultas lentas (≥ {dados['slow_ms']:.0f} ms): {dados['slow_queries']}"
+            f" - registradas em {caminho_log_lento()}\n"
+            f"Espera por bloqueio (BEGIN): {esperas['calls']} transações, "
+            f"média {esperas['mean_ms']:.2f} ms, máx {esperas['max_ms']:.2f} ms")
+        funcoes = dados["functions"]
+        self.tabela.setRowCount(len(funcoes))
+        for linha, (nome, stats) in enumerate(funcoes.items()):
+            valores = [nome, stats["calls"], stats["rows"], f"{stats['mean_ms']:.2f}", f"{stats['p95_ms']:.2f}",
+                       f"{stats['max_ms']:.2f}", f"{stats['total_ms']:.1f}", stats["errors"], stats["locked"],
+                       stats["retries"]]
+            for coluna, valor in enumerate(valores):
+                self.tabela.setItem(linha, coluna, QTableWidgetItem(str(valor)))
@@ -0,0 +1,51 @@
+import os
+from typing import Optional
+
+from PySide6.QtCore import QObject, QSize, Qt, Signal
+from PySide6.QtGui import QPixmap, QPixmapCache
+
+from models import Company
+
+LOGO_FILE = "logo.png"
+
+
+def logo_pixmap(size: QSize) -> Optional[QPixmap]:
+    """Returns the logo scaled to fit ``size``, or None if there is no logo file.
+
+    Scaled copies live in QPixmapCache keyed by size and file mtime, so the
+    PNG is decoded and rescaled once per size until the file is replaced.
+    """
+    try:
+        mtime = os.stat(LOGO_FILE).st_mtime_ns
+    except OSError:
+        return None
+    key = f"logo:{mtime}:{size.width()}x{size.height()}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is None or pixmap.isNull():
+        pixmap = QPixmap(LOGO_FILE)
+        if pixmap.isNull():
+            return None
+        pixmap = pixmap.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+
+class EmpresaNotifier(QObject):
+    """Announces a saved company configuration to every open window."""
+
+    alterada = Signal(object)  # Company
+
+
+_notifier: Optional[EmpresaNotifier] = None
+
+
+def get_notifier() -> EmpresaNotifier:
+    """Returns the application-wide notifier, created on first use (GUI thread only)."""
+    global _notifier
+    if _notifier is None:
+        _notifier = EmpresaNotifier()
+    return _notifier
+
+
+def empresa_alterada(empresa: Company) -> None:
+    get_notifier().alterada.emit(empresa)
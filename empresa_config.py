@@ -1,5 +1,5 @@
-import os
 import shutil
+from typing import Optional
 from models import Company
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QPixmap
@@ -7,24 +7,26 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog, QMessageBox, QWidget
 )
 
-from database import get_company_config, update_company_config
+from database import get_company_config, save_company_config
+from db_worker import get_worker
+from empresa_cache import LOGO_FILE, empresa_alterada, logo_pixmap
 
 class EmpresaConfigDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(\"Configuração da Empresa\")
+        self.setWindowTitle("Configuração da Empresa")
         self.setMinimumWidth(400)
 
         self.layout: QVBoxLayout = QVBoxLayout()
 
         # Layout horizontal para logo + botão lado a lado
         logo_layout: QHBoxLayout = QHBoxLayout()
-        self.logo_label: QLabel = QLabel(\"Nenhuma logo carregada\")
+        self.logo_label: QLabel = QLabel("Nenhuma logo carregada")
         self.logo_label.setAlignment(Qt.AlignCenter)
         self.logo_label.setFixedHeight(128)
         self.logo_label.setFixedWidth(128)
 
-        self.btn_logo: QPushButton = QPushButton(\"Selecionar Logo\")
+        self.btn_logo: QPushButton = QPushButton("Selecionar Logo")
 
         self.btn_logo.clicked.connect(self.selecionar_logo)
 
@@ -60,19 +62,22 @@ class EmpresaConfigDialog(QDialog):
         self.carregar_dados_existentes()
 
     def carregar_dados_existentes(self) -> None:
-        try:
-            empresa: Optional[Company] = get_company_config()
-            if empresa:
-                self.nome_input.setText(empresa.nome_empresa)
-                self.endereco_input.setText(empresa.endereco)
-                self.cnpj_input.setText(empresa.cnpj)
-                self.telefone_input.setText(empresa.telefone)
-                if os.path.exists("logo.png"):
-                    pixmap = QPixmap("logo.png").scaledToHeight(128, Qt.SmoothTransformation)
-                    self.logo_label.setPixmap(pixmap)
-                    self.logo_label.setFixedSize(QSize(128, 128))
-        except Exception as e:
-            QMessageBox.warning(self, "Erro", f"Erro ao carregar dados da empresa: {e}")
+        get_worker().submit(get_company_config, key="empresa-dialogo",
+                            on_result=self.exibir_dados_existentes, on_error=self.erro_ao_carregar)
+
+    def exibir_dados_existentes(self, empresa: Optional[Company]) -> None:
+        if empresa:
+            self.nome_input.setText(empresa.nome_empresa)
+            self.endereco_input.setText(empresa.endereco)
+            self.cnpj_input.setText(empresa.cnpj)
+            self.telefone_input.setText(empresa.telefone)
+            pixmap = logo_pixmap(QSize(128, 128))
+            if pixmap is not None:
+                self.logo_label.setPixmap(pixmap)
+                self.logo_label.setFixedSize(QSize(128, 128))
+
+    def erro_ao_carregar(self, e: Exception) -> None:
+        QMessageBox.warning(self, "Erro", f"Erro ao carregar dados da empresa: {e}")
 
     def selecionar_logo(self) -> None:
         # Abre o diálogo para selecionar a imagem
@@ -140,7 +145,7 @@ class EmpresaConfigDialog(QDialog):
         # Ex: ('/home/user/Documents/my_image.png', 'Images (*.png *.xpm *.jpg)')
         # se o usuário selecionar 'my_image.png'.
 
-        caminho: str, _ = QFileDialog.getOpenFileName(self, "Selecionar Logo", "", "Imagens (*.png *.jpg *.jpeg *.bmp)")
+        caminho, _ = QFileDialog.getOpenFileName(self, "Selecionar Logo", "", "Imagens (*.png *.jpg *.jpeg *.bmp)")
         if caminho:
             self.logo_path = caminho
             pixmap: QPixmap = QPixmap(caminho).scaled(128, 128, Qt.KeepAspectRatio, Qt.SmoothTransformation)
@@ -157,13 +162,24 @@ class EmpresaConfigDialog(QDialog):
             QMessageBox.warning(self, "Erro", "Preencha todos os campos.")
             return
 
-        try:
-            empresa: Company = Company(nome_empresa=nome, endereco=endereco, cnpj=cnpj, telefone=telefone)
-            update_company_config(empresa)
-            if self.logo_path:
-                shutil.copyfile(self.logo_path, "logo.png")
-            QMessageBox.information(self, "Sucesso", "Dados salvos com sucesso!")
-            self.accept()
-        except sqlite3.Error as e:
-            QMessageBox.warning(self, "Erro", f"Erro ao salvar dados da empresa: {e}")
+        empresa: Company = Company(nome_empresa=nome, endereco=endereco, cnpj=cnpj, telefone=telefone)
+        logo_path = self.logo_path
 
+        def gravar() -> Company:
+            if logo_path:
+                shutil.copyfile(logo_path, LOGO_FILE)
+            return save_company_config(empresa.nome_empresa, empresa.endereco, empresa.cnpj, empresa.telefone)
+
+        self.btn_salvar.setEnabled(False)
+        get_worker().submit(gravar, on_result=self.dados_salvos, on_error=self.erro_ao_salvar)
+
+    def dados_salvos(self, empresa: Company) -> None:
+        self.btn_salvar.setEnabled(True)
+        # As janelas abertas se atualizam com os dados gravados, sem nova consulta
+        empresa_alterada(empresa)
+        QMessageBox.information(self, "Sucesso", "Dados salvos com sucesso!")
+        self.accept()
+
+    def erro_ao_salvar(self, e: Exception) -> None:
+        self.btn_salvar.setEnabled(True)
+        QMessageBox.warning(self, "Erro", f"Erro ao salvar dados da empresa: {e}")
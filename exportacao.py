@@ -0,0 +1,269 @@
+"""Streaming export of items to CSV, Parquet (with pyarrow), HTML or PDF reports.
+
+Rows are read with database.iter_item_rows (fetchmany over an index range
+scan) and written as they arrive, so memory use does not grow with the
+number of rows. Reports carry the company header from get_company_config.
+
+Usage: python exportacao.py saida.csv [--pagos] [--mes 2025-04] [--db dados.sqlite]
+The format comes from the extension: .csv, .parquet, .html or .pdf.
+"""
+import argparse
+import csv
+import html
+import os
+import sys
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterator, List, Optional
+
+import database
+from formatting import format_date, format_money
+from models import Company, Money
+
+FORMATS = ("csv", "parquet", "html", "pdf")
+HEADERS = ("Id", "Qtd", "Descrição", "Destino", "Valor Unitário", "Valor Total", "Criado em")
+ROWS_PER_PAGE = 40
+
+
+@dataclass
+class ExportStatus:
+    arquivo: str
+    linhas: int = 0
+    total: int = 0  # Expected rows, from the daily summary
+    valor_total: Money = Money(0)
+    fracao: float = 0.0
+    interrompida: bool = False
+
+
+ProgressCallback = Callable[[ExportStatus], None]
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _rows(status: ExportStatus, paid: int, start: str, end: str,
+          on_progress: Optional[ProgressCallback], should_stop: Optional[Callable[[], bool]]) -> Iterator[tuple]:
+    """Streams rows while keeping ``status`` (count, total value, progress) current."""
+    for row in database.iter_item_rows(paid, start, end):
+        status.linhas += 1
+        status.valor_total += row[5] or 0
+        if status.linhas % database.FETCH_SIZE == 0:
+            status.fracao = min(status.linhas / status.total, 1.0) if status.total else 0.0
+            if on_progress:
+                on_progress(status)
+            if should_stop and should_stop():
+                raise _Stopped
+        yield row
+
+
+def _cells(row: tuple) -> tuple:
+    return (row[0], row[1], row[2], row[3], format_money(row[4]), format_money(row[5] or 0), format_date(row[6]))
+
+
+def _periodo(start: str, end: str) -> str:
+    if not start and end == "9999":
+        return "todo o período"
+    return f"{start or 'início'} até {end if end != '9999' else 'hoje'}"
+
+
+def write_csv(path: str, rows: Iterator[tuple], empresa: Optional[Company], titulo: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(("id", "quantidade", "descricao", "destino", "valor_unitario", "valor_total", "criado_em"))
+        for row in rows:
+            # Plain pt_BR numbers (no currency symbol) so spreadsheets can sum them.
+            writer.writerow((row[0], row[1], row[2], row[3], format_money(row[4], symbol=False),
+                             format_money(row[5] or 0, symbol=False), row[6]))
+
+
+def write_parquet(path: str, rows: Iterator[tuple], empresa: Optional[Company], titulo: str) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportar Parquet requer o pacote pyarrow (pip install pyarrow).") from None
+    schema = pa.schema([
+        ("id", pa.int64()), ("quantidade", pa.int64()), ("descricao", pa.string()), ("destino", pa.string()),
+        ("valor_unitario_centavos", pa.int64()), ("valor_total_centavos", pa.int64()),
+        ("criado_em", pa.string()), ("pago", pa.int8()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        while chunk := list(islice(rows, database.FETCH_SIZE * 10)):
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)], schema=schema))
+
+
+def _html_header(empresa: Optional[Company], titulo: str) -> str:
+    if not empresa:
+        return f"<header><h1>{html.escape(titulo)}</h1></header>"
+    return (f"<header><h1>{html.escape(empresa.nome_empresa)}</h1>"
+            f"<p>{html.escape(empresa.endereco)}<br>CNPJ: {html.escape(empresa.cnpj)} - "
+            f"Tel: {html.escape(empresa.telefone)}</p><h2>{html.escape(titulo)}</h2></header>")
+
+
+def write_html(path: str, rows: Iterator[tuple], empresa: Optional[Company], titulo: str) -> None:
+    """Printable report: one table per page, each under the company header."""
+    header = _html_header(empresa, titulo)
+    columns = "".join(f"<th>{name}</th>" for name in HEADERS)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'>"
+                f"<title>{html.escape(titulo)}</title><style>"
+                "body{font-family:sans-serif;font-size:12px} table{border-collapse:collapse;width:100%}"
+                "th,td{border:1px solid #ccc;padding:2px 4px} td.n{text-align:right}"
+                ".pagina{page-break-after:always}</style></head><body>")
+        page = 0
+        count = 0
+        total = 0
+        while chunk := list(islice(rows, ROWS_PER_PAGE)):
+            page += 1
+            f.write(f"<section class='pagina'>{header}<table><tr>{columns}</tr>")
+            for row in chunk:
+                count += 1
+                total += row[5] or 0
+                cells = _cells(row)
+                f.write("<tr>" + "".join(
+                    f"<td class='n'>{html.escape(str(cell))}</td>" if index in (0, 1, 4, 5)
+                    else f"<td>{html.escape(str(cell))}</td>"
+                    for index, cell in enumerate(cells)) + "</tr>")
+            f.write(f"</table><footer>Página {page}</footer></section>")
+        f.write(f"<p><strong>{count} itens - Total: {format_money(total)}</strong></p></body></html>")
+
+
+def write_pdf(path: str, rows: Iterator[tuple], empresa: Optional[Company], titulo: str) -> None:
+    """Paginated PDF drawn page by page with QPdfWriter (requires PySide6)."""
+    from PySide6.QtCore import QMarginsF, QRectF, Qt
+    from PySide6.QtGui import QFont, QPageLayout, QPageSize, QPainter, QPdfWriter
+
+    writer = QPdfWriter(path)
+    writer.setResolution(72)
+    writer.setPageLayout(QPageLayout(QPageSize(QPageSize.A4), QPageLayout.Portrait, QMarginsF(30, 30, 30, 30)))
+    painter = QPainter(writer)
+    width = writer.width()
+    widths = [0.07, 0.06, 0.33, 0.18, 0.13, 0.13, 0.10]
+    line = 16
+    fonts = {"titulo": QFont("Helvetica", 12, QFont.Bold), "texto": QFont("Helvetica", 9),
+             "celula": QFont("Helvetica", 8), "coluna": QFont("Helvetica", 8, QFont.Bold),
+             "total": QFont("Helvetica", 9, QFont.Bold)}
+
+    def draw_row(y: float, cells: List[str]) -> None:
+        x = 0.0
+        for index, (cell, fraction) in enumerate(zip(cells, widths)):
+            align = Qt.AlignRight if index in (0, 1, 4, 5) else Qt.AlignLeft
+            painter.drawText(QRectF(x + 2, y, width * fraction - 4, line), align | Qt.AlignVCenter, cell)
+            x += width * fraction
+
+    def draw_header() -> float:
+        y = 0.0
+        lines = [empresa.nome_empresa, empresa.endereco, f"CNPJ: {empresa.cnpj} - Tel: {empresa.telefone}"] \
+            if empresa else []
+        for index, text in enumerate(lines + [titulo]):
+            painter.setFont(fonts["titulo" if index == 0 else "texto"])
+            painter.drawText(QRectF(0, y, width, line + 2), Qt.AlignLeft, text)
+            y += line + 2
+        painter.setFont(fonts["coluna"])
+        draw_row(y + 4, list(HEADERS))
+        painter.setFont(fonts["celula"])
+        return y + 4 + line
+
+    rows_per_page = int((writer.height() - 140) // line)  # Leaves room for the header and footer
+    total = 0
+    count = 0
+    page = 0
+    try:
+        while chunk := list(islice(rows, rows_per_page)):
+            if page:
+                writer.newPage()
+            page += 1
+            y = draw_header()
+            for row in chunk:
+                count += 1
+                total += row[5] or 0
+                draw_row(y, [str(cell) for cell in _cells(row)])
+                y += line
+            painter.drawText(QRectF(0, writer.height() - line, width, line), Qt.AlignRight, f"Página {page}")
+        if not page:
+            draw_header()
+        painter.setFont(fonts["total"])
+        painter.drawText(QRectF(0, writer.height() - 2 * line, width, line), Qt.AlignLeft,
+                         f"{count} itens - Total: {format_money(total)}")
+    finally:
+        painter.end()
+
+
+WRITERS = {"csv": write_csv, "parquet": write_parquet, "html": write_html, "pdf": write_pdf}
+
+
+def format_for(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in WRITERS:
+        raise ValueError(f"Formato não suportado: .{extension} (use {', '.join(FORMATS)})")
+    return extension
+
+
+def export_items(
+    path: str,
+    paid: int = 0,
+    start: str = "",
+    end: str = "9999",
+    formato: Optional[str] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> ExportStatus:
+    """Exports items with status ``paid`` created in [start, end) to ``path``.
+
+    The format comes from ``formato`` or the file extension. A stopped
+    export leaves a partial file and returns with ``interrompida`` set.
+    """
+    formato = formato or format_for(path)
+    status = ExportStatus(arquivo=os.path.abspath(path), total=database.count_items(paid, start, end))
+    empresa = database.get_company_config()
+    titulo = f"Itens {'pagos' if paid else 'em aberto'} - {_periodo(start, end)}"
+    try:
+        WRITERS[formato](path, _rows(status, paid, start, end, on_progress, should_stop), empresa, titulo)
+    except _Stopped:
+        status.interrompida = True
+        return status
+    status.fracao = 1.0
+    if on_progress:
+        on_progress(status)
+    return status
+
+
+def _month_range(mes: str) -> tuple:
+    year, month = (int(part) for part in mes.split("-"))
+    following = f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+    return f"{year:04d}-{month:02d}", following
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta itens para CSV, Parquet, HTML ou PDF.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--pagos", action="store_true", help="exporta os itens pagos (padrão: em aberto)")
+    parser.add_argument("--mes", help="apenas itens criados no mês AAAA-MM")
+    parser.add_argument("--formato", choices=FORMATS, help="padrão: pela extensão do arquivo")
+    parser.add_argument("--db", default=database.DB_FILE, help="arquivo do banco (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        formato = args.formato or format_for(args.arquivo)
+    except ValueError as e:
+        parser.error(str(e))
+    database.DB_FILE = args.db
+    database.init_db()
+    start, end = _month_range(args.mes) if args.mes else ("", "9999")
+    if formato == "pdf":
+        from PySide6.QtGui import QGuiApplication
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        _app = QGuiApplication(sys.argv)  # QPdfWriter needs fonts, i.e. a GUI application
+
+    def progress(status: ExportStatus) -> None:
+        print(f"\r{status.fracao:6.1%}  {status.linhas} linhas", end="", file=sys.stderr, flush=True)
+
+    status = export_items(args.arquivo, int(args.pagos), start, end, formato, on_progress=progress)
+    print(file=sys.stderr)
+    print(f"{status.linhas} itens exportados para {status.arquivo} (total {format_money(status.valor_total)})")
+
+
+if __name__ == "__main__":
+    main()
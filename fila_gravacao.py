@@ -0,0 +1,262 @@
+"""Write-behind queue for rapid item entry (CadastroItemDialog's "Cadastro rápido").
+
+A saved item is appended to a journal file next to the database and shown in
+the table at once, with a temporary negative id. Queued items are written
+together, one transaction per FLUSH_EVERY items or per FLUSH_INTERVAL_MS,
+instead of one commit (and one wait) per item.
+
+The journal is applied like an imported file (see importacao.py): each group
+commit saves the last journal line it covers in importacoes, in the same
+transaction. After a crash, the next start writes exactly the lines past that
+checkpoint. The journal is cleared once every line in it has been committed.
+
+A commit failing for another reason than a lock (or failing MAX_ATTEMPTS
+times in a row) is retried one item at a time. The item that still fails is
+set aside in ``<db>.fila.rejeitadas.jsonl``, with the error, and the
+checkpoint moves past it, so it does not hold up the items queued after it.
+"""
+import json
+import os
+import time
+import uuid
+from typing import Any, List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+import database
+from db_pool import is_lock_error
+from db_worker import get_worker
+from models import Item, Money
+
+FLUSH_EVERY = 10  # Queued items that trigger a group commit at once
+FLUSH_INTERVAL_MS = 2000  # Longest wait of a queued item before its commit
+MAX_ATTEMPTS = 5  # Commits failing in a row on a lock before items are retried one by one
+
+Entry = Tuple[int, Item]  # (journal line, item)
+
+
+def journal_path(db_file: str) -> str:
+    return f"{db_file}.fila.jsonl"
+
+
+def rejects_path(db_file: str) -> str:
+    return f"{db_file}.fila.rejeitadas.jsonl"
+
+
+def _fields(linha: int, item: Item) -> dict:
+    return {"linha": linha, "quantidade": item.quantidade, "descricao": item.descricao,
+            "destino": item.destino, "valor_unitario": int(item.valor_unitario)}
+
+
+def _write_synced(f, text: str) -> None:
+    f.write(text)
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class Journal:
+    """Append-only file of queued items: a header line, then one JSON line per item.
+
+    Every append is fsynced before the item is reported as saved. The
+    header holds a random assinatura, so a checkpoint of a cleared journal
+    never applies to the lines of the next one.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.abspath(path)
+        self.assinatura = ""
+        self.linha = 0  # Last line written
+
+    def load(self) -> List[Entry]:
+        """Reads the entries left in the file; a missing or unreadable file starts empty.
+
+        A line cut short by a crash during its append is dropped (that item
+        was never reported as saved) and the file is rewritten without it.
+        """
+        entries: List[Entry] = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.assinatura = json.loads(f.readline())["assinatura"]
+                for text in f:
+                    try:
+                        data = json.loads(text)
+                        entries.append((data["linha"], Item(
+                            quantidade=data["quantidade"], descricao=data["descricao"], destino=data["destino"],
+                            valor_unitario=Money(data["valor_unitario"]))))
+                    except (ValueError, KeyError, TypeError):
+                        break
+        except (OSError, ValueError, KeyError, TypeError):
+            entries = []
+        if not entries:
+            self.clear()
+            return entries
+        self.linha = entries[-1][0]
+        self._rewrite(self.assinatura, entries)
+        return entries
+
+    def append(self, item: Item) -> int:
+        """Writes ``item`` durably and returns its line number."""
+        self.linha += 1
+        with open(self.path, "a", encoding="utf-8") as f:
+            _write_synced(f, self._line(self.linha, item))
+        return self.linha
+
+    def clear(self) -> None:
+        """Starts an empty journal with a new assinatura."""
+        self.linha = 0
+        self._rewrite(uuid.uuid4().hex, [])
+
+    def _line(self, linha: int, item: Item) -> str:
+        return json.dumps(_fields(linha, item), ensure_ascii=False) + "\n"
+
+    def _rewrite(self, assinatura: str, entries: List[Entry]) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            _write_synced(f, json.dumps({"assinatura": assinatura}) + "\n"
+                          + "".join(self._line(linha, item) for linha, item in entries))
+        os.replace(temporary, self.path)
+        self.assinatura = assinatura
+
+
+class WriteBehindQueue(QObject):
+    """Queues new items in the journal and writes them in group commits on the DbWorker.
+
+    ``adicionado`` carries the provisional row (negative id) to show at
+    once; ``gravados`` carries (provisional id, stored row) pairs after each
+    commit. A failed commit keeps its items queued and is retried;
+    ``rejeitado`` carries (provisional id, error) for an item set aside.
+    """
+
+    adicionado = Signal(object)
+    gravados = Signal(list)
+    falhou = Signal(object)
+    rejeitado = Signal(int, str)
+
+    def __init__(self, db_file: str, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.journal = Journal(journal_path(db_file))
+        self.rejects_path = os.path.abspath(rejects_path(db_file))
+        self._journaled: List[Entry] = self.journal.load()  # Left over from the last run
+        self._pending: List[Entry] = []
+        self._in_flight = 0  # Entries (from the start of _pending) in the running commit
+        self._recovered = False  # Flushing waits for the checkpoint check in recover()
+        self._attempts = 0  # Failed commits in a row
+        self._one_by_one = 0  # Entries left to commit one at a time, after a failed group
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    def __len__(self) -> int:
+        return len(self._journaled) + len(self._pending)
+
+    def recover(self) -> None:
+        """Drops journal lines already committed and writes the rest; call once init_db is queued."""
+        get_worker().submit(database.get_import_checkpoint, self.journal.path, quiet=True,
+                            on_result=self._recovered_from, on_error=self._failed)
+
+    def _recovered_from(self, checkpoint: Optional[Tuple[str, int, int, int, int]]) -> None:
+        journaled, self._journaled = self._journaled, []
+        if checkpoint and checkpoint[0] == self.journal.assinatura:
+            journaled = [entry for entry in journaled if entry[0] > checkpoint[1]]
+        self._pending = journaled + self._pending
+        self._recovered = True
+        for linha, item in journaled:
+            self.adicionado.emit(self._provisional(linha, item))
+        if self._pending:
+            self.flush()
+        else:
+            self.journal.clear()
+
+    def add(self, item: Item) -> Item:
+        """Journals ``item`` and returns its provisional row; raises OSError if the journal fails."""
+        linha = self.journal.append(item)
+        self._pending.append((linha, item))
+        provisional = self._provisional(linha, item)
+        self.adicionado.emit(provisional)
+        if len(self._pending) - self._in_flight >= FLUSH_EVERY:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start(FLUSH_INTERVAL_MS)
+        return provisional
+
+    def flush(self) -> None:
+        """Commits the queued items now (one commit runs at a time)."""
+        self._timer.stop()
+        if not self._recovered or self._in_flight or not self._pending:
+            return
+        self._in_flight = 1 if self._one_by_one else len(self._pending)
+        entries = self._pending[:self._in_flight]
+        get_worker().submit(database.insert_queued_items, [item for _, item in entries], self.journal.path,
+                            self.journal.assinatura, entries[-1][0], quiet=True,
+                            on_result=self._committed, on_error=self._failed)
+
+    def _committed(self, stored: List[Item]) -> None:
+        entries, self._pending = self._pending[:self._in_flight], self._pending[self._in_flight:]
+        self._in_flight = 0
+        self._attempts = 0
+        self._one_by_one = max(self._one_by_one - len(entries), 0)
+        self.gravados.emit([(-linha, item) for (linha, _), item in zip(entries, stored)])
+        self._continue()
+
+    def _continue(self) -> None:
+        if not self._pending:
+            self.journal.clear()
+        elif self._one_by_one or len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+        else:
+            self._timer.start(FLUSH_INTERVAL_MS)
+
+    def _failed(self, error: Exception) -> None:
+        in_flight, self._in_flight = self._in_flight, 0
+        self.falhou.emit(error)
+        if not self._recovered:
+            QTimer.singleShot(FLUSH_INTERVAL_MS, self.recover)
+            return
+        if not in_flight:
+            return
+        self._attempts += 1
+        if is_lock_error(error) and self._attempts < MAX_ATTEMPTS:
+            self._timer.start(FLUSH_INTERVAL_MS)
+        elif in_flight == 1:
+            self._reject(self._pending[0], error)
+        else:  # Find the failing item: commit the group one item at a time
+            self._one_by_one = in_flight
+            self._attempts = 0
+            self.flush()
+
+    def _reject(self, entry: Entry, error: Exception) -> None:
+        """Sets the first queued item aside in the rejects file and moves the checkpoint past it."""
+        linha, item = entry
+        try:
+            with open(self.rejects_path, "a", encoding="utf-8") as f:
+                _write_synced(f, json.dumps({**_fields(linha, item), "motivo": str(error)}, ensure_ascii=False)
+                              + "\n")
+        except OSError as e:  # Nowhere to keep it: the item stays queued
+            self.falhou.emit(e)
+            self._timer.start(FLUSH_INTERVAL_MS)
+            return
+        self._in_flight = 1  # No commit until the checkpoint has moved
+        self._skip(linha, str(error))
+
+    def _skip(self, linha: int, motivo: str) -> None:
+        def skipped(_: Any) -> None:
+            self._pending.pop(0)
+            self._in_flight = 0
+            self._attempts = 0
+            self._one_by_one = max(self._one_by_one - 1, 0)
+            self.rejeitado.emit(-linha, motivo)
+            self._continue()
+
+        def failed(error: Exception) -> None:
+            self.falhou.emit(error)
+            QTimer.singleShot(FLUSH_INTERVAL_MS, lambda: self._skip(linha, motivo))
+
+        get_worker().submit(database.skip_queued_item, self.journal.path, self.journal.assinatura, linha,
+                            quiet=True, on_result=skipped, on_error=failed)
+
+    @staticmethod
+    def _provisional(linha: int, item: Item) -> Item:
+        # criado_em as SQLite's CURRENT_TIMESTAMP (UTC) will set it, so the row sorts where it will stay.
+        return Item(quantidade=item.quantidade, descricao=item.descricao, destino=item.destino,
+                    valor_unitario=item.valor_unitario, valor_total=item.valor_unitario * item.quantidade,
+                    id=-linha, criado_em=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()), versao=0)
@@ -0,0 +1,78 @@
+import locale
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CurrencyConventions:
+    symbol: str = "R$"
+    decimal_point: str = ","
+    thousands_sep: str = "."
+    symbol_first: bool = True
+    symbol_space: bool = True
+
+
+# pt_BR conventions, used when the active locale has no monetary settings
+# (e.g. the "C" locale on machines without pt_BR installed).
+PT_BR = CurrencyConventions()
+
+_conventions: Optional[CurrencyConventions] = None
+
+
+def load_conventions() -> CurrencyConventions:
+    """Reads the monetary conventions of the current locale once and caches them.
+
+    Call again (or refresh_conventions) after changing the locale.
+    """
+    global _conventions
+    conv = locale.localeconv()
+    if not conv.get("currency_symbol"):
+        _conventions = PT_BR
+    else:
+        _conventions = CurrencyConventions(
+            symbol=conv["currency_symbol"],
+            decimal_point=conv["mon_decimal_point"] or PT_BR.decimal_point,
+            thousands_sep=conv["mon_thousands_sep"],
+            symbol_first=bool(conv["p_cs_precedes"]),
+            symbol_space=bool(conv["p_sep_by_space"]),
+        )
+    return _conventions
+
+
+def refresh_conventions() -> None:
+    global _conventions
+    _conventions = None
+
+
+def format_money(cents: int, symbol: bool = True) -> str:
+    """Formats integer centavos as currency, e.g. 123456 -> "R$ 1.234,56".
+
+    Pure integer arithmetic: no float rounding and no per-call locale lookups.
+    """
+    conv = _conventions or load_conventions()
+    negative = cents < 0
+    reais, centavos = divmod(-cents if negative else cents, 100)
+    integer = f"{reais:,}"
+    if conv.thousands_sep != ",":
+        integer = integer.replace(",", conv.thousands_sep)
+    text = f"{integer}{conv.decimal_point}{centavos:02d}"
+    if symbol:
+        space = " " if conv.symbol_space else ""
+        text = f"{conv.symbol}{space}{text}" if conv.symbol_first else f"{text}{space}{conv.symbol}"
+    return f"-{text}" if negative else text
+
+
+@lru_cache(maxsize=4096)
+def _format_day(day: str) -> str:
+    return f"{day[8:10]}/{day[5:7]}/{day[0:4]}"
+
+
+def format_date(timestamp: Optional[str]) -> str:
+    """Turns SQLite's "YYYY-MM-DD HH:MM:SS" into "DD/MM/YYYY".
+
+    Many rows share a day, so results are cached per date string.
+    """
+    if not timestamp:
+        return ""
+    return _format_day(timestamp[:10])
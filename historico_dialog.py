@@ -0,0 +1,81 @@
+from typing import List, Optional
+
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import (
+    QDialog, QHBoxLayout, QHeaderView, QLabel, QMessageBox, QPushButton, QTableWidget, QTableWidgetItem,
+    QVBoxLayout, QWidget
+)
+
+from database import get_item_history
+from db_worker import get_worker
+from formatting import format_date, format_money
+from models import Item, ItemEvent
+
+COLUNAS = ["Data", "Evento", "Usuário", "Quantidade", "Descrição", "Destino", "Valor Unitário", "Valor Total",
+           "Pago"]
+TIPOS = {
+    "inicial": "Estado inicial",
+    "criado": "Cadastrado",
+    "alterado": "Alterado",
+    "pago": "Lançado pago",
+    "estornado": "Pagamento estornado",
+    "excluido": "Excluído",
+}
+
+
+def campos(item: Item) -> List[str]:
+    return [str(item.quantidade), item.descricao or "", item.destino or "", format_money(item.valor_unitario),
+            format_money(item.valor_total), "Sim" if item.pago else "Não"]
+
+
+class HistoricoDialog(QDialog):
+    """Histórico de um item, lido do log de eventos; campos alterados aparecem em negrito."""
+
+    def __init__(self, item: Item, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle(f"Histórico do Item {item.id}")
+        self.resize(900, 360)
+
+        self.layout: QVBoxLayout = QVBoxLayout()
+        self.titulo = QLabel(f"{item.descricao} - {item.destino}")
+        self.tabela = QTableWidget(0, len(COLUNAS))
+        self.tabela.setHorizontalHeaderLabels(COLUNAS)
+        self.tabela.verticalHeader().setVisible(False)
+        self.tabela.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabela.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+
+        btn_layout = QHBoxLayout()
+        self.btn_fechar = QPushButton("Fechar")
+        self.btn_fechar.clicked.connect(self.accept)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.btn_fechar)
+
+        self.layout.addWidget(self.titulo)
+        self.layout.addWidget(self.tabela)
+        self.layout.addLayout(btn_layout)
+        self.setLayout(self.layout)
+
+        get_worker().submit(get_item_history, item.id, on_result=self.exibir, on_error=self.erro)
+
+    def exibir(self, eventos: List[ItemEvent]) -> None:
+        negrito = QFont()
+        negrito.setBold(True)
+        self.tabela.setRowCount(len(eventos))
+        anteriores: Optional[List[str]] = None
+        for linha, evento in enumerate(eventos):
+            atuais = campos(evento.item)
+            data = f"{format_date(evento.em)} {evento.em[11:19]}"
+            valores = [data, TIPOS.get(evento.tipo, evento.tipo), evento.usuario or ""] + atuais
+            for coluna, valor in enumerate(valores):
+                celula = QTableWidgetItem(valor)
+                campo = coluna - 3
+                if anteriores is not None and campo >= 0 and atuais[campo] != anteriores[campo]:
+                    celula.setFont(negrito)
+                self.tabela.setItem(linha, coluna, celula)
+            anteriores = atuais
+        self.tabela.resizeColumnsToContents()
+        if not eventos:
+            self.titulo.setText(self.titulo.text() + " (sem eventos registrados)")
+
+    def erro(self, e: Exception) -> None:
+        QMessageBox.warning(self, "Erro", f"Erro ao carregar o histórico: {e}")
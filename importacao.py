@@ -0,0 +1,222 @@
+"""Streaming import of items from CSV (and XLSX, with openpyxl) files.
+
+The file flows through a generator pipeline: read rows -> validate and
+normalize to Item (same rules as CadastroItemDialog) -> chunk -> write each
+chunk in its own transaction together with a checkpoint. Memory use does not
+depend on the file size, and an interrupted import resumes after the last
+committed chunk.
+
+Usage: python importacao.py itens.csv [--chunk-size 1000] [--restart] [--db dados.sqlite]
+"""
+import argparse
+import csv
+import os
+import sys
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import database
+from models import Item, parse_item
+
+FIELDS = ("quantidade", "descricao", "destino", "valor_unitario")
+# Accepted header spellings, compared lower-case and without accents.
+HEADER_ALIASES = {
+    "quantidade": ("quantidade", "qtd", "qtde", "quant"),
+    "descricao": ("descricao", "desc", "item"),
+    "destino": ("destino",),
+    "valor_unitario": ("valor_unitario", "valor unitario", "valor", "preco", "preco unitario"),
+}
+
+Row = Tuple[int, Dict[str, Any], float]  # (data line number, fields, fraction of the file read)
+
+
+@dataclass
+class ImportStatus:
+    arquivo: str
+    linha: int = 0  # Last data line covered by a committed chunk
+    importadas: int = 0
+    rejeitadas: int = 0
+    fracao: float = 0.0
+    retomada_de: int = 0  # Line the run resumed after (0 = from the start)
+    concluida: bool = False
+    interrompida: bool = False
+
+
+def _normalize(name: str) -> str:
+    table = str.maketrans("áàâãéêíóôõúç", "aaaaeeiooouc")
+    return " ".join(str(name or "").strip().lower().translate(table).replace("_", " ").split())
+
+
+def map_header(header: Iterable[Any]) -> Dict[str, int]:
+    """Maps each item field to its column index; raises ValueError if one is missing."""
+    positions = {_normalize(name): index for index, name in enumerate(header)}
+    mapping = {}
+    for field, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            index = positions.get(_normalize(alias))
+            if index is not None:
+                mapping[field] = index
+                break
+        else:
+            raise ValueError(f"Coluna obrigatória ausente no cabeçalho: {field}")
+    return mapping
+
+
+def _fields(row: List[Any], mapping: Dict[str, int]) -> Dict[str, Any]:
+    return {field: row[index] if index < len(row) else "" for field, index in mapping.items()}
+
+
+def read_csv(path: str) -> Iterator[Row]:
+    """Yields CSV data rows one at a time; the delimiter (";", "," or tab) is sniffed."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        mapping = map_header(next(reader, []))
+        size = os.fstat(f.fileno()).st_size or 1
+        for linha, row in enumerate(reader, start=1):
+            if not any(cell.strip() for cell in row):
+                continue
+            yield linha, _fields(row, mapping), min(f.buffer.tell() / size, 1.0)
+
+
+def read_xlsx(path: str) -> Iterator[Row]:
+    """Yields rows of the first sheet in read-only (streaming) mode. Requires openpyxl."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Importar XLSX requer o pacote openpyxl (pip install openpyxl).") from None
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        mapping = map_header(next(rows, ()))
+        total = max((sheet.max_row or 1) - 1, 1)
+        for linha, row in enumerate(rows, start=1):
+            if not any(cell not in (None, "") for cell in row):
+                continue
+            yield linha, _fields(list(row), mapping), min(linha / total, 1.0)
+    finally:
+        workbook.close()
+
+
+def read_rows(path: str) -> Iterator[Row]:
+    return read_xlsx(path) if path.lower().endswith((".xlsx", ".xlsm")) else read_csv(path)
+
+
+def validate_rows(rows: Iterable[Row]) -> Iterator[Tuple[int, Optional[Item], Dict[str, Any], str, float]]:
+    """Normalizes each row to an Item, or None plus the reason when it is rejected."""
+    for linha, fields, fracao in rows:
+        try:
+            yield linha, parse_item(**fields), fields, "", fracao
+        except ValueError as e:
+            yield linha, None, fields, str(e), fracao
+
+
+def _signature(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def rejects_path(path: str) -> str:
+    return f"{path}.rejeitadas.csv"
+
+
+def import_file(
+    path: str,
+    chunk_size: int = database.BATCH_CHUNK_SIZE,
+    restart: bool = False,
+    on_progress: Optional[Callable[[ImportStatus], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> ImportStatus:
+    """Imports ``path`` chunk by chunk, resuming a previous interrupted run.
+
+    Rejected rows go to ``<path>.rejeitadas.csv`` with their line and reason.
+    ``should_stop`` is polled between chunks; a stopped import can be
+    resumed later by calling this again.
+    """
+    arquivo = os.path.abspath(path)
+    assinatura = _signature(path)
+    status = ImportStatus(arquivo=arquivo)
+    checkpoint = database.get_import_checkpoint(arquivo)
+    # A checkpoint only applies to the exact same file contents.
+    if checkpoint and not restart and checkpoint[0] == assinatura:
+        _, status.linha, status.importadas, status.rejeitadas, concluida = checkpoint
+        if concluida:
+            status.concluida, status.fracao = True, 1.0
+            return status
+        status.retomada_de = status.linha
+
+    rows = validate_rows(row for row in read_rows(path) if row[0] > status.retomada_de)
+    mode = "a" if status.retomada_de else "w"
+    with open(rejects_path(path), mode, newline="", encoding="utf-8") as report_file:
+        report = csv.writer(report_file, delimiter=";")
+        if mode == "w":
+            report.writerow(("linha", "motivo") + FIELDS)
+        while chunk := list(islice(rows, chunk_size)):
+            items = [item for _, item, _, _, _ in chunk if item is not None]
+            rejected = [(linha, motivo, fields) for linha, item, fields, motivo, _ in chunk if item is None]
+            with database.transaction(immediate=True) as cursor:
+                result = database.insert_items(items, chunk_size=max(len(items), 1))
+                if result.errors:
+                    # The whole chunk was rolled back: report its rows with the database error.
+                    rejected += [(linha, result.errors[0].error, fields)
+                                 for linha, item, fields, _, _ in chunk if item is not None]
+                status.linha = chunk[-1][0]
+                status.importadas += result.rows
+                status.rejeitadas += len(rejected)
+                database.save_import_checkpoint(cursor, arquivo, assinatura, status.linha,
+                                                status.importadas, status.rejeitadas)
+            for linha, motivo, fields in sorted(rejected, key=lambda entry: entry[0]):
+                report.writerow((linha, motivo) + tuple(fields.get(field, "") for field in FIELDS))
+            report_file.flush()
+            status.fracao = chunk[-1][4]
+            if on_progress:
+                on_progress(status)
+            if should_stop and should_stop():
+                status.interrompida = True
+                return status
+
+    with database.transaction() as cursor:
+        database.save_import_checkpoint(cursor, arquivo, assinatura, status.linha,
+                                        status.importadas, status.rejeitadas, concluida=True)
+    status.concluida, status.fracao = True, 1.0
+    if on_progress:
+        on_progress(status)
+    return status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Importa itens de um arquivo CSV ou XLSX.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--chunk-size", type=int, default=database.BATCH_CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignora o ponto de retomada salvo")
+    parser.add_argument("--db", default=database.DB_FILE, help="arquivo do banco (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    database.DB_FILE = args.db
+    database.init_db()
+
+    def progress(status: ImportStatus) -> None:
+        print(f"\r{status.fracao:6.1%}  linha {status.linha}  importadas {status.importadas}"
+              f"  rejeitadas {status.rejeitadas}", end="", file=sys.stderr, flush=True)
+
+    try:
+        status = import_file(args.arquivo, args.chunk_size, args.restart, on_progress=progress)
+    except KeyboardInterrupt:
+        print("\nInterrompido; execute novamente para retomar.", file=sys.stderr)
+        sys.exit(130)
+    print(file=sys.stderr)
+    if status.retomada_de:
+        print(f"Retomado após a linha {status.retomada_de}.")
+    print(f"Importadas: {status.importadas}  Rejeitadas: {status.rejeitadas}"
+          + (f"  (ver {rejects_path(args.arquivo)})" if status.rejeitadas else ""))
+
+
+if __name__ == "__main__":
+    main()
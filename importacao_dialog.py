@@ -0,0 +1,111 @@
+import threading
+from typing import Optional
+
+from PySide6.QtWidgets import (
+    QDialog, QFileDialog, QHBoxLayout, QLabel, QMessageBox, QProgressBar, QPushButton, QVBoxLayout, QWidget
+)
+
+from db_worker import DbWorker, ProgressEmitter
+from importacao import ImportStatus, import_file, rejects_path
+
+
+class ImportacaoDialog(QDialog):
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Importar Itens")
+        self.setMinimumWidth(480)
+        self.caminho: Optional[str] = None
+        self.importou: bool = False
+        self._parar = threading.Event()
+
+        # Worker próprio: uma importação longa não bloqueia as consultas da janela principal
+        self.worker = DbWorker(parent=self)
+        self.progresso = ProgressEmitter(self)
+        self.progresso.updated.connect(self.exibir_progresso)
+
+        self.layout: QVBoxLayout = QVBoxLayout()
+        self.arquivo_label = QLabel("Nenhum arquivo selecionado")
+        self.btn_arquivo = QPushButton("Selecionar Arquivo")
+        self.btn_arquivo.clicked.connect(self.selecionar_arquivo)
+
+        self.barra = QProgressBar()
+        self.barra.setRange(0, 1000)
+        self.status_label = QLabel("")
+
+        btn_layout = QHBoxLayout()
+        self.btn_fechar = QPushButton("Fechar")
+        self.btn_fechar.clicked.connect(self.fechar)
+        self.btn_importar = QPushButton("Importar")
+        self.btn_importar.setEnabled(False)
+        self.btn_importar.clicked.connect(self.importar)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.btn_fechar)
+        btn_layout.addWidget(self.btn_importar)
+
+        self.layout.addWidget(QLabel("Arquivo CSV ou XLSX com as colunas quantidade, descrição, destino e valor unitário:"))
+        self.layout.addWidget(self.arquivo_label)
+        self.layout.addWidget(self.btn_arquivo)
+        self.layout.addWidget(self.barra)
+        self.layout.addWidget(self.status_label)
+        self.layout.addLayout(btn_layout)
+        self.setLayout(self.layout)
+
+    def selecionar_arquivo(self) -> None:
+        caminho, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo", "", "Planilhas (*.csv *.xlsx)")
+        if caminho:
+            self.caminho = caminho
+            self.arquivo_label.setText(caminho)
+            self.btn_importar.setEnabled(True)
+
+    def importar(self) -> None:
+        if not self.caminho:
+            return
+        self._parar.clear()
+        self.btn_importar.setEnabled(False)
+        self.btn_arquivo.setEnabled(False)
+        self.btn_fechar.setText("Cancelar")
+        self.status_label.setText("Importando...")
+        self.worker.submit(import_file, self.caminho, on_progress=self.progresso.updated.emit,
+                           should_stop=self._parar.is_set, on_result=self.concluido, on_error=self.erro)
+
+    def exibir_progresso(self, status: ImportStatus) -> None:
+        self.importou = self.importou or status.importadas > 0
+        self.barra.setValue(int(status.fracao * 1000))
+        self.status_label.setText(f"Linha {status.linha}: {status.importadas} importadas, {status.rejeitadas} rejeitadas")
+
+    def concluido(self, status: ImportStatus) -> None:
+        self.exibir_progresso(status)
+        self.btn_fechar.setText("Fechar")
+        self.btn_arquivo.setEnabled(True)
+        self.btn_importar.setEnabled(True)
+        if status.interrompida:
+            self.status_label.setText(self.status_label.text() + " (interrompida; importe de novo para retomar)")
+            return
+        mensagem = f"{status.importadas} itens importados, {status.rejeitadas} rejeitados."
+        if status.retomada_de:
+            mensagem += f"\nImportação retomada após a linha {status.retomada_de}."
+        if status.rejeitadas:
+            mensagem += f"\nLinhas rejeitadas em: {rejects_path(self.caminho)}"
+        QMessageBox.information(self, "Importação concluída", mensagem)
+
+    def erro(self, e: Exception) -> None:
+        self.btn_fechar.setText("Fechar")
+        self.btn_arquivo.setEnabled(True)
+        self.btn_importar.setEnabled(True)
+        QMessageBox.warning(self, "Erro", f"Erro ao importar arquivo: {e}")
+
+    def fechar(self) -> None:
+        if self.worker.is_busy():
+            # Para depois do lote atual; o ponto de retomada fica salvo no banco
+            self._parar.set()
+            return
+        if self.importou:
+            self.accept()
+        else:
+            self.reject()
+
+    def reject(self) -> None:
+        if self.worker.is_busy():
+            self._parar.set()
+            self.worker.wait()
+        super().reject()
@@ -0,0 +1,263 @@
+"""Per-function query statistics and a slow-query log for database.py.
+
+Public query functions are wrapped with ``instrumented``. While disabled
+(the default) a wrapped call costs one flag check. When enabled, each call
+records its latency in a histogram together with its row count and any
+error. Lock waits (time spent in BEGIN) and "database is locked" errors are
+counted too, as are the retries database.retry_on_busy makes. Calls slower
+than the threshold are appended to a JSON-lines log with the SQL they ran
+and its EXPLAIN QUERY PLAN.
+"""
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import db_pool
+from db_pool import is_lock_error
+
+# Upper bounds (ms) of the latency histogram buckets; the last one is open.
+BUCKETS_MS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+SLOW_QUERY_MS = 100.0
+MAX_TRACED = 50  # Statements kept per call: executemany traces one per row
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class FunctionStats:
+    """Latency histogram and counters for one function (or for lock waits)."""
+
+    __slots__ = ("calls", "rows", "errors", "locked", "retries", "total_ms", "max_ms", "buckets")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.rows = 0
+        self.errors = 0
+        self.locked = 0
+        self.retries = 0  # Attempts repeated after a lock error
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, ms: float, rows: int = 0, error: Optional[BaseException] = None) -> None:
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        for index, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[index] += 1
+                break
+        if error is not None:
+            self.errors += 1
+            if is_lock_error(error):
+                self.locked += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls."""
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls, "rows": self.rows, "errors": self.errors, "locked": self.locked,
+            "retries": self.retries,
+            "total_ms": round(self.total_ms, 3), "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0,
+            "max_ms": round(self.max_ms, 3), "p50_ms": self.percentile(0.5), "p95_ms": self.percentile(0.95),
+            "histogram": {("inf" if bound == float("inf") else str(bound)): count
+                          for bound, count in zip(BUCKETS_MS, self.buckets) if count},
+        }
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    rows = getattr(result, "rows", None)  # BatchResult
+    if isinstance(rows, int):
+        return rows
+    if hasattr(result, "__len__"):  # ItemBatch
+        return len(result)
+    return 1
+
+
+class Instrumentation:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.slow_ms = SLOW_QUERY_MS
+        self.slow_log: Optional[str] = None
+        self.explain: Optional[Callable[[str], List[str]]] = None
+        self.stats: Dict[str, FunctionStats] = {}
+        self.lock_waits = FunctionStats()
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self, slow_ms: float = SLOW_QUERY_MS, slow_log: Optional[str] = None) -> None:
+        """Starts recording; calls slower than ``slow_ms`` go to ``slow_log`` (if given)."""
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.enabled = True
+        db_pool.set_hooks(trace=self._trace, lock_wait=self._lock_wait)
+
+    def disable(self) -> None:
+        self.enabled = False
+        db_pool.set_hooks(trace=None, lock_wait=None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {}
+            self.lock_waits = FunctionStats()
+            self.slow_queries = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All counters as plain data, busiest functions first."""
+        with self._lock:
+            functions = sorted(self.stats.items(), key=lambda entry: entry[1].total_ms, reverse=True)
+            return {
+                "enabled": self.enabled,
+                "slow_ms": self.slow_ms,
+                "slow_queries": self.slow_queries,
+                "lock_waits": self.lock_waits.as_dict(),
+                "functions": {name: stats.as_dict() for name, stats in functions},
+            }
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def _trace(self, sql: str) -> None:
+        # sqlite3 trace callback: runs on the thread executing the statement.
+        statements = getattr(self._local, "statements", None)
+        if statements is not None and len(statements) < MAX_TRACED:
+            statements.append(sql)
+
+    def _lock_wait(self, ms: float) -> None:
+        with self._lock:
+            self.lock_waits.add(ms)
+
+    def retried(self, name: str) -> None:
+        """Counts one retry of ``name`` after a lock error."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = FunctionStats()
+            stats.retries += 1
+
+    def _record(self, name: str, ms: float, rows: int, error: Optional[BaseException],
+                statements: Optional[List[str]]) -> None:
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = FunctionStats()
+            stats.add(ms, rows, error)
+            slow = ms >= self.slow_ms
+            if slow:
+                self.slow_queries += 1
+        if slow and self.slow_log:
+            self._log_slow(name, ms, rows, error, statements or [])
+
+    def _log_slow(self, name: str, ms: float, rows: int, error: Optional[BaseException],
+                  statements: List[str]) -> None:
+        entries = []
+        for sql in dict.fromkeys(statements):  # Unique, in execution order
+            entry: Dict[str, Any] = {"sql": " ".join(sql.split())}
+            if self.explain and sql.lstrip().upper().startswith(EXPLAINABLE):
+                try:
+                    entry["plan"] = self.explain(sql)
+                except sqlite3.Error as e:
+                    entry["plan_error"] = str(e)
+            entries.append(entry)
+        record = {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "function": name, "ms": round(ms, 3),
+                  "rows": rows, "error": str(error) if error else None, "statements": entries}
+        try:
+            with self._lock, open(self.slow_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Could not write slow query log: {e}")
+
+    def _begin(self) -> Tuple[float, Optional[List[str]], int]:
+        statements = getattr(self._local, "statements", None)
+        if statements is None:
+            statements = self._local.statements = []
+            return time.perf_counter(), None, 0
+        # Nested call (e.g. insert_items inside import_file's transaction).
+        return time.perf_counter(), statements, len(statements)
+
+    def _end(self, name: str, started: Tuple[float, Optional[List[str]], int], rows: int,
+             error: Optional[BaseException]) -> None:
+        start, outer, offset = started
+        ms = (time.perf_counter() - start) * 1000
+        statements = self._local.statements[offset:]
+        if outer is None:
+            self._local.statements = None
+        self._record(name, ms, rows, error, statements)
+
+    def wrap(self, fn: Callable) -> Callable:
+        """Decorator recording calls of ``fn``; generators are timed until exhausted."""
+        name = fn.__name__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:
+                if not self.enabled:
+                    yield from fn(*args, **kwargs)
+                    return
+                rows = 0
+                error = None
+                statements: List[str] = []
+                start = time.perf_counter()
+                generator = fn(*args, **kwargs)
+                try:
+                    while True:
+                        # Collect only while fn runs: between rows, the consumer's own
+                        # statements on this thread belong to whatever it is doing.
+                        outer = getattr(self._local, "statements", None)
+                        collected = self._local.statements = outer if outer is not None else []
+                        offset = len(collected)
+                        try:
+                            row = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            statements.extend(collected[offset:offset + MAX_TRACED - len(statements)])
+                            self._local.statements = outer
+                        rows += 1
+                        yield row
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    # Also runs when the consumer stops early and this generator is closed.
+                    generator.close()
+                    self._record(name, (time.perf_counter() - start) * 1000, rows, error, statements)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            started = self._begin()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._end(name, started, 0, e)
+                raise
+            self._end(name, started, _row_count(result), None)
+            return result
+        return wrapper
+
+
+INSTRUMENTATION = Instrumentation()
+instrumented = INSTRUMENTATION.wrap
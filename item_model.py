@@ -0,0 +1,260 @@
+from dataclasses import replace
+from typing import Any, Iterable, List, Optional
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt, Signal
+from PySide6.QtGui import QFont
+
+from database import ITEMS_PAGE_SIZE, ItemQuery, query_items, search_items
+from db_worker import get_worker
+from formatting import format_date, format_money
+from models import Item, Money
+
+HEADERS = ["Qtd", "Descrição", "Destino", "Valor Unitário", "Valor Total", "Criado em"]
+# Column -> ItemQuery sort key; only indexed orders are offered.
+SORT_BY_COLUMN = {2: "destino", 4: "valor_total", 5: "criado_em"}
+
+
+class ItemTableModel(QAbstractTableModel):
+    """Table model over the itens table, loaded page by page on demand.
+
+    The view asks for more rows through canFetchMore/fetchMore as the user
+    scrolls, so opening the window costs one page regardless of table size.
+    Cell text is only built in data(), i.e. for cells the view paints.
+    Pages are read on the DbWorker thread and appended when they arrive.
+    Filters and sort order live in an ItemQuery and are applied by SQLite,
+    never by sorting loaded rows. With a search text set, pages come from
+    the full-text index instead, ranked by relevance.
+    """
+
+    page_loaded = Signal()
+
+    def __init__(self, paid: int = 0, page_size: int = ITEMS_PAGE_SIZE, parent=None) -> None:
+        super().__init__(parent)
+        self.query = ItemQuery(paid=paid)
+        self.page_size = page_size
+        self._items: List[Item] = []
+        # Nothing is fetched until the first reload(), so the view cannot
+        # query the database before the schema has been set up.
+        self._exhausted = True
+        self._fetching = False
+        self._task_key = f"item-model-{id(self)}"
+        self._replace = False  # Next page replaces the rows shown (snapshot refresh)
+        self.busca = ""
+        # Search pages use OFFSET: rows fetched so far, whatever was removed from _items since.
+        self._fetched = 0
+
+    def set_busca(self, texto: str) -> None:
+        """Switches between the full listing (empty text) and search results."""
+        texto = texto.strip()
+        if texto != self.busca:
+            self.busca = texto
+            self.reload()
+
+    @property
+    def paid(self) -> int:
+        return self.query.paid
+
+    def set_paid(self, paid: int) -> None:
+        """Switches between open and paid items."""
+        self.set_query(replace(self.query, paid=paid))
+
+    def set_query(self, query: ItemQuery) -> None:
+        """Shows the items matching ``query`` (filters and sort order)."""
+        if query != self.query:
+            self.query = query
+            self.reload()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        """Header click: re-queries in the new order; columns without an index are ignored."""
+        key = SORT_BY_COLUMN.get(column)
+        if key is not None:
+            self.set_query(replace(self.query, sort=key, descending=order == Qt.DescendingOrder))
+
+    def reload(self, keep_rows: bool = False) -> None:
+        """Fetches the first page again.
+
+        By default the loaded rows are dropped at once. With ``keep_rows``
+        they stay on screen until the first page arrives and replaces them.
+        """
+        get_worker().cancel(self._task_key)
+        self._fetching = False
+        if keep_rows and self._items:
+            self._replace = True
+            self._exhausted = False
+            self.fetchMore()
+            return
+        self.beginResetModel()
+        self._items = []
+        self._fetched = 0
+        self._exhausted = False
+        self._replace = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def show_snapshot(self, rows: List[list]) -> None:
+        """Shows rows saved by snapshot_rows() without touching the database.
+
+        Nothing more is fetched until reload(); call it with keep_rows=True to
+        swap in the live rows.
+        """
+        self.beginResetModel()
+        self._items = [Item(id=row[0], quantidade=row[1], descricao=row[2], destino=row[3],
+                            valor_unitario=Money(row[4]), valor_total=Money(row[5]), criado_em=row[6], pago=row[7],
+                            versao=row[8])
+                       for row in rows]
+        self._exhausted = True
+        self.endResetModel()
+
+    def snapshot_rows(self) -> List[list]:
+        """The first page as JSON-friendly rows, in database.ITEM_COLUMNS order."""
+        return [[item.id, item.quantidade, item.descricao, item.destino, int(item.valor_unitario),
+                 int(item.valor_total), item.criado_em, item.pago, item.versao]
+                for item in self._items[:self.page_size] if item.id > 0]
+
+    def item_at(self, row: int) -> Optional[Item]:
+        return self._items[row] if 0 <= row < len(self._items) else None
+
+    def _position(self, item: Item) -> int:
+        """Binary search for where ``item`` sits in the query's sort order."""
+        key = self.query.sort_key(item)
+        descending = self.query.descending
+        low, high = 0, len(self._items)
+        while low < high:
+            middle = (low + high) // 2
+            other = self.query.sort_key(self._items[middle])
+            if other > key if descending else other < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def upsert_item(self, item: Item) -> None:
+        """Inserts or patches one stored row in place, keeping the sort order.
+
+        Selection and scroll position survive because only the affected row
+        is inserted, changed or removed.
+        """
+        if self.busca:
+            # Search results are in relevance order: only patch rows already shown.
+            for row, shown in enumerate(self._items):
+                if shown.id == item.id:
+                    self._items[row] = item
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+                    break
+            return
+        row = self._position(item)
+        present = row < len(self._items) and self._items[row].id == item.id
+        if not present:
+            # A changed sort value (e.g. valor_total) moves the row: drop it where it was.
+            self.remove_ids([item.id])
+            row = self._position(item)
+        if not self.query.matches(item):
+            if present:
+                self.remove_row(row)
+            return
+        if present:
+            self._items[row] = item
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        elif row < len(self._items) or self._exhausted:
+            # Past the last loaded row the item will arrive with a later page.
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._items.insert(row, item)
+            self.endInsertRows()
+
+    def remove_row(self, row: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._items[row]
+        self.endRemoveRows()
+
+    def remove_ids(self, ids: Iterable[int]) -> None:
+        """Removes the loaded rows with these ids, one beginRemoveRows per contiguous run.
+
+        Runs are removed bottom-up so earlier row numbers stay valid; rows
+        outside the removed runs keep their selection and scroll position.
+        """
+        ids = set(ids)
+        rows = [row for row, item in enumerate(self._items) if item.id in ids]
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._items[first:last + 1]
+            self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        if role == Qt.UserRole:
+            return item.id
+        if role == Qt.FontRole and item.id < 0:
+            font = QFont()  # Cadastro rápido: ainda na fila de gravação
+            font.setItalic(True)
+            return font
+        if role != Qt.DisplayRole:
+            return None
+
+        column = index.column()
+        if column == 0:
+            return str(item.quantidade)
+        if column == 1:
+            return item.descricao
+        if column == 2:
+            return item.destino
+        if column == 3:
+            return format_money(item.valor_unitario)
+        if column == 4:
+            return format_money(item.valor_total)
+        return format_date(item.criado_em)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid() or self._exhausted or self._fetching:
+            return
+        self._fetching = True
+        if self.busca:
+            get_worker().submit(
+                search_items, self.busca, self.paid, self.page_size, 0 if self._replace else self._fetched,
+                key=self._task_key, on_result=self._append_page, on_error=self._fetch_failed)
+            return
+        last = self._items[-1] if self._items and not self._replace else None
+        get_worker().submit(
+            query_items, self.query, self.query.cursor(last) if last else None, self.page_size,
+            key=self._task_key, on_result=self._append_page, on_error=self._fetch_failed)
+
+    def _fetch_failed(self, error: Exception) -> None:
+        self._fetching = False
+        print(f"Error loading items: {error}")
+
+    def _append_page(self, page: List[Item]) -> None:
+        self._fetching = False
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if self._replace:
+            self._replace = False
+            self._fetched = len(page)
+            self.beginResetModel()
+            self._items = page
+            self.endResetModel()
+        elif page:
+            self._fetched += len(page)
+            start = len(self._items)
+            self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+            self._items.extend(page)
+            self.endInsertRows()
+        self.page_loaded.emit()
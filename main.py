@@ -1,52 +1,41 @@
+from startup import PROFILE, configure_locale, load_snapshot, save_snapshot  # Primeiro: inicia o relógio
+
+import argparse
+import json
 import os
 import sys
-import sqlite3
-import locale
-import sqlite3
-from datetime import datetime
+import threading
+from dataclasses import asdict, replace
+from typing import TYPE_CHECKING, Optional
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtGui import QPixmap, QIcon
+from PySide6.QtCore import QDate, QEvent, QObject, QSize, Qt, QTimer
+from PySide6.QtGui import QIcon, QKeySequence, QShortcut
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHBoxLayout, QCheckBox, QFrame, QHeaderView, QMessageBox
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog,
+    QTableView, QHBoxLayout, QCheckBox, QFrame, QHeaderView, QMessageBox, QProgressBar, QLineEdit, QMenu,
+    QComboBox, QDateEdit
 )
 
-from database import init_db, get_company_config, get_items
-from models import Company, Item
-
-# Set the locale for number formatting
-locale.setlocale(locale.LC_ALL, 'pt_BR')
-
-DB_FILE = "items.db"
+import database
+from database import (
+    ItemQuery, init_db, get_changes, get_company_config, get_totals_by_destino, mark_paid, delete_items
+)
+from db_worker import DbWorker, ProgressEmitter, get_worker
+from empresa_cache import get_notifier, logo_pixmap
+from item_model import SORT_BY_COLUMN, ItemTableModel
+from resumo_panel import ResumoPanel
+from models import ChangeSet, Company, Item, Money, Total
 
+if TYPE_CHECKING:
+    from fila_gravacao import WriteBehindQueue  # Importada em iniciar_fila, depois da primeira tela
 
+PROFILE.mark("imports")
 
-# Conecta ou cria banco e tabelas
-conn = sqlite3.connect(DB_FILE)
-cursor = conn.cursor()
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS configuracao_empresa (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    nome_empresa TEXT,
-    endereco TEXT,
-    cnpj TEXT,
-    telefone TEXT
-)
-""")
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS itens (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    quantidade INTEGER,
-    descricao TEXT,
-    destino TEXT,
-    valor_unitario REAL,
-    valor_total REAL,
-    pago INTEGER DEFAULT 0,
-    criado_em TEXT DEFAULT CURRENT_TIMESTAMP
-)
-""")
-conn.commit()
+INTERVALO_ALTERACOES_MS = 1000  # Consulta ao log de alterações de outras janelas
+INICIO_MANUTENCAO_MS = 30_000  # Primeira verificação da manutenção, depois da abertura
+INTERVALO_MANUTENCAO_MS = 10 * 60_000
+INTERVALO_LOTE_ARQUIVO_MS = 200  # Entre lotes do arquivamento e do instantâneo, enquanto houver itens
+TODOS_DESTINOS = "Todos os destinos"
 
 
 class MainWindow(QMainWindow):
@@ -64,14 +53,14 @@ class MainWindow(QMainWindow):
             QPushButton:hover {
                 background-color: #1565c0;
             }
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ccc;
                 background-color: white;
                 alternate-background-color: #f5f5f5;
             }
         """)
         self.setStyleSheet("""
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #42a5f5;
                 color: white;
             }
@@ -121,24 +110,93 @@ class MainWindow(QMainWindow):
         self.layout.addSpacing(20)
 
         botoes_layout = QHBoxLayout()
-        for texto in ["Cadastrar Novo", "Editar", "Lancar Pago", "Excluir", "Ver Itens Pagos"]:
+        self.botoes: dict[str, QPushButton] = {}
+        for texto in ["Cadastrar Novo", "Editar", "Histórico", "Lancar Pago", "Excluir", "Ver Itens Pagos", "Importar", "Exportar"]:
             btn = QPushButton(texto)
+            self.botoes[texto] = btn
 
             if texto == "Cadastrar Novo":
                 btn.clicked.connect(self.abrir_cadastro)
             elif texto == "Editar":
                 btn.clicked.connect(self.abrir_edicao)
+            elif texto == "Histórico":
+                btn.clicked.connect(self.abrir_historico)
+            elif texto == "Lancar Pago":
+                menu = QMenu(btn)
+                menu.addAction("Itens selecionados", self.lancar_pago)
+                menu.addAction("Por destino e período...", self.lancar_pago_por_filtro)
+                btn.setMenu(menu)
+            elif texto == "Excluir":
+                btn.clicked.connect(self.excluir)
+            elif texto == "Ver Itens Pagos":
+                btn.clicked.connect(self.alternar_pagos)
+            elif texto == "Importar":
+                btn.clicked.connect(self.abrir_importacao)
+            elif texto == "Exportar":
+                btn.clicked.connect(self.abrir_exportacao)
 
             botoes_layout.addWidget(btn)
 
         self.layout.addLayout(botoes_layout)  # Use self.layout
 
-        self.tabela = QTableWidget()
-        self.tabela.setSelectionBehavior(QTableWidget.SelectRows)
-        self.tabela.setColumnCount(6)
-        self.tabela.setHorizontalHeaderLabels([
-            "Qtd", "Descrição", "Destino", "Valor Unitário", "Valor Total", "Criado em"
-        ])
+        # Busca enquanto digita: espera uma pausa na digitação antes de consultar
+        self.busca_input = QLineEdit()
+        self.busca_input.setPlaceholderText("Buscar por descrição ou destino...")
+        self.busca_input.setClearButtonEnabled(True)
+        self.busca_timer = QTimer(self)
+        self.busca_timer.setSingleShot(True)
+        self.busca_timer.setInterval(250)
+        self.busca_timer.timeout.connect(self.buscar)
+        self.busca_input.textChanged.connect(self.busca_timer.start)
+        self.layout.addWidget(self.busca_input)
+
+        # Filtros: aplicados pelo SQLite (ItemQuery), com a mesma espera da busca
+        self.filtro_timer = QTimer(self)
+        self.filtro_timer.setSingleShot(True)
+        self.filtro_timer.setInterval(300)
+        self.filtro_timer.timeout.connect(self.aplicar_filtros)
+        filtros_layout = QHBoxLayout()
+        self.destino_filtro = QComboBox()
+        self.destino_filtro.addItem(TODOS_DESTINOS, None)
+        self.destino_filtro.setMinimumWidth(180)
+        self.destino_filtro.currentIndexChanged.connect(self.filtro_timer.start)
+        self.periodo_filtro = QCheckBox("Criados de")
+        self.periodo_filtro.toggled.connect(self.filtro_timer.start)
+        hoje = QDate.currentDate()
+        self.inicio_filtro = QDateEdit(QDate(hoje.year(), hoje.month(), 1))
+        self.fim_filtro = QDateEdit(hoje)
+        for data in (self.inicio_filtro, self.fim_filtro):
+            data.setCalendarPopup(True)
+            data.setDisplayFormat("dd/MM/yyyy")
+            data.setEnabled(False)
+            data.dateChanged.connect(self.filtro_timer.start)
+            self.periodo_filtro.toggled.connect(data.setEnabled)
+        self.valor_min_filtro = QLineEdit()
+        self.valor_max_filtro = QLineEdit()
+        for valor, texto in ((self.valor_min_filtro, "mín."), (self.valor_max_filtro, "máx.")):
+            valor.setPlaceholderText(texto)
+            valor.setMaximumWidth(90)
+            valor.textChanged.connect(self.filtro_timer.start)
+        filtros_layout.addWidget(QLabel("Destino:"))
+        filtros_layout.addWidget(self.destino_filtro)
+        filtros_layout.addWidget(self.periodo_filtro)
+        filtros_layout.addWidget(self.inicio_filtro)
+        filtros_layout.addWidget(QLabel("até"))
+        filtros_layout.addWidget(self.fim_filtro)
+        filtros_layout.addWidget(QLabel("Valor total:"))
+        filtros_layout.addWidget(self.valor_min_filtro)
+        filtros_layout.addWidget(self.valor_max_filtro)
+        filtros_layout.addStretch()
+        self.layout.addLayout(filtros_layout)
+
+        self.resumo = ResumoPanel()
+        self.layout.addWidget(self.resumo)
+
+        self.modelo = ItemTableModel(parent=self)
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
+        self.tabela.setSelectionBehavior(QTableView.SelectRows)
+        self.tabela.setSelectionMode(QTableView.ExtendedSelection)  # Ctrl/Shift para vários itens
         self.tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.tabela.verticalHeader().setVisible(False)
         self.tabela.horizontalHeader().setStretchLastSection(True)
@@ -148,98 +206,448 @@ class MainWindow(QMainWindow):
         self.tabela.setColumnWidth(3, 100)  # Valor Unitário
         self.tabela.setColumnWidth(4, 100)  # Valor Total
         self.tabela.setColumnWidth(5, 80)  # Criado em
+        # Clique no cabeçalho ordena no banco; só colunas com índice (SORT_BY_COLUMN)
+        cabecalho = self.tabela.horizontalHeader()
+        cabecalho.setSectionsClickable(True)
+        cabecalho.setSortIndicatorShown(True)
+        cabecalho.setSortIndicator(5, Qt.DescendingOrder)
+        cabecalho.sortIndicatorChanged.connect(self.ordenar)
         self.layout.addWidget(self.tabela)
         self.widget.setLayout(self.layout)
         self.setCentralWidget(self.widget)
 
+        # Indicador de carregamento: visível enquanto houver consultas em segundo plano
+        self.carregando = QProgressBar()
+        self.carregando.setRange(0, 0)
+        self.carregando.setMaximumWidth(120)
+        self.carregando.setVisible(False)
+        self.statusBar().addPermanentWidget(self.carregando)
+
+        # Exportações rodam em um worker próprio para não atrasar as consultas da tabela
+        self.exportando = QProgressBar()
+        self.exportando.setRange(0, 1000)
+        self.exportando.setMaximumWidth(160)
+        self.exportando.setVisible(False)
+        self.statusBar().addPermanentWidget(self.exportando)
+        self.btn_cancelar_exportacao = QPushButton("Cancelar")
+        self.btn_cancelar_exportacao.setVisible(False)
+        self.btn_cancelar_exportacao.clicked.connect(self.cancelar_exportacao)
+        self.statusBar().addPermanentWidget(self.btn_cancelar_exportacao)
+        self.exportacao_worker: Optional[DbWorker] = None
+        self._parar_exportacao = threading.Event()
+        self.exportacao_progresso = ProgressEmitter(self)
+        self.exportacao_progresso.updated.connect(self.exibir_progresso_exportacao)
+
+        self.worker = get_worker()
+        self.worker.busy_changed.connect(self.carregando.setVisible)
+        get_notifier().alterada.connect(self.exibir_dados_empresa)
+        self.empresa: Optional[Company] = None
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.abrir_depuracao)
+
+        # Itens gravados por outras janelas ou computadores chegam pelo log de
+        # alterações; a consulta só lê tabelas quando o data_version muda.
+        self.alteracoes_timer = QTimer(self)
+        self.alteracoes_timer.setInterval(INTERVALO_ALTERACOES_MS)
+        self.alteracoes_timer.timeout.connect(self.verificar_alteracoes)
+        self.alteracoes: Optional[ChangeSet] = None
+
+        # Manutenção periódica (arquivamento de pagos antigos, estatísticas),
+        # um lote por vez para as consultas da tela passarem entre eles.
+        self.manutencao_timer = QTimer(self)
+        self.manutencao_timer.setSingleShot(True)
+        self.manutencao_timer.timeout.connect(self.executar_manutencao)
+        # Fila do cadastro rápido, criada com o banco (ver iniciar_banco)
+        self.fila: Optional["WriteBehindQueue"] = None
+        PROFILE.mark("window built")
+
+        # A primeira tela vem do snapshot salvo ao fechar; o banco só é
+        # aberto depois da primeira pintura da tabela (ver iniciar_banco).
+        self.mostrar_snapshot()
+        self._pintado = False
+        self._banco_iniciado = False
+        self.tabela.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:
+        if not self._pintado and event.type() == QEvent.Paint and obj is self.tabela.viewport():
+            self._pintado = True
+            PROFILE.mark("first paint")
+            QTimer.singleShot(0, self.iniciar_banco)
+        return False
+
+    def mostrar_snapshot(self) -> None:
+        snapshot = load_snapshot(database.DB_FILE)
+        if snapshot:
+            if snapshot.get("empresa"):
+                self.exibir_dados_empresa(Company(**snapshot["empresa"]))
+            self.modelo.show_snapshot(snapshot["itens"])
+        PROFILE.mark("snapshot shown" if snapshot else "no snapshot")
+
+    def iniciar_banco(self) -> None:
+        if self._banco_iniciado:
+            return
+        self._banco_iniciado = True
+        # All SQLite work runs on the worker thread, in submission order, so
+        # the schema is ready before the loads below reach the database.
+        self.worker.submit(init_db, on_result=lambda _: PROFILE.mark("schema ready"),
+                           on_error=self.erro_inicializacao)
+        # Posição atual do log: só o que for gravado daqui em diante é aplicado
+        self.worker.submit(get_changes, quiet=True, on_result=self.iniciar_alteracoes)
+        self.carregar_dados_empresa()
+        self.modelo.reload(keep_rows=True)  # As linhas do snapshot ficam até chegar a primeira página
+        self.resumo.atualizar()
+        self.carregar_destinos()
+        self.manutencao_timer.start(INICIO_MANUTENCAO_MS)
+        self.iniciar_fila()
+
+    def iniciar_fila(self) -> None:
+        from fila_gravacao import WriteBehindQueue
         try:
-            init_db()
-            self.carregar_dados_empresa()
-            self.carregar_itens()
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Erro", f"Erro de banco de dados: {e}. O aplicativo não pode iniciar.")
+            self.fila = WriteBehindQueue(database.DB_FILE, self)
+        except OSError as e:
+            print(f"Cadastro rápido indisponível: {e}")
+            return
+        self.fila.adicionado.connect(self.modelo.upsert_item)
+        self.fila.gravados.connect(self.itens_gravados)
+        self.fila.falhou.connect(self.erro_fila)
+        self.fila.rejeitado.connect(self.item_rejeitado)
+        # Itens do diário que a última execução não chegou a gravar
+        self.fila.recover()
+
+    def itens_gravados(self, gravados: list[tuple[int, Item]]) -> None:
+        # Troca as linhas provisórias (id negativo) pelas gravadas
+        self.modelo.remove_ids([provisorio for provisorio, _ in gravados])
+        for _, item in gravados:
+            self.modelo.upsert_item(item)
+        self.resumo.atualizar()
+        self.statusBar().showMessage(f"{len(gravados)} item(ns) do cadastro rápido gravado(s)", 5000)
+
+    def erro_fila(self, e: Exception) -> None:
+        print(f"Erro ao gravar a fila do cadastro rápido: {e}")
+        self.statusBar().showMessage(f"Itens do cadastro rápido ainda não gravados ({e}); tentando novamente...")
+
+    def item_rejeitado(self, provisorio: int, motivo: str) -> None:
+        self.modelo.remove_ids([provisorio])
+        print(f"Item do cadastro rápido rejeitado: {motivo}")
+        QMessageBox.warning(self, "Cadastro rápido",
+                            f"Um item do cadastro rápido não pôde ser gravado ({motivo}) e foi separado em "
+                            f"{os.path.basename(self.fila.rejects_path)}.")
+
+    def iniciar_alteracoes(self, alteracoes: ChangeSet) -> None:
+        self.alteracoes = alteracoes
+        self.alteracoes_timer.start()
+
+    def verificar_alteracoes(self) -> None:
+        self.worker.submit(get_changes, self.alteracoes.last_id, self.alteracoes.data_version,
+                           key="alteracoes", quiet=True, on_result=self.aplicar_alteracoes)
+
+    def aplicar_alteracoes(self, alteracoes: ChangeSet) -> None:
+        self.alteracoes = alteracoes
+        if alteracoes.reload:
+            # Alterações demais para aplicar uma a uma
+            self.modelo.reload(keep_rows=True)
+        elif alteracoes.items or alteracoes.deleted_ids:
+            for item in alteracoes.items:
+                self.modelo.upsert_item(item)
+            self.modelo.remove_ids(alteracoes.deleted_ids)
+        else:
+            return
+        self.resumo.atualizar()
+        self.statusBar().showMessage("Lista atualizada com alterações recentes", 5000)
+
+    def executar_manutencao(self) -> None:
+        from manutencao import APP_TASKS, run_maintenance
+        self.worker.submit(run_maintenance, APP_TASKS, max_batches=1, key="manutencao", quiet=True,
+                           on_result=self.manutencao_concluida, on_error=self.erro_manutencao)
+
+    def manutencao_concluida(self, status) -> None:
+        # Itens arquivados continuam na lista: nada a recarregar
+        self.manutencao_timer.start(INTERVALO_LOTE_ARQUIVO_MS if status.pendente else INTERVALO_MANUTENCAO_MS)
+
+    def erro_manutencao(self, e: Exception) -> None:
+        print(f"Erro na manutenção do banco: {e}")
+        self.manutencao_timer.start(INTERVALO_MANUTENCAO_MS)
+
+    def closeEvent(self, event) -> None:
+        if self.exportacao_worker is not None and self.exportacao_worker.is_busy():
+            self._parar_exportacao.set()
+            self.exportacao_worker.wait()
+        if self.fila is not None and len(self.fila):
+            # O que não for gravado aqui continua no diário e é gravado na próxima abertura
+            self.fila.flush()
+            self.worker.wait()
+        # Snapshot da primeira página de itens em aberto para a próxima abertura
+        if self.modelo.query == ItemQuery() and not self.modelo.busca and self._banco_iniciado:
+            save_snapshot(database.DB_FILE, asdict(self.empresa) if self.empresa else None,
+                          self.modelo.snapshot_rows())
+        super().closeEvent(event)
+
+    def erro_inicializacao(self, e: Exception) -> None:
+        QMessageBox.critical(self, "Erro", f"Erro de banco de dados: {e}. O aplicativo não pode iniciar.")
 
     def carregar_dados_empresa(self) -> None:
-        empresa: Optional[Company] = get_company_config()
+        self.worker.submit(get_company_config, key="empresa", on_result=self.exibir_dados_empresa)
+
+    def exibir_dados_empresa(self, empresa: Optional[Company]) -> None:
         if empresa:
+            self.empresa = empresa
             self.nome_empresa.setText(empresa.nome_empresa)
             self.endereco.setText(empresa.endereco)
             self.dados_empresa.setText(f"CNPJ: {empresa.cnpj} - Tel: {empresa.telefone}")
 
-            if os.path.exists("logo.png"):
-                pixmap = QPixmap("logo.png").scaledToHeight(72)
+            pixmap = logo_pixmap(QSize(288, 72))
+            if pixmap is not None:
                 self.logo.setPixmap(pixmap)
     
     def carregar_itens(self):
-        itens = get_items()
-        self.tabela.setRowCount(len(itens))
-        for row, item in enumerate(itens):
-            item_widget = QTableWidgetItem(str(item.quantidade))
-            item_widget.setData(Qt.UserRole, item.id)
-            self.tabela.setItem(row, 0, item_widget)  # Qtd
-
-            self.tabela.setItem(row, 1, QTableWidgetItem(item.descricao))
-            self.tabela.setItem(row, 2, QTableWidgetItem(item.destino))
-
-            # Format numeric values with currency and decimal separators
-            valor_unitario_formatted = locale.currency(item.valor_unitario, grouping=True)
-            valor_total_formatted = locale.currency(item.valor_total, grouping=True)
-
-            self.tabela.setItem(row, 3, QTableWidgetItem(valor_unitario_formatted))
-            self.tabela.setItem(row, 4, QTableWidgetItem(valor_total_formatted))
-
-            # Format the date, handling potential None values
-            created_at = datetime.strptime(item.criado_em, "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y") if item.criado_em else ""
-            self.tabela.setItem(row, 5, QTableWidgetItem(created_at))           
-
-
+        if not self._banco_iniciado:
+            self.iniciar_banco()  # Já carrega itens e resumo depois de preparar o banco
+            return
+        # Only the first page is queried; the view pulls the rest while scrolling.
+        self.modelo.reload()
+        self.resumo.atualizar()
+
+    def buscar(self) -> None:
+        self.modelo.set_busca(self.busca_input.text())
+
+    def ordenar(self, coluna: int, ordem: Qt.SortOrder) -> None:
+        if coluna not in SORT_BY_COLUMN:
+            # Sem índice para esta coluna: volta o indicador para a ordem atual
+            atual = next(c for c, chave in SORT_BY_COLUMN.items() if chave == self.modelo.query.sort)
+            self.tabela.horizontalHeader().setSortIndicator(
+                atual, Qt.DescendingOrder if self.modelo.query.descending else Qt.AscendingOrder)
+            return
+        self.modelo.sort(coluna, ordem)
+
+    def carregar_destinos(self) -> None:
+        self.worker.submit(get_totals_by_destino, self.modelo.paid, key="destinos", on_result=self.exibir_destinos)
+
+    def exibir_destinos(self, destinos: list[Total]) -> None:
+        atual = self.destino_filtro.currentData()
+        self.destino_filtro.blockSignals(True)
+        self.destino_filtro.clear()
+        self.destino_filtro.addItem(TODOS_DESTINOS, None)
+        for total in sorted(destinos, key=lambda total: total.chave.lower()):
+            self.destino_filtro.addItem(total.chave or "(sem destino)", total.chave)
+        indice = self.destino_filtro.findData(atual)
+        self.destino_filtro.setCurrentIndex(max(indice, 0))
+        self.destino_filtro.blockSignals(False)
+        if atual is not None and indice < 0:
+            self.aplicar_filtros()  # O destino escolhido não tem mais itens neste status
+
+    def valor_filtro(self, campo: QLineEdit) -> Optional[int]:
+        try:
+            return int(Money.parse(campo.text())) if campo.text().strip() else None
+        except ValueError:
+            return None
+
+    def aplicar_filtros(self) -> None:
+        periodo = self.periodo_filtro.isChecked()
+        self.modelo.set_query(replace(
+            self.modelo.query,
+            destino=self.destino_filtro.currentData(),
+            start=self.inicio_filtro.date().toString("yyyy-MM-dd") if periodo else "",
+            # criado_em guarda data e hora: o limite é o início do dia seguinte
+            end=self.fim_filtro.date().addDays(1).toString("yyyy-MM-dd") if periodo else "",
+            min_total=self.valor_filtro(self.valor_min_filtro),
+            max_total=self.valor_filtro(self.valor_max_filtro),
+        ))
+
+    def itens_selecionados(self) -> list[Item]:
+        linhas = sorted(index.row() for index in self.tabela.selectionModel().selectedRows())
+        # Linhas do cadastro rápido ainda na fila (id negativo) não existem no banco
+        return [item for item in map(self.modelo.item_at, linhas) if item is not None and item.id > 0]
+
+    def lancar_pago(self) -> None:
+        itens = self.itens_selecionados()
+        if not itens:
+            QMessageBox.warning(self, "Aviso", "Selecione os itens para lançar.")
+            return
+        # Na lista de pagos, a mesma ação estorna o pagamento
+        pago = 0 if self.modelo.paid else 1
+        self.worker.submit(mark_paid, [item.id for item in itens], pago,
+                           on_result=self.itens_removidos, on_error=self.erro_ao_atualizar)
+
+    def lancar_pago_por_filtro(self) -> None:
+        from pagamento_dialog import PagamentoFiltroDialog
+        dialog = PagamentoFiltroDialog(self, pago=0 if self.modelo.paid else 1)
+        if dialog.exec():
+            self.itens_removidos(dialog.ids_alterados)
 
+    def excluir(self) -> None:
+        itens = self.itens_selecionados()
+        if not itens:
+            QMessageBox.warning(self, "Aviso", "Selecione os itens para excluir.")
+            return
+        resposta = QMessageBox.question(self, "Excluir", f"Excluir {len(itens)} item(ns) selecionado(s)?")
+        if resposta != QMessageBox.Yes:
+            return
+        self.worker.submit(delete_items, [item.id for item in itens],
+                           on_result=self.itens_removidos, on_error=self.erro_ao_atualizar)
 
+    def itens_removidos(self, ids: list[int]) -> None:
+        # Itens pagos, estornados ou excluídos saem da lista atual sem recarregar a tabela
+        self.modelo.remove_ids(ids)
+        self.resumo.atualizar()
+        self.statusBar().showMessage(f"{len(ids)} item(ns) atualizado(s)", 5000)
 
+    def erro_ao_atualizar(self, e: Exception) -> None:
+        QMessageBox.warning(self, "Erro", f"Erro ao atualizar itens: {e}")
 
+    def alternar_pagos(self) -> None:
+        pagos = not self.modelo.paid
+        self.botoes["Ver Itens Pagos"].setText("Ver Itens em Aberto" if pagos else "Ver Itens Pagos")
+        self.botoes["Lancar Pago"].setText("Estornar Pago" if pagos else "Lancar Pago")
+        self.modelo.set_paid(int(pagos))
+        self.carregar_destinos()
 
+    def abrir_depuracao(self) -> None:
+        from debug_panel import DebugPanel
+        DebugPanel(self).exec()
 
     def abrir_configuracao(self):
         from empresa_config import EmpresaConfigDialog
-        dialog = EmpresaConfigDialog(self)
-        if dialog.exec():
-            self.carregar_dados_empresa()
+        # Ao salvar, o diálogo avisa pelo EmpresaNotifier e o cabeçalho se atualiza
+        EmpresaConfigDialog(self).exec()
 
     def abrir_cadastro(self):
         from cadastro_item import CadastroItemDialog
-        dialog = CadastroItemDialog(self)
+        dialog = CadastroItemDialog(self, fila=self.fila)
+        if dialog.exec():
+            self.atualizar_item(dialog.item_salvo)
+
+    def abrir_importacao(self):
+        from importacao_dialog import ImportacaoDialog
+        dialog = ImportacaoDialog(self)
         if dialog.exec():
             self.carregar_itens()
 
-    def abrir_edicao(self):
-        selected = self.tabela.currentRow()
-        if selected < 0:
-            QMessageBox.warning(self, "Aviso", "Selecione um item para editar.")
+    def abrir_exportacao(self):
+        if self.exportacao_worker is not None and self.exportacao_worker.is_busy():
+            QMessageBox.information(self, "Exportar", "Já existe uma exportação em andamento.")
+            return
+        caminho, _ = QFileDialog.getSaveFileName(
+            self, "Exportar Itens", "itens_pagos.csv" if self.modelo.paid else "itens.csv",
+            "CSV (*.csv);;Relatório PDF (*.pdf);;Relatório HTML (*.html);;Parquet (*.parquet)")
+        if not caminho:
             return
 
-        id_item = self.tabela.item(selected, 0).data(Qt.UserRole)  
+        from exportacao import export_items
+        if self.exportacao_worker is None:
+            self.exportacao_worker = DbWorker(parent=self)
+        self._parar_exportacao.clear()
+        self.exportando.setValue(0)
+        self.exportando.setVisible(True)
+        self.btn_cancelar_exportacao.setEnabled(True)
+        self.btn_cancelar_exportacao.setVisible(True)
+        self.statusBar().showMessage("Exportando...")
+        self.exportacao_worker.submit(export_items, caminho, self.modelo.paid,
+                                      on_progress=self.exportacao_progresso.updated.emit,
+                                      should_stop=self._parar_exportacao.is_set,
+                                      on_result=self.exportacao_concluida, on_error=self.erro_exportacao)
+
+    def cancelar_exportacao(self) -> None:
+        # Para no próximo lote de linhas; o arquivo parcial é apagado em exportacao_concluida
+        self._parar_exportacao.set()
+        self.btn_cancelar_exportacao.setEnabled(False)
+        self.statusBar().showMessage("Cancelando exportação...")
+
+    def exibir_progresso_exportacao(self, status) -> None:
+        self.exportando.setValue(int(status.fracao * 1000))
+        self.statusBar().showMessage(f"Exportando... {status.linhas} itens")
+
+    def exportacao_concluida(self, status) -> None:
+        self.exportando.setVisible(False)
+        self.btn_cancelar_exportacao.setVisible(False)
+        if status.interrompida:
+            try:
+                os.remove(status.arquivo)
+            except OSError:
+                pass
+            self.statusBar().showMessage("Exportação cancelada", 10000)
+            return
+        self.statusBar().showMessage(f"{status.linhas} itens exportados para {status.arquivo}", 10000)
 
-        quantidade = self.tabela.item(selected, 0).text()  
-        descricao = self.tabela.item(selected, 1).text()  
-        destino = self.tabela.item(selected, 2).text()  
-        valor_unitario = locale.atof(self.tabela.item(selected, 3).text().replace("R$", "").strip())
+    def erro_exportacao(self, e: Exception) -> None:
+        self.exportando.setVisible(False)
+        self.btn_cancelar_exportacao.setVisible(False)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Erro", f"Erro ao exportar itens: {e}")
+
+    def abrir_edicao(self):
+        item = self.modelo.item_at(self.tabela.currentIndex().row())
+        if item is None:
+            QMessageBox.warning(self, "Aviso", "Selecione um item para editar.")
+            return
+        if item.id < 0:
+            QMessageBox.information(self, "Aviso", "Este item ainda está sendo gravado. Tente novamente em instantes.")
+            return
 
         from cadastro_item import CadastroItemDialog
         dialog = CadastroItemDialog(self, editar=True, dados={
-            "id": id_item,
-            "quantidade": quantidade,
-            "descricao": descricao,
-            "destino": destino,
-            "valor_unitario": valor_unitario
+            "id": item.id,
+            "quantidade": str(item.quantidade),
+            "descricao": item.descricao,
+            "destino": item.destino,
+            "valor_unitario": item.valor_unitario,
+            "versao": item.versao
         })
 
         if dialog.exec():
+            self.atualizar_item(dialog.item_salvo)
+
+    def abrir_historico(self) -> None:
+        item = self.modelo.item_at(self.tabela.currentIndex().row())
+        if item is None:
+            QMessageBox.warning(self, "Aviso", "Selecione um item para ver o histórico.")
+            return
+        if item.id < 0:
+            QMessageBox.information(self, "Aviso", "Este item ainda está sendo gravado. Tente novamente em instantes.")
+            return
+        from historico_dialog import HistoricoDialog
+        HistoricoDialog(item, self).exec()
+
+    def atualizar_item(self, item: Optional[Item]) -> None:
+        # Patch just the saved row; a missing row (deleted meanwhile) falls back to a reload.
+        if item is None:
             self.carregar_itens()
+        else:
+            self.modelo.upsert_item(item)
+            self.resumo.atualizar()
+
+
+def perfilar_inicio(app: QApplication, window: MainWindow, saida: str) -> None:
+    """--profile-startup: reports the phases once the live first page is shown, then quits."""
+    def concluir() -> None:
+        window.modelo.page_loaded.disconnect(concluir)
+        PROFILE.mark("first page loaded")
+        print(PROFILE.report(), file=sys.stderr)
+        if saida != "-":
+            with open(saida, "w", encoding="utf-8") as f:
+                json.dump(PROFILE.as_dict(), f, indent=2)
+        app.quit()
+
+    window.modelo.page_loaded.connect(concluir)
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    app.setStyleSheet(open("style.qss").read())
+    parser = argparse.ArgumentParser(description="Sistema de Controle de Itens")
+    parser.add_argument("--profile-startup", nargs="?", const="-", metavar="ARQUIVO.json",
+                        help="mede as fases da abertura, mostra o relatório e encerra")
+    parser.add_argument("--debug-db", action="store_true",
+                        help="registra estatísticas e consultas lentas desde a abertura (Ctrl+Shift+D)")
+    args, qt_args = parser.parse_known_args()
+    if args.debug_db:
+        from debug_panel import ativar_instrumentacao
+        ativar_instrumentacao()
+
+    configure_locale("pt_BR")
+    app = QApplication(sys.argv[:1] + qt_args)
+    PROFILE.mark("QApplication")
+    with open("style.qss") as f:
+        app.setStyleSheet(f.read())
     window = MainWindow()
+    if args.profile_startup:
+        perfilar_inicio(app, window, args.profile_startup)
     window.show()
+    PROFILE.mark("show")
     sys.exit(app.exec())
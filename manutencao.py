@@ -0,0 +1,119 @@
+"""Scheduled database upkeep: archiving, audit log snapshots and compaction, statistics.
+
+Each task has an interval, and the time it last ran is kept in the
+manutencao table. Whoever runs the maintenance (the application, every few
+minutes, or this script from cron or with --a-cada) only does what is due,
+so several instances do not repeat each other's work.
+
+Usage: python manutencao.py [--db dados.sqlite] [--dias 180] [--tarefas arquivar,vacuum]
+                            [--forcar] [--a-cada MINUTOS]
+"""
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+import database
+
+# Task -> hours between runs, in the order they run.
+INTERVALS = {
+    "arquivar": 1,  # archive_paid_items
+    "instantaneo": 24,  # take_snapshot, if enough events were logged
+    "compactar": 24 * 7,  # compact_events
+    "otimizar": 24,  # PRAGMA optimize
+    "analisar": 24 * 7,  # Full ANALYZE, reads every table and index
+    "vacuum": 24 * 30,  # Blocks every writer while it runs
+}
+# The application leaves the full ANALYZE and VACUUM to this script, run when
+# nobody is working: either would hold up the DbWorker for the whole database.
+APP_TASKS = ("arquivar", "instantaneo", "compactar", "otimizar")
+
+
+@dataclass
+class MaintenanceStatus:
+    executadas: List[str] = field(default_factory=list)
+    arquivados: int = 0
+    pendente: bool = False  # Archiving, a snapshot or compaction stopped at max_batches with rows left
+
+
+def due_tasks(tasks: Iterable[str] = tuple(INTERVALS)) -> List[str]:
+    """The given tasks whose interval has passed since they last ran, in run order."""
+    ages = database.get_maintenance_ages()
+    wanted = set(tasks)
+    return [task for task, hours in INTERVALS.items()
+            if task in wanted and ages.get(task, hours) >= hours]
+
+
+def run_maintenance(tasks: Iterable[str] = tuple(INTERVALS), force: bool = False,
+                    older_than_days: int = database.ARCHIVE_AFTER_DAYS,
+                    max_batches: Optional[int] = None) -> MaintenanceStatus:
+    """Runs the due tasks (all given ones with ``force``) and records them.
+
+    ``max_batches`` bounds the archiving, the snapshot copying and the
+    compaction done by one call. When it is reached, that task is not
+    recorded as done and the later tasks wait, so the next call continues
+    where this one stopped.
+    """
+    tasks = set(tasks)
+    status = MaintenanceStatus()
+    for task in [task for task in INTERVALS if task in tasks] if force else due_tasks(tasks):
+        if task == "arquivar":
+            status.arquivados = database.archive_paid_items(older_than_days, max_batches=max_batches)
+            if max_batches is not None and status.arquivados >= max_batches * database.ARCHIVE_BATCH_SIZE:
+                status.pendente = True
+                return status
+        elif task == "instantaneo":
+            if database.take_snapshot(max_batches=max_batches) is None and database.snapshot_in_progress():
+                status.pendente = True
+                return status
+        elif task == "compactar":
+            if database.compact_events(max_batches=max_batches) is None:
+                status.pendente = True
+                return status
+        elif task == "otimizar":
+            database.optimize_db()
+        elif task == "analisar":
+            database.optimize_db(analyze=True)
+        elif task == "vacuum":
+            database.vacuum_db()
+        database.record_maintenance(task)
+        status.executadas.append(task)
+    return status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Arquiva itens pagos antigos e otimiza o banco.")
+    parser.add_argument("--db", default=database.DB_FILE, help="arquivo do banco (padrão: %(default)s)")
+    parser.add_argument("--dias", type=int, default=database.ARCHIVE_AFTER_DAYS,
+                        help="arquiva itens pagos criados há mais dias que isto (padrão: %(default)s)")
+    parser.add_argument("--tarefas", default=",".join(INTERVALS),
+                        help="tarefas separadas por vírgula (padrão: %(default)s)")
+    parser.add_argument("--forcar", action="store_true", help="executa as tarefas mesmo fora do intervalo")
+    parser.add_argument("--a-cada", type=float, metavar="MINUTOS",
+                        help="continua rodando e verifica as tarefas a cada MINUTOS")
+    args = parser.parse_args()
+
+    tasks = [task.strip() for task in args.tarefas.split(",") if task.strip()]
+    unknown = set(tasks) - set(INTERVALS)
+    if unknown:
+        parser.error(f"tarefas desconhecidas: {', '.join(sorted(unknown))} (opções: {', '.join(INTERVALS)})")
+    database.DB_FILE = args.db
+    database.init_db()
+    try:
+        while True:
+            started = time.perf_counter()
+            status = run_maintenance(tasks, args.forcar, args.dias)
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')}  executadas: {', '.join(status.executadas) or 'nenhuma'}"
+                  f"  arquivados: {status.arquivados}  no arquivo: {database.count_archived_items()}"
+                  f"  ({time.perf_counter() - started:.1f}s)")
+            if args.a_cada is None:
+                break
+            time.sleep(args.a_cada * 60)
+    except KeyboardInterrupt:
+        print("\nInterrompido.", file=sys.stderr)
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
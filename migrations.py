@@ -0,0 +1,495 @@
+import sqlite3
+from typing import Callable, Dict, Optional, Tuple
+
+from db_pool import ConnectionPool
+
+Migration = Callable[[sqlite3.Cursor], None]
+
+# Schema version -> function that upgrades from version - 1. The applied
+# version is stored in PRAGMA user_version, inside the same transaction as
+# the migration itself, so a failed migration leaves the version untouched.
+MIGRATIONS: Dict[int, Migration] = {}
+
+
+def migration(version: int) -> Callable[[Migration], Migration]:
+    def register(func: Migration) -> Migration:
+        if version in MIGRATIONS:
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS[version] = func
+        return func
+    return register
+
+
+def latest_version() -> int:
+    return max(MIGRATIONS)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(pool: ConnectionPool, target: Optional[int] = None) -> int:
+    """Applies pending migrations up to ``target`` (default: latest). Returns the new version."""
+    target = latest_version() if target is None else target
+    version = current_version(pool.connection())
+    while version < target:
+        version += 1
+        with pool.transaction(immediate=True) as cursor:
+            # Re-check under the write lock: another process may have migrated meanwhile.
+            if current_version(cursor.connection) >= version:
+                continue
+            MIGRATIONS[version](cursor)
+            cursor.execute(f"PRAGMA user_version = {version}")
+    return version
+
+
+@migration(1)
+def create_base_tables(cursor: sqlite3.Cursor) -> None:
+    # IF NOT EXISTS: databases created before migrations existed already have these.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS configuracao_empresa (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome_empresa TEXT,
+        endereco TEXT,
+        cnpj TEXT,
+        telefone TEXT
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS itens (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quantidade INTEGER,
+        descricao TEXT,
+        destino TEXT,
+        valor_unitario REAL,
+        valor_total REAL,
+        pago INTEGER DEFAULT 0,
+        criado_em TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+@migration(2)
+def index_itens_by_status_and_date(cursor: sqlite3.Cursor) -> None:
+    # Serves "WHERE pago = ? ORDER BY criado_em DESC" without a sort step;
+    # the implicit rowid at the end of the index breaks ties by id.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_itens_pago_criado_em ON itens (pago, criado_em)")
+    cursor.execute("ANALYZE itens")
+
+
+def _summary_trigger_bodies(table: str, key: str) -> Tuple[str, str]:
+    """Trigger statements adding a NEW row to / subtracting an OLD row from a resumo_* table."""
+    new_key = "COALESCE(NEW.destino, '')" if key == "destino" else "COALESCE(date(NEW.criado_em), '')"
+    old_key = "COALESCE(OLD.destino, '')" if key == "destino" else "COALESCE(date(OLD.criado_em), '')"
+    add = f"""
+        INSERT INTO {table} ({key}, pago, itens, quantidade, valor_total)
+        VALUES ({new_key}, NEW.pago, 1, COALESCE(NEW.quantidade, 0), COALESCE(NEW.valor_total, 0))
+        ON CONFLICT ({key}, pago) DO UPDATE SET
+            itens = itens + 1,
+            quantidade = quantidade + excluded.quantidade,
+            valor_total = valor_total + excluded.valor_total;"""
+    subtract = f"""
+        UPDATE {table}
+        SET itens = itens - 1,
+            quantidade = quantidade - COALESCE(OLD.quantidade, 0),
+            valor_total = valor_total - COALESCE(OLD.valor_total, 0)
+        WHERE {key} = {old_key} AND pago = OLD.pago;
+        DELETE FROM {table} WHERE {key} = {old_key} AND pago = OLD.pago AND itens <= 0;"""
+    return add, subtract
+
+
+def _create_summary_tables(cursor: sqlite3.Cursor, money_type: str, watched_columns: str) -> None:
+    """Creates and backfills the resumo_* tables and the itens triggers that maintain them."""
+    cursor.execute(f"""
+    CREATE TABLE resumo_destino (
+        destino TEXT NOT NULL,
+        pago INTEGER NOT NULL,
+        itens INTEGER NOT NULL DEFAULT 0,
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        valor_total {money_type} NOT NULL DEFAULT 0,
+        PRIMARY KEY (destino, pago)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute(f"""
+    CREATE TABLE resumo_dia (
+        dia TEXT NOT NULL,
+        pago INTEGER NOT NULL,
+        itens INTEGER NOT NULL DEFAULT 0,
+        quantidade INTEGER NOT NULL DEFAULT 0,
+        valor_total {money_type} NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, pago)
+    ) WITHOUT ROWID
+    """)
+    for table, key in (("resumo_destino", "destino"), ("resumo_dia", "dia")):
+        add, subtract = _summary_trigger_bodies(table, key)
+        cursor.execute(f"CREATE TRIGGER {table}_ai AFTER INSERT ON itens BEGIN {add} END")
+        cursor.execute(f"CREATE TRIGGER {table}_ad AFTER DELETE ON itens BEGIN {subtract} END")
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_au
+            AFTER UPDATE OF {watched_columns} ON itens
+            BEGIN {subtract} {add} END""")
+    cursor.execute("""
+        INSERT INTO resumo_destino (destino, pago, itens, quantidade, valor_total)
+        SELECT COALESCE(destino, ''), pago, COUNT(*), COALESCE(SUM(quantidade), 0), COALESCE(SUM(valor_total), 0)
+        FROM itens GROUP BY COALESCE(destino, ''), pago""")
+    cursor.execute("""
+        INSERT INTO resumo_dia (dia, pago, itens, quantidade, valor_total)
+        SELECT COALESCE(date(criado_em), ''), pago, COUNT(*), COALESCE(SUM(quantidade), 0),
+               COALESCE(SUM(valor_total), 0)
+        FROM itens GROUP BY COALESCE(date(criado_em), ''), pago""")
+
+
+@migration(3)
+def add_summary_tables(cursor: sqlite3.Cursor) -> None:
+    # Running totals per (destino, pago) and per (day, pago), kept current by
+    # triggers so summary queries read a few hundred rows instead of itens.
+    _create_summary_tables(cursor, "REAL", "quantidade, destino, valor_total, pago, criado_em")
+
+
+def _create_fts_triggers(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("""
+    CREATE TRIGGER itens_fts_ai AFTER INSERT ON itens BEGIN
+        INSERT INTO itens_fts (rowid, descricao, destino) VALUES (NEW.id, NEW.descricao, NEW.destino);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER itens_fts_ad AFTER DELETE ON itens BEGIN
+        INSERT INTO itens_fts (itens_fts, rowid, descricao, destino)
+        VALUES ('delete', OLD.id, OLD.descricao, OLD.destino);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER itens_fts_au AFTER UPDATE OF descricao, destino ON itens BEGIN
+        INSERT INTO itens_fts (itens_fts, rowid, descricao, destino)
+        VALUES ('delete', OLD.id, OLD.descricao, OLD.destino);
+        INSERT INTO itens_fts (rowid, descricao, destino) VALUES (NEW.id, NEW.descricao, NEW.destino);
+    END
+    """)
+
+
+@migration(4)
+def add_full_text_search(cursor: sqlite3.Cursor) -> None:
+    # External-content FTS5 index over itens: the text is stored once, in itens.
+    # prefix='2 3' keeps short search-as-you-type prefixes on an index lookup.
+    cursor.execute("""
+    CREATE VIRTUAL TABLE itens_fts USING fts5(
+        descricao, destino,
+        content='itens', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """)
+    _create_fts_triggers(cursor)
+    cursor.execute("INSERT INTO itens_fts (itens_fts) VALUES ('rebuild')")
+
+
+@migration(5)
+def store_money_as_cents(cursor: sqlite3.Cursor) -> None:
+    # REAL columns drift when summed and cannot hold integers (REAL affinity
+    # turns them back into floats), so itens is rebuilt with INTEGER centavos.
+    # valor_total becomes a stored generated column: it is never computed in Python.
+    cursor.execute("""
+    CREATE TABLE itens_novo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quantidade INTEGER,
+        descricao TEXT,
+        destino TEXT,
+        valor_unitario INTEGER NOT NULL DEFAULT 0,
+        valor_total INTEGER GENERATED ALWAYS AS (quantidade * valor_unitario) STORED,
+        pago INTEGER DEFAULT 0,
+        criado_em TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+        INSERT INTO itens_novo (id, quantidade, descricao, destino, valor_unitario, pago, criado_em)
+        SELECT id, quantidade, descricao, destino, CAST(ROUND(COALESCE(valor_unitario, 0) * 100) AS INTEGER),
+               pago, criado_em
+        FROM itens""")
+    # Dropping itens also drops its index and triggers; they are recreated below.
+    cursor.execute("DROP TABLE resumo_destino")
+    cursor.execute("DROP TABLE resumo_dia")
+    cursor.execute("DROP TABLE itens")
+    cursor.execute("ALTER TABLE itens_novo RENAME TO itens")
+    cursor.execute("CREATE INDEX idx_itens_pago_criado_em ON itens (pago, criado_em)")
+    _create_summary_tables(cursor, "INTEGER", "quantidade, destino, valor_unitario, pago, criado_em")
+    # Row ids and texts are unchanged, so itens_fts stays valid; only its triggers went away.
+    _create_fts_triggers(cursor)
+    cursor.execute("ANALYZE itens")
+
+
+@migration(6)
+def add_import_checkpoints(cursor: sqlite3.Cursor) -> None:
+    # One row per imported file. linha is updated in the same transaction as
+    # each chunk it covers, so an interrupted import resumes exactly after the
+    # last committed chunk.
+    cursor.execute("""
+    CREATE TABLE importacoes (
+        arquivo TEXT PRIMARY KEY,
+        assinatura TEXT NOT NULL,
+        linha INTEGER NOT NULL DEFAULT 0,
+        importadas INTEGER NOT NULL DEFAULT 0,
+        rejeitadas INTEGER NOT NULL DEFAULT 0,
+        concluida INTEGER NOT NULL DEFAULT 0,
+        atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+@migration(7)
+def single_company_row(cursor: sqlite3.Cursor) -> None:
+    # Every save used to append a row and readers took the newest one. Keep
+    # only that row, as id 1, which save_company_config now upserts.
+    cursor.execute("DELETE FROM configuracao_empresa WHERE id < (SELECT MAX(id) FROM configuracao_empresa)")
+    cursor.execute("UPDATE configuracao_empresa SET id = 1")
+
+
+@migration(8)
+def add_versions_and_change_log(cursor: sqlite3.Cursor) -> None:
+    # versao is compared and bumped by update_item (optimistic locking), so an
+    # edit based on a stale read fails instead of overwriting a newer change.
+    cursor.execute("ALTER TABLE itens ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+    # One row per write to itens, kept by triggers whatever the writer, so other
+    # windows can poll for what changed since the last alteracoes id they saw.
+    cursor.execute("""
+    CREATE TABLE alteracoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER NOT NULL,
+        operacao TEXT NOT NULL,
+        em TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    for suffix, event, operacao, row in (("ai", "INSERT", "I", "NEW"), ("au", "UPDATE", "U", "NEW"),
+                                         ("ad", "DELETE", "D", "OLD")):
+        cursor.execute(f"""
+        CREATE TRIGGER alteracoes_{suffix} AFTER {event} ON itens BEGIN
+            INSERT INTO alteracoes (item_id, operacao) VALUES ({row}.id, '{operacao}');
+        END
+        """)
+
+
+@migration(9)
+def index_sortable_columns(cursor: sqlite3.Cursor) -> None:
+    # One index per sort key of database.ItemQuery, after the pago equality:
+    # (destino, criado_em) also serves "destino = ?" filters sorted by date.
+    cursor.execute("CREATE INDEX idx_itens_pago_destino ON itens (pago, destino, criado_em)")
+    cursor.execute("CREATE INDEX idx_itens_pago_valor_total ON itens (pago, valor_total)")
+    cursor.execute("ANALYZE itens")
+
+
+@migration(10)
+def add_archive(cursor: sqlite3.Cursor) -> None:
+    # Old paid items are moved here by database.archive_paid_items, keeping
+    # itens and its indexes small. Same columns and ids; only pago = 1 rows.
+    cursor.execute("""
+    CREATE TABLE itens_arquivo (
+        id INTEGER PRIMARY KEY,
+        quantidade INTEGER,
+        descricao TEXT,
+        destino TEXT,
+        valor_unitario INTEGER NOT NULL DEFAULT 0,
+        valor_total INTEGER GENERATED ALWAYS AS (quantidade * valor_unitario) STORED,
+        pago INTEGER DEFAULT 1,
+        criado_em TEXT,
+        versao INTEGER NOT NULL DEFAULT 1
+    )
+    """)
+    # Same indexes as itens, so ORDER BY ... LIMIT over the view below merges
+    # two index scans instead of sorting.
+    cursor.execute("CREATE INDEX idx_itens_arquivo_pago_criado_em ON itens_arquivo (pago, criado_em)")
+    cursor.execute("CREATE INDEX idx_itens_arquivo_pago_destino ON itens_arquivo (pago, destino, criado_em)")
+    cursor.execute("CREATE INDEX idx_itens_arquivo_pago_valor_total ON itens_arquivo (pago, valor_total)")
+    # Readers query itens_todos; WHERE terms are pushed into both arms.
+    columns = "id, quantidade, descricao, destino, valor_unitario, valor_total, criado_em, pago, versao"
+    cursor.execute(f"""
+    CREATE VIEW itens_todos AS
+    SELECT {columns} FROM itens
+    UNION ALL
+    SELECT {columns} FROM itens_arquivo
+    """)
+    # Archived rows keep counting in the summaries: a move adds to them on one
+    # side and subtracts on the other.
+    for table, key in (("resumo_destino", "destino"), ("resumo_dia", "dia")):
+        add, subtract = _summary_trigger_bodies(table, key)
+        cursor.execute(f"CREATE TRIGGER {table}_arquivo_ai AFTER INSERT ON itens_arquivo BEGIN {add} END")
+        cursor.execute(f"CREATE TRIGGER {table}_arquivo_ad AFTER DELETE ON itens_arquivo BEGIN {subtract} END")
+    cursor.execute("""
+    CREATE VIRTUAL TABLE itens_arquivo_fts USING fts5(
+        descricao, destino,
+        content='itens_arquivo', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """)
+    cursor.execute("""
+    CREATE TRIGGER itens_arquivo_fts_ai AFTER INSERT ON itens_arquivo BEGIN
+        INSERT INTO itens_arquivo_fts (rowid, descricao, destino) VALUES (NEW.id, NEW.descricao, NEW.destino);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER itens_arquivo_fts_ad AFTER DELETE ON itens_arquivo BEGIN
+        INSERT INTO itens_arquivo_fts (itens_arquivo_fts, rowid, descricao, destino)
+        VALUES ('delete', OLD.id, OLD.descricao, OLD.destino);
+    END
+    """)
+    # Moving a row between the two tables (the copy is written first) is not
+    # a change for the change feed; deleting it from either one is.
+    cursor.execute("DROP TRIGGER alteracoes_ad")
+    cursor.execute("""
+    CREATE TRIGGER alteracoes_ad AFTER DELETE ON itens
+    WHEN NOT EXISTS (SELECT 1 FROM itens_arquivo WHERE id = OLD.id) BEGIN
+        INSERT INTO alteracoes (item_id, operacao) VALUES (OLD.id, 'D');
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER alteracoes_arquivo_ad AFTER DELETE ON itens_arquivo
+    WHEN NOT EXISTS (SELECT 1 FROM itens WHERE id = OLD.id) BEGIN
+        INSERT INTO alteracoes (item_id, operacao) VALUES (OLD.id, 'D');
+    END
+    """)
+    # Last run of each manutencao.py task, for its schedule.
+    cursor.execute("""
+    CREATE TABLE manutencao (
+        tarefa TEXT PRIMARY KEY,
+        executada_em TEXT NOT NULL
+    )
+    """)
+
+
+@migration(11)
+def add_audit_log(cursor: sqlite3.Cursor) -> None:
+    # Append-only history of itens: one row per create/update/payment/delete
+    # with the item's state after it (before it, for excluido), written by
+    # triggers inside the writing transaction. usuario_atual() is registered
+    # on every connection by db_pool; a connection without it cannot write itens.
+    cursor.execute("""
+    CREATE TABLE eventos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item_id INTEGER NOT NULL,
+        tipo TEXT NOT NULL,
+        em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        usuario TEXT,
+        quantidade INTEGER,
+        descricao TEXT,
+        destino TEXT,
+        valor_unitario INTEGER,
+        pago INTEGER,
+        criado_em TEXT,
+        versao INTEGER
+    )
+    """)
+    cursor.execute("CREATE INDEX idx_eventos_item ON eventos (item_id)")
+    # Full state of every item as of event ate_evento: the state at a date is
+    # the newest snapshot before it plus the events that follow, so rebuilding
+    # it never replays more than one snapshot period.
+    cursor.execute("""
+    CREATE TABLE instantaneos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ate_evento INTEGER NOT NULL,
+        em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE instantaneo_itens (
+        instantaneo_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        quantidade INTEGER,
+        descricao TEXT,
+        destino TEXT,
+        valor_unitario INTEGER,
+        pago INTEGER,
+        criado_em TEXT,
+        versao INTEGER,
+        PRIMARY KEY (instantaneo_id, item_id)
+    ) WITHOUT ROWID
+    """)
+    state = "quantidade, descricao, destino, valor_unitario, pago, criado_em, versao"
+    # Moves to and from itens_arquivo (the copy exists first) are not events.
+    for suffix, event, table, row, tipo, moved_to in (
+        ("ai", "INSERT", "itens", "NEW", "'criado'", "itens_arquivo"),
+        ("au", "UPDATE", "itens", "NEW",
+         "CASE WHEN NEW.pago IS OLD.pago THEN 'alterado' WHEN NEW.pago = 1 THEN 'pago' ELSE 'estornado' END", None),
+        ("ad", "DELETE", "itens", "OLD", "'excluido'", "itens_arquivo"),
+        ("arquivo_ad", "DELETE", "itens_arquivo", "OLD", "'excluido'", "itens"),
+    ):
+        when = f"WHEN NOT EXISTS (SELECT 1 FROM {moved_to} WHERE id = {row}.id)" if moved_to else ""
+        values = ", ".join(f"{row}.{column}" for column in state.split(", "))
+        cursor.execute(f"""
+        CREATE TRIGGER eventos_{suffix} AFTER {event} ON {table} {when} BEGIN
+            INSERT INTO eventos (item_id, tipo, usuario, {state})
+            VALUES ({row}.id, {tipo}, usuario_atual(), {values});
+        END
+        """)
+    # Events are never changed; they are only deleted by compaction, once a
+    # snapshot covers them.
+    cursor.execute("""
+    CREATE TRIGGER eventos_somente_insercao BEFORE UPDATE ON eventos BEGIN
+        SELECT RAISE(ABORT, 'eventos is append-only');
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER eventos_compactacao BEFORE DELETE ON eventos
+    WHEN OLD.id > (SELECT COALESCE(MAX(ate_evento), 0) FROM instantaneos) BEGIN
+        SELECT RAISE(ABORT, 'only events covered by a snapshot can be deleted');
+    END
+    """)
+    # Baseline: items written before the log existed start from this snapshot.
+    snapshot_id = cursor.execute("INSERT INTO instantaneos (ate_evento) VALUES (0) RETURNING id").fetchone()[0]
+    for table in ("itens", "itens_arquivo"):
+        cursor.execute(f"""
+            INSERT INTO instantaneo_itens (instantaneo_id, item_id, {state})
+            SELECT ?, id, {state} FROM {table}""", (snapshot_id,))
+
+
+@migration(12)
+def add_suggestions(cursor: sqlite3.Cursor) -> None:
+    # Each distinct descricao and destino with the number of items using it,
+    # for the autocomplete in CadastroItemDialog (sugestoes.py). Archived rows
+    # keep counting: a move adds on one side and subtracts on the other.
+    cursor.execute("""
+    CREATE TABLE sugestoes (
+        campo TEXT NOT NULL,
+        valor TEXT NOT NULL,
+        usos INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (campo, valor)
+    ) WITHOUT ROWID
+    """)
+    for campo in ("descricao", "destino"):
+        add = f"""
+            INSERT INTO sugestoes (campo, valor, usos)
+            SELECT '{campo}', NEW.{campo}, 1 WHERE NEW.{campo} <> ''
+            ON CONFLICT (campo, valor) DO UPDATE SET usos = usos + 1;"""
+        subtract = f"""
+            UPDATE sugestoes SET usos = usos - 1 WHERE campo = '{campo}' AND valor = OLD.{campo};
+            DELETE FROM sugestoes WHERE campo = '{campo}' AND valor = OLD.{campo} AND usos <= 0;"""
+        for table, prefix in (("itens", f"sugestoes_{campo}"), ("itens_arquivo", f"sugestoes_{campo}_arquivo")):
+            cursor.execute(f"CREATE TRIGGER {prefix}_ai AFTER INSERT ON {table} BEGIN {add} END")
+            cursor.execute(f"CREATE TRIGGER {prefix}_ad AFTER DELETE ON {table} BEGIN {subtract} END")
+        cursor.execute(f"""
+            CREATE TRIGGER sugestoes_{campo}_au AFTER UPDATE OF {campo} ON itens
+            WHEN OLD.{campo} IS NOT NEW.{campo}
+            BEGIN {subtract} {add} END""")
+        cursor.execute(f"""
+            INSERT INTO sugestoes (campo, valor, usos)
+            SELECT '{campo}', {campo}, COUNT(*) FROM itens_todos WHERE {campo} <> '' GROUP BY {campo}""")
+
+
+@migration(13)
+def add_snapshot_progress(cursor: sqlite3.Cursor) -> None:
+    # take_snapshot copies items in batches, one transaction each. Until the
+    # last one, inicio_evento holds the last event when copying started and
+    # readers skip the snapshot; ate_evento stays 0, so compaction cannot
+    # count on it either.
+    cursor.execute("ALTER TABLE instantaneos ADD COLUMN inicio_evento INTEGER")
+
+
+@migration(14)
+def skip_restores_in_changes(cursor: sqlite3.Cursor) -> None:
+    # Migration 10 left out the insert side: restoring an archived row (copied
+    # into itens before it leaves itens_arquivo) logged an 'I'.
+    cursor.execute("DROP TRIGGER alteracoes_ai")
+    cursor.execute("""
+    CREATE TRIGGER alteracoes_ai AFTER INSERT ON itens
+    WHEN NOT EXISTS (SELECT 1 FROM itens_arquivo WHERE id = NEW.id) BEGIN
+        INSERT INTO alteracoes (item_id, operacao) VALUES (NEW.id, 'I');
+    END
+    """)
@@ -1,5 +1,80 @@
+import re
+import sys
+from array import array
 from dataclasses import dataclass, field
-from typing import Optional
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Iterator, List, Optional, Sequence
+
+
+# Money text accepted by CadastroItemDialog, imports and Money.parse: pt_BR
+# with thousands grouping ("1.234,56") or a plain number with a single
+# decimal separator ("1234,56", "10.5"). Anything else ("1,234.56",
+# "12.345.6") is ambiguous and rejected. The API takes the pt_BR forms only.
+MONEY_PTBR_PATTERN = r"\d{1,3}(\.\d{3})*(,\d{1,2})?|\d+(,\d{1,2})?"
+MONEY_PATTERN = MONEY_PTBR_PATTERN + r"|\d+\.\d{1,2}"
+_MONEY_PTBR = re.compile(MONEY_PTBR_PATTERN)
+_MONEY = re.compile(MONEY_PATTERN)
+
+
+class Money(int):
+    """Exact amount in integer centavos.
+
+    Stored as INTEGER in SQLite as-is (it is an int). Adding or subtracting
+    Money and multiplying by an integer quantity stay exact and return Money.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text: str, dot_decimal: bool = True) -> "Money":
+        """Parses "1.234,56", "R$ 10,5", "10" or (with ``dot_decimal``) "10.50" into centavos.
+
+        Raises ValueError for text outside MONEY_PATTERN (MONEY_PTBR_PATTERN
+        without ``dot_decimal``) instead of guessing what was meant.
+        """
+        cleaned = text.replace("R$", "").replace("\xa0", "").replace(" ", "")
+        digits = cleaned[1:] if cleaned.startswith("-") else cleaned
+        if not (_MONEY if dot_decimal else _MONEY_PTBR).fullmatch(digits):
+            raise ValueError(f"Valor inválido: {text!r} (use o formato 1.234,56)")
+        if "," in digits or not re.fullmatch(r"\d+\.\d{1,2}", digits):
+            cleaned = cleaned.replace(".", "").replace(",", ".")  # pt_BR: "." groups thousands
+        return cls(int((Decimal(cleaned) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+
+    @classmethod
+    def from_reais(cls, value: float | Decimal | str) -> "Money":
+        """Converts an amount in reais, rounding half up to the centavo."""
+        return cls(int((Decimal(str(value)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+
+    @property
+    def reais(self) -> Decimal:
+        return Decimal(int(self)).scaleb(-2)
+
+    def __add__(self, other: int) -> "Money":
+        if not isinstance(other, int):
+            raise TypeError("Money can only be added to Money or integer centavos")
+        return Money(int(self) + int(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other: int) -> "Money":
+        if not isinstance(other, int):
+            raise TypeError("Money can only be subtracted from Money or integer centavos")
+        return Money(int(self) - int(other))
+
+    def __mul__(self, quantity: int) -> "Money":
+        if not isinstance(quantity, int):
+            raise TypeError("Money can only be multiplied by an integer quantity")
+        return Money(int(self) * quantity)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Money":
+        return Money(-int(self))
+
+    def __repr__(self) -> str:
+        return f"Money({int(self)})"
+
+    __str__ = int.__repr__
+
 
 @dataclass
 class Company:
@@ -9,13 +84,155 @@ class Company:
     telefone: str = ""
     id: Optional[int] = None  # Assuming ID can be None when creating a new company
 
-@dataclass
+@dataclass(slots=True)  # No per-instance __dict__: large listings hold many of these
 class Item:
     quantidade: int = 0
     descricao: str = ""
     destino: str = ""
-    valor_unitario: float = 0.0
-    valor_total: float = 0.0
+    valor_unitario: Money = Money(0)  # Centavos
+    valor_total: Money = Money(0)  # Centavos; computed by SQLite (quantidade * valor_unitario)
     id: Optional[int] = None  # Assuming ID can be None when creating a new item
     pago: int = 0  # Default value for payment status
-    criado_em: Optional[str] = None  # Assuming creation date can be None initially
\ No newline at end of file
+    criado_em: Optional[str] = None  # Assuming creation date can be None initially
+    versao: int = 1  # Row version for optimistic locking; bumped by every update
+
+def parse_item(quantidade: Any, descricao: Any, destino: Any, valor_unitario: Any,
+               dot_decimal: bool = True) -> Item:
+    """Validates raw form/file fields and builds an Item; raises ValueError.
+
+    The same rules as CadastroItemDialog: integer quantity from 1 to 9999,
+    non-empty descricao and destino, money text in MONEY_PATTERN (see
+    Money.parse for ``dot_decimal``). Numeric cells (from spreadsheets) are
+    accepted for quantity and value as well; a numeric quantity must be a
+    whole number (3.0 from a spreadsheet is 3).
+    """
+    try:
+        if isinstance(quantidade, (int, float, Decimal)) and not isinstance(quantidade, bool):
+            if quantidade != int(quantidade):
+                raise ValueError
+            quantidade = int(quantidade)
+        else:
+            quantidade = int(str(quantidade).strip())
+    except (ValueError, OverflowError):
+        raise ValueError(f"Quantidade inválida: {quantidade!r}") from None
+    if not 1 <= quantidade <= 9999:
+        raise ValueError(f"Quantidade fora do intervalo (1 a 9999): {quantidade}")
+    descricao = str(descricao or "").strip()
+    destino = str(destino or "").strip()
+    if not descricao or not destino:
+        raise ValueError("Preencha todos os campos.")
+    if isinstance(valor_unitario, (int, float, Decimal)) and not isinstance(valor_unitario, bool):
+        valor = Money.from_reais(valor_unitario)
+    else:
+        valor = Money.parse(str(valor_unitario or ""), dot_decimal)
+    if valor < 0:
+        raise ValueError(f"Valor negativo: {valor_unitario!r}")
+    return Item(quantidade=quantidade, descricao=descricao, destino=destino, valor_unitario=valor)
+
+@dataclass
+class ChunkError:
+    chunk: int  # Index of the failed chunk
+    start: int  # Position of the chunk's first row in the input
+    size: int
+    error: str
+
+@dataclass
+class BatchResult:
+    rows: int = 0  # Rows written successfully
+    ids: list[int] = field(default_factory=list)  # New ids, in input order (inserts only)
+    errors: list[ChunkError] = field(default_factory=list)
+
+@dataclass
+class ChangeSet:
+    """Item changes made through other connections, read from the alteracoes log."""
+    last_id: int  # Highest alteracoes id covered; pass it to the next get_changes call
+    data_version: int  # PRAGMA data_version of the polling connection
+    items: list[Item] = field(default_factory=list)  # Current rows of inserted/updated items
+    deleted_ids: list[int] = field(default_factory=list)
+    reload: bool = False  # Too many changes, or the log was pruned past last_id: reload instead
+
+@dataclass
+class ItemEvent:
+    """One entry of an item's history, from the eventos audit log."""
+    id: int  # 0 for the starting state taken from a snapshot
+    tipo: str  # inicial, criado, alterado, pago, estornado or excluido
+    em: str
+    usuario: Optional[str]
+    item: Item  # State after the event (before it, for excluido)
+
+@dataclass
+class Total:
+    chave: str  # destino, day (YYYY-MM-DD) or month (YYYY-MM), depending on the grouping
+    pago: int
+    itens: int = 0
+    quantidade: int = 0
+    valor_total: Money = Money(0)
+
+
+class ItemBatch:
+    """Column-oriented container for many items.
+
+    Numbers live in compact ``array`` columns (8 bytes per value instead of
+    a boxed int), repeated destino strings are interned and shared, and no
+    Item object exists until one is asked for by index or iteration.
+    """
+
+    __slots__ = ("ids", "quantidades", "valores_unitarios", "valores_totais", "pagos",
+                 "descricoes", "destinos", "criados_em", "versoes")
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.quantidades = array("q")
+        self.valores_unitarios = array("q")  # Centavos
+        self.valores_totais = array("q")  # Centavos
+        self.pagos = array("b")
+        self.descricoes: List[str] = []
+        self.destinos: List[str] = []
+        self.criados_em: List[Optional[str]] = []
+        self.versoes = array("q")
+
+    def append_row(self, row: Sequence[Any]) -> None:
+        """Appends a row in database.ITEM_COLUMNS order."""
+        self.ids.append(row[0])
+        self.quantidades.append(row[1] or 0)
+        self.descricoes.append(row[2] or "")
+        self.destinos.append(sys.intern(row[3] or ""))
+        self.valores_unitarios.append(row[4] or 0)
+        self.valores_totais.append(row[5] or 0)
+        self.criados_em.append(row[6])
+        self.pagos.append(row[7] or 0)
+        self.versoes.append(row[8])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> Item:
+        return Item(
+            id=self.ids[index],
+            quantidade=self.quantidades[index],
+            descricao=self.descricoes[index],
+            destino=self.destinos[index],
+            valor_unitario=Money(self.valores_unitarios[index]),
+            valor_total=Money(self.valores_totais[index]),
+            pago=self.pagos[index],
+            criado_em=self.criados_em[index],
+            versao=self.versoes[index],
+        )
+
+    def __iter__(self) -> Iterator[Item]:
+        return (self[index] for index in range(len(self)))
+
+    def total(self) -> Money:
+        return Money(sum(self.valores_totais))
+
+    def to_numpy(self) -> dict:
+        """Zero-copy NumPy views of the numeric columns (requires numpy)."""
+        import numpy as np
+
+        return {
+            "id": np.frombuffer(self.ids, dtype=np.int64),
+            "quantidade": np.frombuffer(self.quantidades, dtype=np.int64),
+            "valor_unitario": np.frombuffer(self.valores_unitarios, dtype=np.int64),
+            "valor_total": np.frombuffer(self.valores_totais, dtype=np.int64),
+            "pago": np.frombuffer(self.pagos, dtype=np.int8),
+        }
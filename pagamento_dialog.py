@@ -0,0 +1,85 @@
+from typing import List, Optional
+
+from PySide6.QtCore import QDate
+from PySide6.QtWidgets import (
+    QComboBox, QDateEdit, QDialog, QHBoxLayout, QLabel, QMessageBox, QPushButton, QVBoxLayout, QWidget
+)
+
+from database import get_totals_by_destino, mark_paid_by_filter
+from db_worker import get_worker
+from formatting import format_money
+from models import Total
+
+TODOS_DESTINOS = "Todos os destinos"
+
+
+class PagamentoFiltroDialog(QDialog):
+    """Lança pago (ou estorna, com pago=0) todos os itens de um destino e período."""
+
+    def __init__(self, parent: Optional[QWidget] = None, pago: int = 1) -> None:
+        super().__init__(parent)
+        self.pago = pago
+        self.ids_alterados: List[int] = []  # Preenchido em concluido()
+        self.setWindowTitle("Lançar Pago por Filtro" if pago else "Estornar Pagamento por Filtro")
+        self.setMinimumWidth(400)
+
+        self.layout: QVBoxLayout = QVBoxLayout()
+
+        self.destino_input = QComboBox()
+        self.destino_input.addItem(TODOS_DESTINOS, None)
+
+        hoje = QDate.currentDate()
+        self.inicio_input = QDateEdit(QDate(hoje.year(), hoje.month(), 1))
+        self.inicio_input.setCalendarPopup(True)
+        self.inicio_input.setDisplayFormat("dd/MM/yyyy")
+        self.fim_input = QDateEdit(hoje)
+        self.fim_input.setCalendarPopup(True)
+        self.fim_input.setDisplayFormat("dd/MM/yyyy")
+
+        self.layout.addWidget(QLabel("Destino:"))
+        self.layout.addWidget(self.destino_input)
+        self.layout.addWidget(QLabel("Criados de:"))
+        self.layout.addWidget(self.inicio_input)
+        self.layout.addWidget(QLabel("Até (inclusive):"))
+        self.layout.addWidget(self.fim_input)
+
+        btn_layout = QHBoxLayout()
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.clicked.connect(self.reject)
+        self.btn_confirmar = QPushButton("Lançar Pago" if pago else "Estornar")
+        self.btn_confirmar.clicked.connect(self.confirmar)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.btn_cancelar)
+        btn_layout.addWidget(self.btn_confirmar)
+        self.layout.addLayout(btn_layout)
+        self.setLayout(self.layout)
+
+        # Destinos com itens no status de origem, lidos do resumo mantido por triggers
+        get_worker().submit(get_totals_by_destino, 1 - pago, on_result=self.exibir_destinos)
+
+    def exibir_destinos(self, destinos: List[Total]) -> None:
+        for total in destinos:
+            self.destino_input.addItem(
+                f"{total.chave or '(sem destino)'} - {total.itens} itens, {format_money(total.valor_total)}",
+                total.chave)
+
+    def confirmar(self) -> None:
+        if self.inicio_input.date() > self.fim_input.date():
+            QMessageBox.warning(self, "Aviso", "A data inicial é posterior à data final.")
+            return
+        inicio = self.inicio_input.date().toString("yyyy-MM-dd")
+        # criado_em guarda data e hora: o limite é o início do dia seguinte
+        fim = self.fim_input.date().addDays(1).toString("yyyy-MM-dd")
+        self.btn_confirmar.setEnabled(False)
+        get_worker().submit(mark_paid_by_filter, self.destino_input.currentData(), inicio, fim, self.pago,
+                            on_result=self.concluido, on_error=self.erro)
+
+    def concluido(self, ids: List[int]) -> None:
+        self.ids_alterados = ids
+        self.btn_confirmar.setEnabled(True)
+        QMessageBox.information(self, "Sucesso", f"{len(ids)} itens atualizados.")
+        self.accept()
+
+    def erro(self, e: Exception) -> None:
+        self.btn_confirmar.setEnabled(True)
+        QMessageBox.warning(self, "Erro", f"Erro ao atualizar itens: {e}")
@@ -0,0 +1,56 @@
+from datetime import date
+from typing import List, Tuple
+
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QWidget
+
+from database import get_totals_by_destino, get_totals_by_period, get_totals_by_status
+from db_worker import get_worker
+from formatting import format_money
+from models import Money, Total
+
+TOP_DESTINOS = 5
+
+
+def carregar_resumo() -> Tuple[List[Total], List[Total], List[Total]]:
+    """Runs on the DB worker: every figure comes from the resumo_* tables."""
+    mes = date.today().strftime("%Y-%m")
+    return (
+        get_totals_by_status(),
+        get_totals_by_period("month", paid=0, start=mes),
+        get_totals_by_destino(paid=0, limit=TOP_DESTINOS),
+    )
+
+
+class ResumoPanel(QFrame):
+    """Totais em aberto/pagos, do mês e por destino, exibidos acima da tabela."""
+
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.setFrameShape(QFrame.StyledPanel)
+
+        self.em_aberto = QLabel("Em aberto: -")
+        self.pago = QLabel("Pago: -")
+        self.mes = QLabel("No mês: -")
+        self.destinos = QLabel("")
+        self.destinos.setWordWrap(True)
+
+        layout = QHBoxLayout()
+        for label in (self.em_aberto, self.pago, self.mes):
+            layout.addWidget(label)
+        layout.addWidget(self.destinos, 1)
+        self.setLayout(layout)
+
+    def atualizar(self) -> None:
+        get_worker().submit(carregar_resumo, key="resumo", on_result=self.exibir)
+
+    def exibir(self, resumo: Tuple[List[Total], List[Total], List[Total]]) -> None:
+        por_status, mes, destinos = resumo
+        status = {total.pago: total for total in por_status}
+        aberto = status.get(0, Total("0", 0))
+        pago = status.get(1, Total("1", 1))
+        self.em_aberto.setText(f"Em aberto: {format_money(aberto.valor_total)} ({aberto.itens} itens)")
+        self.pago.setText(f"Pago: {format_money(pago.valor_total)} ({pago.itens} itens)")
+        no_mes = mes[0].valor_total if mes else Money(0)
+        self.mes.setText(f"Em aberto no mês: {format_money(no_mes)}")
+        self.destinos.setText("  |  ".join(
+            f"{total.chave}: {format_money(total.valor_total)}" for total in destinos))
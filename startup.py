@@ -0,0 +1,90 @@
+"""Application startup: phase timings, locale setup and the first-page snapshot.
+
+main.py imports this module first, so the clock starts before PySide6 and the
+rest of the application are imported. Only the standard library is imported
+at module level.
+
+The snapshot is a small JSON file with the company header and the first page
+of open items as last shown. The window paints it before the database is
+touched; the live rows replace it once the deferred schema check is done.
+"""
+import json
+import locale
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_START = time.perf_counter()
+
+SNAPSHOT_VERSION = 2  # 2: rows carry versao
+
+
+class StartupProfile:
+    """Records named phases as milliseconds since startup."""
+
+    def __init__(self, start: float = _START) -> None:
+        self.start = start
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> float:
+        elapsed = (time.perf_counter() - self.start) * 1000
+        self.phases.append((phase, elapsed))
+        return elapsed
+
+    def elapsed(self, phase: str) -> Optional[float]:
+        return next((ms for name, ms in self.phases if name == phase), None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"phases": [{"phase": name, "ms": round(ms, 2)} for name, ms in self.phases],
+                "first_paint_ms": self.elapsed("first paint")}
+
+    def report(self) -> str:
+        lines = ["Startup profile (ms since start)"]
+        previous = 0.0
+        for name, ms in self.phases:
+            lines.append(f"  {name:<24} {ms:9.1f}  (+{ms - previous:.1f})")
+            previous = ms
+        return "\n".join(lines)
+
+
+PROFILE = StartupProfile()
+
+
+def configure_locale(name: str = "pt_BR") -> str:
+    """Selects ``name`` for LC_ALL, falling back to the user's default locale."""
+    for candidate in (name, f"{name}.UTF-8", ""):
+        try:
+            return locale.setlocale(locale.LC_ALL, candidate)
+        except locale.Error:
+            continue
+    return locale.setlocale(locale.LC_ALL)
+
+
+def snapshot_path(db_file: str) -> str:
+    return f"{db_file}.inicio.json"
+
+
+def load_snapshot(db_file: str) -> Optional[Dict[str, Any]]:
+    """Returns the saved snapshot, or None if it is missing, unreadable or outdated."""
+    try:
+        with open(snapshot_path(db_file), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("versao") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def save_snapshot(db_file: str, empresa: Optional[Dict[str, Any]], rows: List[tuple]) -> None:
+    """Writes the snapshot atomically; ``rows`` are in database.ITEM_COLUMNS order."""
+    path = snapshot_path(db_file)
+    temporary = f"{path}.tmp"
+    try:
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"versao": SNAPSHOT_VERSION, "empresa": empresa, "itens": rows}, f)
+        os.replace(temporary, path)
+    except OSError as e:
+        # Only a cache: the next start just reads the database instead.
+        print(f"Could not save startup snapshot: {e}", file=sys.stderr)
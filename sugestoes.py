@@ -0,0 +1,188 @@
+"""Autocomplete for descricao and destino, ranked by how many items use each value.
+
+The sugestoes table (migration 12) keeps every distinct value with its item
+count, updated by triggers. The first CadastroItemDialog opened loads it, on
+the DbWorker thread, into a PrefixIndex per field. Items saved from this
+window bump the counts in memory. Changes made elsewhere show up in the next
+session.
+
+PrefixIndex keeps the values sorted by their normalized text (lower case, no
+accents), so a prefix is a bisect away. For prefixes matching more than
+WIDE_PREFIX values, the top suggestions are kept ready. Any other lookup
+ranks at most WIDE_PREFIX values, so it costs well under a millisecond
+whatever the number of values.
+"""
+import heapq
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from PySide6.QtCore import QStringListModel, Qt
+from PySide6.QtWidgets import QCompleter, QLineEdit
+
+import database
+from db_worker import get_worker
+from models import Item
+
+SUGGESTIONS_SHOWN = 10  # Values in the popup
+WIDE_PREFIX = 500  # Prefixes matching more values than this keep their top suggestions
+_LAST = "\U0010ffff"  # Sorts after any character that can follow a prefix
+
+
+def normalize(text: str) -> str:
+    """Lower case and without accents: "Depósito" and "depo" share a prefix."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class PrefixIndex:
+    """Distinct values of one field with their counts, searchable by prefix."""
+
+    def __init__(self, counts: Iterable[Tuple[str, int]], limit: int = SUGGESTIONS_SHOWN) -> None:
+        self.limit = limit
+        self._counts: Dict[str, int] = {}
+        for value, count in counts:
+            if count > 0:
+                self._counts[value] = count
+        entries = sorted((normalize(value), value) for value in self._counts)
+        self._keys = [key for key, _ in entries]
+        self._values = [value for _, value in entries]
+        self._top: Dict[str, List[str]] = {}  # Wide prefix -> its values, most used first
+        self._cache_wide("", 0, len(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def lookup(self, text: str) -> List[str]:
+        """The most used values starting with ``text`` (ignoring case and accents)."""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        top = self._top.get(prefix)
+        if top is None:
+            low = bisect_left(self._keys, prefix)
+            high = bisect_left(self._keys, prefix + _LAST, low)
+            top = self._rank(low, high)
+            if high - low > WIDE_PREFIX:  # Grew past the limit since loading
+                self._top[prefix] = top
+        return top[:self.limit]
+
+    def add(self, value: str) -> None:
+        """Counts one more item using ``value``."""
+        if not value:
+            return
+        count = self._counts.get(value, 0) + 1
+        self._counts[value] = count
+        key = normalize(value)
+        if count == 1:
+            position = bisect_left(self._keys, key)
+            # Same key (values differing only in case or accents): keep them ordered by value.
+            while position < len(self._keys) and self._keys[position] == key and self._values[position] < value:
+                position += 1
+            self._keys.insert(position, key)
+            self._values.insert(position, value)
+        for length in range(1, len(key) + 1):
+            top = self._top.get(key[:length])
+            if top is None:
+                continue
+            if value not in top:
+                if len(top) >= self.limit and count <= self._counts[top[-1]]:
+                    continue
+                top.append(value)
+            top.sort(key=self._counts.__getitem__, reverse=True)
+            del top[self.limit:]
+
+    def _rank(self, low: int, high: int) -> List[str]:
+        # nlargest keeps the alphabetical order among values with the same count.
+        return heapq.nlargest(self.limit, self._values[low:high], key=self._counts.__getitem__)
+
+    def _cache_wide(self, prefix: str, low: int, high: int) -> List[str]:
+        """Keeps the top values of ``prefix`` and of its wide extensions; returns the former.
+
+        A wide extension contributes its own top values instead of its whole
+        range, so every value is ranked once, at the deepest wide prefix.
+        """
+        depth = len(prefix) + 1
+        candidates: List[str] = []
+        position = low
+        while position < high:
+            key = self._keys[position]
+            if len(key) < depth:
+                candidates.append(self._values[position])
+                position += 1
+                continue
+            child = key[:depth]
+            end = bisect_left(self._keys, child + _LAST, position, high)
+            if end - position > WIDE_PREFIX:
+                candidates.extend(self._cache_wide(child, position, end))
+            else:
+                candidates.extend(self._values[position:end])
+            position = end
+        top = heapq.nlargest(self.limit, candidates, key=self._counts.__getitem__)
+        if prefix:
+            self._top[prefix] = top
+        return top
+
+
+_indexes: Dict[str, PrefixIndex] = {}
+_loading: Set[str] = set()
+
+
+def load_index(field: str) -> PrefixIndex:
+    return PrefixIndex(database.get_suggestions(field))
+
+
+def get_index(field: str) -> Optional[PrefixIndex]:
+    """The loaded index of ``field``; starts loading it on first use and returns None meanwhile."""
+    index = _indexes.get(field)
+    if index is None and field not in _loading:
+        _loading.add(field)
+
+        def loaded(index: PrefixIndex) -> None:
+            _loading.discard(field)
+            _indexes[field] = index
+
+        def failed(error: Exception) -> None:
+            _loading.discard(field)  # Tried again by the next dialog
+            print(f"Could not load suggestions for {field}: {error}")
+
+        get_worker().submit(load_index, field, quiet=True, on_result=loaded, on_error=failed)
+    return index
+
+
+def record_item(item: Item) -> None:
+    """Counts a newly saved item in the loaded indexes."""
+    for field in database.SUGGESTION_FIELDS:
+        index = _indexes.get(field)
+        if index is not None:
+            index.add(getattr(item, field))
+
+
+class SugestoesCompleter(QCompleter):
+    """Popup with the most used values starting with what was typed in ``line_edit``."""
+
+    def __init__(self, field: str, line_edit: QLineEdit) -> None:
+        super().__init__(line_edit)
+        self.field = field
+        self.sugestoes = QStringListModel(self)
+        self.setModel(self.sugestoes)
+        # A lista já vem filtrada e ordenada pelo PrefixIndex
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setMaxVisibleItems(SUGGESTIONS_SHOWN)
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.atualizar)
+        get_index(field)
+
+    def atualizar(self, texto: str) -> None:
+        index = get_index(self.field)
+        valores = index.lookup(texto) if index is not None else []
+        if valores == [texto]:
+            valores = []  # Já digitado por inteiro
+        self.sugestoes.setStringList(valores)
+        if valores:
+            self.complete()
+        else:
+            self.popup().hide()
@@ -0,0 +1,52 @@
+"""Shared fixtures: every test runs against its own copy of the database, in a temp directory."""
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import database  # noqa: E402
+from db_pool import close_pools  # noqa: E402
+
+BASELINE_DB = os.path.join(ROOT, "dados.sqlite")
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """Path of a copy of the committed dados.sqlite, not migrated yet; DB_FILE points at it."""
+    path = str(tmp_path / "dados.sqlite")
+    shutil.copy(BASELINE_DB, path)
+    previous = database.DB_FILE
+    database.DB_FILE = path
+    yield path
+    close_pools()
+    database.DB_FILE = previous
+
+
+@pytest.fixture
+def db(baseline_db):
+    """The baseline copy, migrated to the latest schema."""
+    database.init_db()
+    return baseline_db
+
+
+@pytest.fixture
+def empty_db(tmp_path):
+    """A new database with the latest schema and no items."""
+    previous = database.DB_FILE
+    database.DB_FILE = str(tmp_path / "vazio.sqlite")
+    database.init_db()
+    yield database.DB_FILE
+    close_pools()
+    database.DB_FILE = previous
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    """QCoreApplication for code that runs on the DbWorker and reports back through signals."""
+    from PySide6.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication([])
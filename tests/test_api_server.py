@@ -0,0 +1,82 @@
+import asyncio
+import json
+import threading
+
+import api_server
+import database
+from api_server import ApiServer
+from models import Item, Money
+
+
+def _request(server, method, target, body=b"", headers=""):
+    """Sends one request over a real socket; returns (status, headers, body)."""
+    async def exchange():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: teste\r\nConnection: close\r\n{headers}"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        data = await reader.read()
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return data
+
+    head, _, body = asyncio.run(exchange()).partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    response_headers = {name.lower(): value.strip() for name, _, value in (line.partition(":") for line in lines[1:])}
+    if response_headers.get("transfer-encoding") == "chunked":
+        chunks = b""
+        while True:
+            size, _, body = body.partition(b"\r\n")
+            if not int(size, 16):
+                break
+            chunks, body = chunks + body[:int(size, 16)], body[int(size, 16) + 2:]
+        body = chunks
+    return int(lines[0].split(" ")[1]), response_headers, body
+
+
+def test_unexpected_error_answers_500(db, monkeypatch):
+    def broken(items):
+        raise RuntimeError("falha inesperada")
+
+    monkeypatch.setattr(api_server, "_insert_group", broken)
+    server = ApiServer(readers=1)
+    try:
+        item = json.dumps({"quantidade": 1, "descricao": "Teste", "destino": "Obra", "valor_unitario": 1}).encode()
+        status, _, body = _request(server, "POST", "/itens", item, "Content-Type: application/json\r\n")
+        assert status == 500 and "erro" in json.loads(body)
+        assert _request(server, "GET", "/itens/busca?q=x")[0] == 200  # Still serving
+    finally:
+        server.close()
+
+
+def test_jsonl_etag_matches_streamed_rows(db, monkeypatch):
+    iter_item_rows = database.iter_item_rows
+
+    def write_meanwhile(*args):
+        # Committed from another connection after the ETag was taken, before the rows are read.
+        writer = threading.Thread(target=database.insert_item, args=(
+            Item(quantidade=1, descricao="Durante", destino="Obra", valor_unitario=Money(100)),))
+        writer.start()
+        writer.join()
+        return iter_item_rows(*args)
+
+    before = database.count_items(0)
+    etag = f'"{database.last_change_id()}"'
+    monkeypatch.setattr(database, "iter_item_rows", write_meanwhile)
+    server = ApiServer(readers=1)
+    try:
+        status, headers, body = _request(server, "GET", "/itens?formato=jsonl&pago=0")
+        assert status == 200 and headers["etag"] == etag
+        assert len(body.decode().splitlines()) == before
+
+        monkeypatch.undo()
+        status, headers, body = _request(server, "GET", "/itens?formato=jsonl&pago=0",
+                                         headers=f"If-None-Match: {etag}\r\n")
+        assert status == 200 and len(body.decode().splitlines()) == before + 1
+        status, _, body = _request(server, "GET", "/itens?formato=jsonl&pago=0",
+                                   headers=f"If-None-Match: {headers['etag']}\r\n")
+        assert status == 304 and body == b""
+    finally:
+        server.close()
@@ -0,0 +1,153 @@
+import pytest
+
+import database
+from database import ConflictError
+from models import Item, Money
+
+
+def _new_item(descricao="Parafuso", destino="Obra", quantidade=2, valor=150):
+    return database.insert_item(Item(quantidade=quantidade, descricao=descricao, destino=destino,
+                                     valor_unitario=Money(valor)))
+
+
+def _summaries():
+    conn = database.connect_db()
+    return (conn.execute("SELECT * FROM resumo_destino ORDER BY 1, 2").fetchall(),
+            conn.execute("SELECT * FROM resumo_dia ORDER BY 1, 2").fetchall())
+
+
+def _recomputed_summaries():
+    conn = database.connect_db()
+    return (
+        conn.execute("""
+            SELECT COALESCE(destino, ''), pago, COUNT(*), SUM(quantidade), SUM(valor_total)
+            FROM itens_todos GROUP BY 1, 2 ORDER BY 1, 2""").fetchall(),
+        conn.execute("""
+            SELECT COALESCE(date(criado_em), ''), pago, COUNT(*), SUM(quantidade), SUM(valor_total)
+            FROM itens_todos GROUP BY 1, 2 ORDER BY 1, 2""").fetchall(),
+    )
+
+
+def _old_paid_items(count):
+    ids = [_new_item(descricao=f"Antigo {i}", destino=f"Obra {i % 2}").id for i in range(count)]
+    database.mark_paid(ids, 1)
+    with database.transaction() as cursor:
+        cursor.executemany("UPDATE itens SET criado_em = '2020-01-0' || ? || ' 10:00:00' WHERE id = ?",
+                           [(i + 1, id) for i, id in enumerate(ids)])
+    return ids
+
+
+def test_update_with_stale_versao_conflicts(db):
+    item = _new_item()
+    item.quantidade = 3
+    updated = database.update_item(item)
+    assert updated.versao == item.versao + 1
+
+    item.quantidade = 4  # Still carries the versao read before the first update
+    with pytest.raises(ConflictError) as raised:
+        database.update_item(item)
+    assert raised.value.current == updated
+    assert database.get_item(item.id).quantidade == 3
+
+    database.delete_items([item.id])
+    with pytest.raises(ConflictError) as raised:
+        database.update_item(updated)
+    assert raised.value.current is None
+
+
+def test_changes_since_last_poll(db):
+    changes = database.get_changes()
+    assert changes.items == [] and changes.deleted_ids == []
+    kept = _new_item(descricao="Novo")
+    gone = _new_item(descricao="Excluido")
+    kept.quantidade = 5
+    kept = database.update_item(kept)
+    database.delete_items([gone.id])
+
+    changes = database.get_changes(changes.last_id)
+    assert changes.items == [kept]  # Once, with its current row
+    assert changes.deleted_ids == [gone.id]
+    assert not changes.reload
+    assert database.get_changes(changes.last_id).items == []
+
+
+def test_archive_and_restore_keep_summaries(db):
+    ids = _old_paid_items(5)
+    summaries = _summaries()
+    assert summaries == _recomputed_summaries()
+    changes = database.get_changes()
+
+    assert database.archive_paid_items(older_than_days=30, batch_size=2) == len(ids)
+    assert database.count_archived_items() == len(ids)
+    assert _summaries() == summaries
+    assert database.get_changes(changes.last_id).last_id == changes.last_id  # Moves are not changes
+    assert [database.get_item(id).pago for id in ids] == [1] * len(ids)
+
+    assert sorted(database.mark_paid(ids, 0)) == sorted(ids)
+    assert database.count_archived_items() == 0
+    assert _summaries() == _recomputed_summaries()
+    assert [item.pago for item in database.get_changes(changes.last_id).items] == [0] * len(ids)
+
+
+def test_update_restores_archived_item(db):
+    item = database.get_item(_old_paid_items(1)[0])
+    database.archive_paid_items(older_than_days=30)
+    conn = database.connect_db()
+    last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alteracoes").fetchone()[0]
+    item.quantidade = 7
+    assert database.update_item(item).quantidade == 7
+    assert database.count_archived_items() == 0
+    # The restore moves the row back; the change feed only sees the update.
+    assert conn.execute("SELECT item_id, operacao FROM alteracoes WHERE id > ?", (last,)).fetchall() == [
+        (item.id, "U")]
+
+
+def test_items_at_after_compaction(db):
+    kept = _new_item(descricao="Mantido")
+    changed = _new_item(descricao="Alterado")
+    gone = _new_item(descricao="Excluido")
+    changed.quantidade = 9
+    changed = database.update_item(changed)
+    database.delete_items([gone.id])
+    snapshot_id = database.take_snapshot(min_events=0, batch_size=2)
+    assert snapshot_id is not None
+    conn = database.connect_db()
+    with database.transaction() as cursor:
+        # Make it old enough to become the start of the history.
+        cursor.execute("UPDATE instantaneos SET em = datetime('now', '-2 days') WHERE id = ?", (snapshot_id,))
+    database.mark_paid([kept.id], 1)
+    after = _new_item(descricao="Depois")
+    expected = database.get_items_at("9999")
+
+    stops = 0  # Resumed from where each call stopped
+    while database.compact_events(keep_days=1, batch_size=2, max_batches=1) is None:
+        stops += 1
+    assert stops > 1
+    assert conn.execute("SELECT MIN(id) FROM instantaneos").fetchone()[0] == snapshot_id
+    covered = conn.execute("SELECT ate_evento FROM instantaneos WHERE id = ?", (snapshot_id,)).fetchone()[0]
+    assert conn.execute("SELECT COUNT(*) FROM eventos WHERE id <= ?", (covered,)).fetchone()[0] == 0
+
+    assert database.get_items_at("9999") == expected
+    current = conn.execute(f"SELECT {database.ITEM_COLUMNS} FROM itens_todos ORDER BY criado_em DESC, id DESC")
+    assert [item.id for item in expected] == [row[0] for row in current]
+    assert {item.id: item.pago for item in expected}[kept.id] == 1
+    assert after.id in {item.id for item in expected} and gone.id not in {item.id for item in expected}
+    assert database.get_items_at("9999", changed.id)[0].quantidade == 9
+    history = database.get_item_history(changed.id)
+    assert [event.tipo for event in history] == ["inicial"]
+    with pytest.raises(ValueError):
+        database.get_items_at("2000-01-01")
+
+
+def test_snapshot_stopped_midway_is_resumed(db):
+    for i in range(7):
+        _new_item(descricao=f"Lote {i}")
+    assert database.take_snapshot(min_events=0, batch_size=2, max_batches=1) is None
+    assert database.snapshot_in_progress()
+    _new_item(descricao="Durante")
+    snapshot_id = database.take_snapshot(min_events=0, batch_size=2)
+    assert not database.snapshot_in_progress()
+    conn = database.connect_db()
+    copied = conn.execute("SELECT COUNT(*) FROM instantaneo_itens WHERE instantaneo_id = ?",
+                          (snapshot_id,)).fetchone()[0]
+    assert copied == conn.execute("SELECT COUNT(*) FROM itens_todos").fetchone()[0]
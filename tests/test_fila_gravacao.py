@@ -0,0 +1,91 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+import database
+import fila_gravacao
+from fila_gravacao import Journal, WriteBehindQueue
+from models import Item, Money
+
+
+def _item(i):
+    return Item(quantidade=1, descricao=f"Fila {i}", destino="Balcão", valor_unitario=Money(100 + i))
+
+
+def _torn_journal(db_file, committed):
+    """A journal of 5 items, the first ``committed`` already written, cut short while appending a 6th."""
+    journal = Journal(fila_gravacao.journal_path(db_file))
+    journal.load()
+    for i in range(5):
+        journal.append(_item(i))
+    database.insert_queued_items([_item(i) for i in range(committed)], journal.path, journal.assinatura, committed)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"linha": 6, "quantidade": 1, "descr')
+    return journal
+
+
+def _wait(app, condition, timeout=10):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        app.processEvents()
+        time.sleep(0.005)
+    assert condition()
+
+
+def test_load_drops_torn_line(db):
+    path = _torn_journal(db, committed=0).path
+    journal = Journal(path)
+    entries = journal.load()
+    assert [linha for linha, _ in entries] == [1, 2, 3, 4, 5]
+    assert entries[-1][1] == _item(4)
+    assert journal.linha == 5
+    assert Journal(path).load() == entries  # The file was rewritten without the torn line
+
+
+def test_recover_writes_only_lines_past_checkpoint(db, qt_app):
+    before = database.count_items()
+    _torn_journal(db, committed=3)
+    queue = WriteBehindQueue(db)
+    assert len(queue) == 5
+    shown = []
+    queue.adicionado.connect(shown.append)
+    queue.recover()
+    _wait(qt_app, lambda: queue._recovered and len(queue) == 0)
+
+    assert [item.descricao for item in shown] == ["Fila 3", "Fila 4"]
+    assert database.count_items() == before + 5  # 3 before the crash, 2 replayed
+    rows = database.connect_db().execute("SELECT descricao FROM itens WHERE descricao LIKE 'Fila %' ORDER BY id")
+    assert [row[0] for row in rows] == [f"Fila {i}" for i in range(5)]
+    assert Journal(queue.journal.path).load() == []  # Cleared once everything is committed
+
+
+@pytest.mark.parametrize("error", [sqlite3.IntegrityError("CHECK constraint failed"),
+                                   sqlite3.OperationalError("database is locked")])
+def test_failing_item_is_set_aside(db, qt_app, monkeypatch, error):
+    insert_queued_items = database.insert_queued_items
+
+    def failing(items, *args):
+        if any(item.descricao == "Fila 1" for item in items):
+            raise error
+        return insert_queued_items(items, *args)
+
+    monkeypatch.setattr(fila_gravacao.database, "insert_queued_items", failing)
+    monkeypatch.setattr(fila_gravacao, "FLUSH_INTERVAL_MS", 1)
+    queue = WriteBehindQueue(db)
+    rejected = []
+    queue.rejeitado.connect(lambda provisional_id, motivo: rejected.append((provisional_id, motivo)))
+    queue.recover()
+    _wait(qt_app, lambda: queue._recovered)
+    for i in range(3):
+        queue.add(_item(i))
+    queue.flush()
+    _wait(qt_app, lambda: len(queue) == 0 and not queue._in_flight)
+
+    assert rejected == [(-2, str(error))]
+    with open(queue.rejects_path, encoding="utf-8") as f:
+        assert [json.loads(line)["descricao"] for line in f] == ["Fila 1"]
+    rows = database.connect_db().execute("SELECT descricao FROM itens WHERE descricao LIKE 'Fila %' ORDER BY id")
+    assert [row[0] for row in rows] == ["Fila 0", "Fila 2"]
+    assert database.get_import_checkpoint(queue.journal.path)[1] == 3
@@ -0,0 +1,64 @@
+import database
+import manutencao
+from models import Item, Money
+
+
+def _old_paid_items(count):
+    database.insert_items(Item(quantidade=1, descricao=f"Antigo {i}", destino="Obra", valor_unitario=Money(100),
+                               pago=1) for i in range(count))
+    with database.transaction() as cursor:
+        cursor.execute("UPDATE itens SET criado_em = '2020-01-01 10:00:00' WHERE pago = 1")
+        return cursor.execute("SELECT COUNT(*) FROM itens WHERE pago = 1").fetchone()[0]
+
+
+def test_archiving_stops_at_max_batches(db):
+    paid = _old_paid_items(database.ARCHIVE_BATCH_SIZE + 1)
+
+    status = manutencao.run_maintenance(["arquivar", "otimizar"], force=True, max_batches=1)
+    assert status.pendente and status.executadas == []
+    assert status.arquivados == database.ARCHIVE_BATCH_SIZE
+    assert "arquivar" not in database.get_maintenance_ages()
+
+    status = manutencao.run_maintenance(["arquivar", "otimizar"], force=True, max_batches=1)
+    assert not status.pendente and status.arquivados == paid - database.ARCHIVE_BATCH_SIZE
+    assert status.executadas == ["arquivar", "otimizar"]
+    assert set(database.get_maintenance_ages()) == {"arquivar", "otimizar"}
+
+
+def test_due_tasks(db):
+    assert manutencao.due_tasks(manutencao.APP_TASKS) == list(manutencao.APP_TASKS)
+    manutencao.run_maintenance(["otimizar"])
+    assert "otimizar" not in manutencao.due_tasks(manutencao.APP_TASKS)
+
+
+def test_snapshot_stops_at_max_batches(db):
+    database.insert_items(Item(quantidade=1, descricao=f"Novo {i}", destino="Obra", valor_unitario=Money(100))
+                          for i in range(database.SNAPSHOT_MIN_EVENTS))
+
+    status = manutencao.run_maintenance(["instantaneo", "otimizar"], force=True, max_batches=1)
+    assert status.pendente and status.executadas == []
+    assert database.snapshot_in_progress()
+
+    status = manutencao.run_maintenance(["instantaneo", "otimizar"], force=True)
+    assert not status.pendente and status.executadas == ["instantaneo", "otimizar"]
+    assert not database.snapshot_in_progress()
+
+
+def test_compaction_stops_at_max_batches(db, monkeypatch):
+    database.insert_items(Item(quantidade=1, descricao=f"Novo {i}", destino="Obra", valor_unitario=Money(100))
+                          for i in range(3))
+    assert database.take_snapshot(min_events=0) is not None
+    with database.transaction() as cursor:
+        cursor.execute("UPDATE instantaneos SET em = datetime('now', '-400 days')")
+    compact_events = database.compact_events
+    monkeypatch.setattr(database, "compact_events",
+                        lambda max_batches: compact_events(batch_size=1, max_batches=max_batches))
+
+    status = manutencao.run_maintenance(["compactar", "otimizar"], force=True, max_batches=1)
+    assert status.pendente and status.executadas == []
+    while status.pendente:
+        status = manutencao.run_maintenance(["compactar", "otimizar"], force=True, max_batches=1)
+    assert status.executadas == ["compactar", "otimizar"]
+    conn = database.connect_db()
+    assert conn.execute("SELECT COUNT(*) FROM instantaneos").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM eventos").fetchone()[0] == 0
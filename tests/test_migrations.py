@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import database
+import migrations
+from models import Money
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import check_query_plans  # noqa: E402
+
+ITEM_FIELDS = "id, quantidade, descricao, destino, criado_em"
+
+
+def _items(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"SELECT {ITEM_FIELDS} FROM itens ORDER BY id").fetchall()
+
+
+def test_baseline_migrates_to_latest(baseline_db):
+    before = _items(baseline_db)
+    database.init_db()
+    conn = database.connect_db()
+    assert migrations.current_version(conn) == migrations.latest_version()
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute(f"SELECT {ITEM_FIELDS} FROM itens ORDER BY id").fetchall() == before
+
+
+def test_migrates_in_steps(baseline_db):
+    pool = database.get_db_pool()
+    assert migrations.migrate(pool, target=1) == 1
+    assert migrations.migrate(pool) == migrations.latest_version()
+    assert migrations.migrate(pool) == migrations.latest_version()  # Nothing left to do
+
+
+# On a new database, as benchmarks/check_query_plans.py runs them: the
+# migrations ANALYZE itens, and with the few baseline rows a scan is cheapest.
+@pytest.mark.parametrize("label, sql, params, index", check_query_plans.QUERIES,
+                         ids=[query[0] for query in check_query_plans.QUERIES])
+def test_query_plan(empty_db, label, sql, params, index):
+    plan = database.explain_query_plan(sql, params)
+    assert not [step for step in plan if step.startswith("SCAN itens") or "USE TEMP B-TREE" in step], plan
+    assert any(index in step for step in plan), plan
+
+
+def test_summaries_backfilled(baseline_db):
+    database.init_db()
+    conn = database.connect_db()
+    for table, key in (("resumo_destino", "COALESCE(destino, '')"), ("resumo_dia", "COALESCE(date(criado_em), '')")):
+        assert conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall() == conn.execute(f"""
+            SELECT {key}, pago, COUNT(*), SUM(quantidade), SUM(valor_total)
+            FROM itens GROUP BY 1, 2 ORDER BY 1, 2""").fetchall()
+    assert sum(total.itens for total in database.get_totals_by_status()) == len(_items(baseline_db))
+
+
+def test_money_stored_as_centavos(baseline_db):
+    with sqlite3.connect(baseline_db) as conn:
+        reais = conn.execute("SELECT id, valor_unitario, valor_total FROM itens ORDER BY id").fetchall()
+    database.init_db()
+    rows = database.connect_db().execute("""
+        SELECT id, valor_unitario, valor_total, typeof(valor_unitario), typeof(valor_total)
+        FROM itens ORDER BY id""").fetchall()
+    assert [(id, unitario, total) for id, unitario, total, *_ in rows] == [
+        (id, Money.from_reais(unitario), Money.from_reais(total)) for id, unitario, total in reais]
+    assert {types for *_, unit_type, total_type in rows for types in (unit_type, total_type)} == {"integer"}
+
+
+def test_first_snapshot_backfilled(baseline_db):
+    database.init_db()
+    conn = database.connect_db()
+    assert conn.execute("SELECT COUNT(*) FROM instantaneos").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM instantaneo_itens").fetchone()[0] == len(_items(baseline_db))
+
+
+def test_suggestions_backfilled(baseline_db):
+    database.init_db()
+    conn = database.connect_db()
+    for campo in ("descricao", "destino"):
+        assert sorted(database.get_suggestions(campo)) == conn.execute(f"""
+            SELECT {campo}, COUNT(*) FROM itens WHERE {campo} <> '' GROUP BY 1 ORDER BY 1""").fetchall()
@@ -0,0 +1,72 @@
+from decimal import Decimal
+
+import pytest
+
+from models import Money, parse_item
+
+
+@pytest.mark.parametrize("text, centavos", [
+    ("10", 1000),
+    ("10,5", 1050),
+    ("10,50", 1050),
+    ("1.234,56", 123456),
+    ("1.234", 123400),
+    ("1.234.567,89", 123456789),
+    ("R$ 1.234,56", 123456),
+    ("R$\xa010,00", 1000),
+    ("-5,25", -525),
+    ("10.50", 1050),  # Dot decimal, accepted by default
+    ("10.5", 1050),
+])
+def test_parse(text, centavos):
+    assert Money.parse(text) == centavos
+
+
+@pytest.mark.parametrize("text", ["", "abc", "R$", "0,005", "1,234.56", "12.345.6", "1234,567", "1,2,3", "10,",
+                                  ",50", "1..2"])
+def test_parse_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        Money.parse(text)
+
+
+def test_parse_ptbr_only():
+    assert Money.parse("1.234", dot_decimal=False) == 123400
+    with pytest.raises(ValueError):
+        Money.parse("10.50", dot_decimal=False)
+
+
+def test_parse_item():
+    item = parse_item("2", "Parafuso", "Obra", "1.234,56")
+    assert (item.quantidade, item.descricao, item.destino, item.valor_unitario) == (2, "Parafuso", "Obra", 123456)
+    with pytest.raises(ValueError):
+        parse_item("2", "Parafuso", "Obra", "1,234.56")
+
+
+@pytest.mark.parametrize("quantidade", [3, 3.0, Decimal("3"), Decimal("3.00"), " 3 "])
+def test_parse_item_whole_quantity(quantidade):
+    assert parse_item(quantidade, "Parafuso", "Obra", 1.5).quantidade == 3
+
+
+@pytest.mark.parametrize("quantidade", [3.5, Decimal("3.1"), float("nan"), float("inf"), "3.0", "3,5", True, None])
+def test_parse_item_rejects_quantity(quantidade):
+    with pytest.raises(ValueError):
+        parse_item(quantidade, "Parafuso", "Obra", 1.5)
+
+
+def test_from_reais():
+    assert Money.from_reais(0.1) + Money.from_reais(0.2) == Money.from_reais("0.3")
+    assert Money.from_reais(Decimal("2.675")) == 268
+    assert Money(123456).reais == Decimal("1234.56")
+
+
+def test_arithmetic():
+    total = Money(150) + Money(50) - 25
+    assert isinstance(total, Money)
+    assert total == 175
+    assert isinstance(3 * Money(150), Money) and Money(150) * 3 == 450
+    with pytest.raises(TypeError):
+        Money(150) * 1.5
+    with pytest.raises(TypeError):
+        Money(100) + 0.5
+    with pytest.raises(TypeError):
+        Money(100) - 0.5
@@ -0,0 +1,28 @@
+import database
+from models import Item, Money
+from sugestoes import PrefixIndex
+
+
+def test_lookup_ranks_by_usage_ignoring_accents():
+    index = PrefixIndex([("Depósito", 3), ("depoimento", 5), ("Deposito central", 1), ("Obra", 9), ("Vazio", 0)],
+                        limit=2)
+    assert len(index) == 4
+    assert index.lookup("DEPO") == ["depoimento", "Depósito"]
+    assert index.lookup("depós") == ["Depósito", "Deposito central"]
+    assert index.lookup("") == [] and index.lookup("x") == []
+    index.add("Depósito")
+    index.add("Deposito novo")
+    assert index.lookup("depo") == ["depoimento", "Depósito"]
+    assert index.lookup("deposito n") == ["Deposito novo"]
+
+
+def test_triggers_keep_counts(db):
+    item = database.insert_item(Item(quantidade=1, descricao="Cimento raro", destino="Obra nova",
+                                     valor_unitario=Money(100)))
+    assert ("Cimento raro", 1) in database.get_suggestions("descricao")
+    item.destino = "Outra obra"
+    database.update_item(item)
+    destinos = dict(database.get_suggestions("destino"))
+    assert "Obra nova" not in destinos and destinos["Outra obra"] == 1
+    database.delete_items([item.id])
+    assert "Cimento raro" not in dict(database.get_suggestions("descricao"))